@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, redirect, session, url_for, send_file
+from flask import Flask, request, jsonify, redirect, session, url_for, send_file, Response, stream_with_context
 from flask_cors import CORS
 from flask_bcrypt import Bcrypt
 from pymongo import MongoClient
@@ -19,10 +19,45 @@ from google.auth.transport.requests import Request
 import google.generativeai as genai
 from google.cloud import speech
 from faster_whisper import WhisperModel
+from audio_stream import probe_duration, stream_pcm_chunks
+from transcription_executor import TranscriptionExecutor, TranscriptionPool
+from inference_server import RemoteWhisperModel
+from whisper_batcher import BatchingWhisperModel
+from jobs import JobStore, JOB_COMPLETED, JOB_FAILED
+from live_transcription import (
+    run_live_transcription, save_segment, mark_finished, claim_session, release_session, LIVE_WINDOW_SEC
+)
+from vad_segmenter import VadSegmenter, OverlapStitcher
+from transcript_cache import TranscriptCache, cache_key, save_and_hash
+from startup import Lifecycle
+from note_generation import (
+    NoteMapReducer, notes_prompt, parse_structured_notes, parse_markdown_notes, render_notes_markdown, JSON_OUTPUT
+)
+from transcript_cleaner import PipelinedCleaner, stage_timing
+from transcript_postprocess import TranscriptPostProcessor
+from llm_client import GeminiClient
+from gemini_governor import (
+    GeminiGovernor, RateLimited, PRIORITY_INTERACTIVE, PRIORITY_NOTES, PRIORITY_BACKGROUND
+)
+from sse import SSE_HEADERS, relay_tokens
+from passage_index import PassageIndex
+from note_bodies import BODY_FIELDS, NoteBodyStore, backfill as backfill_note_bodies
+from repository import NoteRepository, FolderRepository, RoundTripCounter
+from profile_cache import ProfileCache
+from note_chat import (
+    build_note_index, choose_chat_prompt, load_note_index, retrieval_query, summary_prompt
+)
+from chat_sessions import ChatSessionStore
+from transcription_profiles import (
+    TranscriptionProfile, build_profiles, default_profile_name,
+    BASE_WHISPER_OPTIONS, PROFILE_BALANCED, PROFILE_FAST
+)
 import io
 import os
+from collections import deque
 import time
 import tempfile
+import threading
 import subprocess
 import shutil
 import wave
@@ -40,6 +75,8 @@ load_dotenv()
 # 1️⃣ SINGLE APP INITIALIZATION
 # ===========================
 app = Flask(__name__)
+# Heavy resources warm up in the background; see /health/ready
+lifecycle = Lifecycle()
 
 
 # ===========================
@@ -125,6 +162,34 @@ GEMINI_MODEL = os.getenv("GEMINI_MODEL", "models/gemini-1.5-flash")  # ✅ Using
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 print(f"🔑 Using Gemini API Key: {os.getenv('GEMINI_API_KEY')[:20] if os.getenv('GEMINI_API_KEY') else 'NOT SET'}...")
 
+# ✅ Host-wide token bucket per API key: chat > note generation > background cleaning
+gemini_governor = GeminiGovernor(
+    os.getenv('GEMINI_API_KEY', ''),
+    rate_per_min=float(os.getenv('GEMINI_RPM', '60')),
+    burst=int(os.getenv('GEMINI_BURST', '10')),
+    max_wait={
+        PRIORITY_INTERACTIVE: float(os.getenv('GEMINI_MAX_WAIT_INTERACTIVE', '2')),
+        PRIORITY_NOTES: float(os.getenv('GEMINI_MAX_WAIT_NOTES', '15')),
+        PRIORITY_BACKGROUND: float(os.getenv('GEMINI_MAX_WAIT_BACKGROUND', '60'))
+    }
+)
+
+# ✅ One shared client: reused model handle, per-call deadlines, jittered retries, prompt cache
+gemini = GeminiClient(
+    GEMINI_MODEL,
+    timeout=float(os.getenv('GEMINI_TIMEOUT_SEC', '60')),
+    max_retries=int(os.getenv('GEMINI_MAX_RETRIES', '3')),
+    cache_size=int(os.getenv('GEMINI_CACHE_SIZE', '256')),
+    governor=gemini_governor
+)
+
+
+def rate_limited_response(e: RateLimited):
+    """429 with Retry-After instead of holding the request while the Gemini budget refills"""
+    response = jsonify({'error': str(e), 'retry_after': e.retry_after})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 429
+
 
 # ===========================
 # 8️⃣ GOOGLE SPEECH-TO-TEXT SETUP
@@ -149,6 +214,9 @@ if MONGO_URI and 'authSource' not in MONGO_URI:
     MONGO_URI += "&authSource=admin" if '?' in MONGO_URI else "?authSource=admin"
 
 
+# ✅ Counts the MongoDB commands each request sends (X-Mongo-Round-Trips header, /health)
+mongo_round_trips = RoundTripCounter()
+
 try:
     if not MONGO_URI:
         raise Exception("MONGODB_URL environment variable not set")
@@ -159,19 +227,27 @@ try:
     mongo_client = MongoClient(
         MONGO_URI, 
         serverSelectionTimeoutMS=10000,
-        tls=True,
-        tlsAllowInvalidCertificates=True
+        tls=os.getenv('MONGODB_TLS', '1') != '0',
+        tlsAllowInvalidCertificates=True,
+        event_listeners=[mongo_round_trips]
     )
-    db = mongo_client.get_database('note_flow_db')
+    db = mongo_client.get_database(os.getenv('MONGODB_DB', 'note_flow_db'))
     users_collection = db.users
     notes_collection = db.notes
-    mongo_client.server_info()
-    print("✅ Connected to MongoDB!")
+    jobs_collection = db.jobs
+    chat_sessions_collection = db.chat_sessions
+    note_bodies_collection = db.note_bodies
+    # MongoClient connects lazily; the first round trip happens in the 'mongo' warm-up step
+    print("✅ MongoDB client configured")
 except Exception as e:
     print(f"❌ Error connecting to MongoDB: {e}")
+    mongo_client = None
     db = None
     users_collection = None
     notes_collection = None
+    jobs_collection = None
+    chat_sessions_collection = None
+    note_bodies_collection = None
 
 
 # ===========================
@@ -206,29 +282,200 @@ os.makedirs(AUDIO_STORAGE_DIR, exist_ok=True)
 print(f"✅ Audio storage directory: {AUDIO_STORAGE_DIR}")
 
 WHISPER_MODEL = os.getenv('WHISPER_MODEL', 'tiny')
-print(f"Loading Whisper model: {WHISPER_MODEL} on {DEVICE}...")
+# >1 fans chunks out to that many worker processes, shared by every model
+TRANSCRIBE_POOL_SIZE = int(os.getenv('TRANSCRIBE_POOL_SIZE', '1'))
+# >1 batches VAD clips from concurrent requests through one forward pass
+WHISPER_BATCH_SIZE = int(os.getenv('WHISPER_BATCH_SIZE', '1'))
+WHISPER_BATCH_WAIT_MS = float(os.getenv('WHISPER_BATCH_WAIT_MS', '20'))
+
+# Set to use the shared per-host inference server instead of loading weights here
+WHISPER_INFERENCE_SOCKET = os.getenv('WHISPER_INFERENCE_SOCKET')
+if WHISPER_INFERENCE_SOCKET:
+    TRANSCRIBE_POOL_SIZE = 1  # the server owns model concurrency
+
+# Weights load on a warm-up thread; 0 defers it to the first request that needs the model
+WARMUP_ON_BOOT = os.getenv('WARMUP_ON_BOOT', '1') != '0'
+# How long a transcription request waits for a still-loading model before giving up
+MODEL_WAIT_SEC = float(os.getenv('MODEL_WAIT_SEC', '60'))
+# One executor per model name, shared by every profile that uses that model
+transcribers = {}
+transcribers_lock = threading.Lock()
+# One process pool for every model when TRANSCRIBE_POOL_SIZE > 1 (created with the first executor)
+transcription_pool = None
+
+
+def build_transcriber(model_name: str) -> TranscriptionExecutor:
+    """Load a model (or reach the inference server) and run one dummy inference"""
+    global transcription_pool
+    if WHISPER_INFERENCE_SOCKET:
+        loaded = RemoteWhisperModel(WHISPER_INFERENCE_SOCKET)
+        print(f"✅ Using shared Whisper inference server at {WHISPER_INFERENCE_SOCKET}")
+    elif TRANSCRIBE_POOL_SIZE <= 1:
+        print(f"Loading Whisper model: {model_name} on {DEVICE}...")
+        loaded = WhisperModel(
+            model_name,
+            device=DEVICE,
+            compute_type=COMPUTE_TYPE,
+            download_root="./whisper_models",
+            num_workers=4
+        )
+        print(f"✅ Whisper model {model_name} loaded successfully on {DEVICE}!")
+        if WHISPER_BATCH_SIZE > 1:
+            loaded = BatchingWhisperModel(loaded, WHISPER_BATCH_SIZE, WHISPER_BATCH_WAIT_MS)
+            print(f"✅ Batching concurrent requests (batch {WHISPER_BATCH_SIZE}, wait {WHISPER_BATCH_WAIT_MS}ms)")
+    else:
+        loaded = None
+        if transcription_pool is None:
+            transcription_pool = TranscriptionPool(
+                TRANSCRIBE_POOL_SIZE, device=DEVICE, compute_type=COMPUTE_TYPE, download_root="./whisper_models"
+            )
+
+    executor = TranscriptionExecutor(loaded, model_name=model_name, pool=transcription_pool)
+
+    # One short inference per model instance so the first real request doesn't pay for it
+    warmup_audio = np.random.default_rng(0).normal(0, 0.01, 16000).astype(np.float32)
+    warmup_options = dict(BASE_WHISPER_OPTIONS, language='en', vad_filter=False)
+    list(executor.map_chunks([warmup_audio] * max(1, TRANSCRIBE_POOL_SIZE), warmup_options))
+    return executor
+
+
+def profile_model_name(profile: TranscriptionProfile) -> str:
+    # The inference server serves a single model; profiles still vary beam width, VAD and cleaning
+    return WHISPER_MODEL if WHISPER_INFERENCE_SOCKET else profile.model_name
+
+
+def load_transcriber(model_name: str) -> TranscriptionExecutor:
+    """Executor for `model_name`, loading it the first time any profile asks"""
+    with transcribers_lock:
+        if model_name not in transcribers:
+            transcribers[model_name] = build_transcriber(model_name)
+        return transcribers[model_name]
+
 
+def load_whisper():
+    """Warm-up step: the models behind the default profiles (fast and balanced)"""
+    for name in (PROFILE_BALANCED, PROFILE_FAST):
+        load_transcriber(profile_model_name(TRANSCRIPTION_PROFILES[name]))
+
+
+def get_transcriber(profile: Optional[TranscriptionProfile] = None) -> Optional[TranscriptionExecutor]:
+    """
+    The executor for a profile's model (balanced by default). Waits up to
+    MODEL_WAIT_SEC while boot warm-up is still running; models outside the
+    default profiles are loaded on first use.
+    """
+    model_name = profile_model_name(profile or TRANSCRIPTION_PROFILES[PROFILE_BALANCED])
+    if model_name not in transcribers:
+        if not lifecycle.wait_for('whisper', timeout=MODEL_WAIT_SEC):
+            return None
+        return load_transcriber(model_name)
+    return transcribers[model_name]
+
+
+# ✅ Background transcription jobs (state lives in MongoDB)
+TRANSCRIBE_JOB_WORKERS = int(os.getenv('TRANSCRIBE_JOB_WORKERS', '2'))
+job_store = JobStore(jobs_collection, max_workers=TRANSCRIBE_JOB_WORKERS) if jobs_collection is not None else None
+# Live sessions hold a thread for the whole recording, so they get their own pool
+LIVE_SESSION_WORKERS = int(os.getenv('LIVE_SESSION_WORKERS', '4'))
+live_job_store = JobStore(jobs_collection, max_workers=LIVE_SESSION_WORKERS) if jobs_collection is not None else None
+
+# ✅ Transcript cache: identical uploads + decode settings skip Whisper and Gemini
+TRANSCRIPT_CACHE_MAX_ENTRIES = int(os.getenv('TRANSCRIPT_CACHE_MAX_ENTRIES', '1000'))
 try:
-    model = WhisperModel(
-        WHISPER_MODEL,
-        device=DEVICE,
-        compute_type=COMPUTE_TYPE,
-        download_root="./whisper_models",
-        num_workers=4
-    )
-    print(f"✅ Whisper model loaded successfully on {DEVICE}!")
+    transcript_cache = TranscriptCache(
+        db.transcript_cache, db.cache_stats, max_entries=TRANSCRIPT_CACHE_MAX_ENTRIES
+    ) if db is not None else None
 except Exception as e:
-    print(f"❌ Error loading Whisper model: {e}")
-    model = None
-
-# Check for ffmpeg
-ffmpeg_path = shutil.which('ffmpeg')
-if not ffmpeg_path:
-    print("⚠️ WARNING: 'ffmpeg' not found in PATH.")
-else:
+    print(f"⚠️ Transcript cache disabled: {e}")
+    transcript_cache = None
+
+# ✅ Chat sessions: older turns are folded into a running summary in the background
+CHAT_RECENT_TURNS = int(os.getenv('CHAT_RECENT_TURNS', '3'))
+CHAT_COMPACT_EVERY = int(os.getenv('CHAT_COMPACT_EVERY', '3'))
+chat_sessions = ChatSessionStore(
+    chat_sessions_collection,
+    lambda summary, turns: generate_with_gemini(summary_prompt(summary, turns), timeout=30,
+                                                priority=PRIORITY_BACKGROUND),
+    recent_turns=CHAT_RECENT_TURNS, compact_every=CHAT_COMPACT_EVERY
+) if chat_sessions_collection is not None else None
+
+# ✅ Note bodies (content, transcript, passage index) live apart from note metadata
+note_bodies = NoteBodyStore(note_bodies_collection) if note_bodies_collection is not None else None
+notes_repo = NoteRepository(notes_collection, note_bodies, db.folders) if db is not None else None
+folders_repo = FolderRepository(db.folders) if db is not None else None
+
+# ✅ Per-worker profile cache for /auth/status, /me and /auth/verify-token (0 disables)
+profile_cache = ProfileCache(
+    users_collection,
+    ttl_sec=float(os.getenv('PROFILE_CACHE_TTL_SEC', '60')),
+    max_entries=int(os.getenv('PROFILE_CACHE_MAX_ENTRIES', '10000'))
+) if users_collection is not None else None
+
+# ✅ Live sessions buffer MediaRecorder timeslices here (shared by workers on a host)
+LIVE_SESSION_DIR = os.path.join(tempfile.gettempdir(), 'noteflow_live')
+os.makedirs(LIVE_SESSION_DIR, exist_ok=True)
+
+# ✅ Shared chunking settings for every Whisper call
+CHUNK_DURATION_SEC = 60
+# Energy VAD pre-pass: cut chunks at pauses and drop long silences before Whisper
+VAD_PREPASS = os.getenv('VAD_PREPASS', '1') != '0'
+VAD_BLOCK_SEC = 10
+# ✅ Quality/latency profiles: model, beam width, VAD aggressiveness and Gemini cleaning
+TRANSCRIPTION_PROFILES = build_profiles(WHISPER_MODEL)
+# ✅ Local cleanup on every chunk (fillers, Whisper loops, glossary terms) before or instead of Gemini
+# Words in the vocabulary list are never "corrected" to a glossary term
+_vocab_path = os.getenv('TRANSCRIPT_VOCAB_PATH', '/usr/share/dict/words')
+postprocessor = TranscriptPostProcessor.from_file(os.getenv('TRANSCRIPT_GLOSSARY_PATH'),
+                                                  _vocab_path if os.path.exists(_vocab_path) else None)
+
+
+
+def check_ffmpeg():
+    ffmpeg_path = shutil.which('ffmpeg')
+    if not ffmpeg_path:
+        raise RuntimeError("'ffmpeg' not found in PATH")
     print(f"✅ ffmpeg found at: {ffmpeg_path}")
 
 
+def check_mongo():
+    if mongo_client is None:
+        raise RuntimeError('MongoDB not configured')
+    mongo_client.server_info()
+    if transcript_cache is not None:
+        transcript_cache.ensure_indexes()
+    notes_repo.ensure_indexes()
+    folders_repo.ensure_indexes()
+    if chat_sessions is not None:
+        chat_sessions.ensure_indexes()
+    print("✅ Connected to MongoDB!")
+
+
+NOTE_BODY_BACKFILL_MARKER = 'note_bodies_v1'
+
+
+def backfill_bodies():
+    """Once per database: move inline bodies and create empty ones, so every note is searchable"""
+    if not lifecycle.wait_for('mongo'):
+        raise RuntimeError('MongoDB not available')
+    if db.migrations.find_one({'_id': NOTE_BODY_BACKFILL_MARKER}):
+        return
+    counts = backfill_note_bodies(notes_collection, note_bodies, pause_sec=0.2)
+    db.migrations.update_one({'_id': NOTE_BODY_BACKFILL_MARKER},
+                             {'$set': {**counts, 'done_at': time.time()}}, upsert=True)
+    print(f"📦 Note body backfill: {counts['moved']} moved, {counts['created']} created")
+
+
+# ✅ STARTUP LIFECYCLE: readiness requires every step below; liveness never waits on them
+lifecycle.add_step('whisper', load_whisper, retry_sec=5 if WHISPER_INFERENCE_SOCKET else None)
+lifecycle.add_step('mongo', check_mongo, retry_sec=10)
+lifecycle.add_step('ffmpeg', check_ffmpeg)
+# Not required for readiness: reads work on both layouts while it runs
+if os.getenv('NOTE_BODY_BACKFILL', '1') != '0' and note_bodies is not None:
+    lifecycle.add_step('note_bodies', backfill_bodies, required=False, retry_sec=60)
+if WARMUP_ON_BOOT:
+    lifecycle.start()
+
+
 # ===========================
 # 🔧 MOBILE COOKIE FIX - UPDATED
 # ===========================
@@ -338,18 +585,53 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-def generate_with_gemini(prompt: str, timeout: int = 120) -> str:
+def generate_with_gemini(prompt: str, timeout: Optional[float] = None,
+                         generation_config: Optional[dict] = None, priority: str = PRIORITY_NOTES) -> str:
+    """All Gemini calls go through here; `timeout` bounds the call including retries"""
     try:
-        model = genai.GenerativeModel(GEMINI_MODEL)
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        return gemini.generate(prompt, timeout=timeout, generation_config=generation_config, priority=priority)
     except Exception as e:
         print(f"Gemini API error: {e}")
         raise
 
-def clean_transcript_with_gemini(raw_transcript: str) -> str:
-    """Clean transcript errors using Gemini with academic context"""
+
+# ✅ Long transcripts: section notes generated in parallel, then merged (map-reduce)
+NOTES_SECTION_CHARS = int(os.getenv('NOTES_SECTION_CHARS', '12000'))
+NOTES_MAP_WORKERS = int(os.getenv('NOTES_MAP_WORKERS', '8'))  # per request; the governor bounds the host
+# ✅ Cleaning runs per chunk alongside Whisper instead of once at the end
+CLEAN_PIPELINE_WORKERS = int(os.getenv('CLEAN_PIPELINE_WORKERS', '2'))
+CLEAN_MIN_CHARS = int(os.getenv('CLEAN_MIN_CHARS', '1200'))
+# Skip Gemini (local post-processing only) when cleaning would queue longer than this for budget
+CLEAN_MAX_QUEUE_SEC = float(os.getenv('CLEAN_MAX_QUEUE_SEC', '5'))
+
+
+def new_cleaner(profile: TranscriptionProfile) -> Optional[PipelinedCleaner]:
+    """Gemini cleaner for the profile, or None for local post-processing only"""
+    if not profile.clean:
+        return None
+    try:
+        gemini_governor.check(PRIORITY_BACKGROUND, max_wait=CLEAN_MAX_QUEUE_SEC)
+    except RateLimited as e:
+        print(f"🚦 Skipping Gemini cleaning ({e}); using the locally post-processed transcript")
+        return None
+    return PipelinedCleaner(clean_transcript_with_gemini, max_workers=CLEAN_PIPELINE_WORKERS,
+                            min_chars=CLEAN_MIN_CHARS)
+
+
+note_reducer = NoteMapReducer(generate_with_gemini, max_workers=NOTES_MAP_WORKERS,
+                              section_chars=NOTES_SECTION_CHARS, reduce_chars=2 * NOTES_SECTION_CHARS)
+
+def clean_transcript_with_gemini(raw_transcript: str, context: str = '') -> str:
+    """
+    Clean transcript errors using Gemini with academic context.
+    `context` is the text just before this piece (when cleaning chunk by chunk);
+    it guides terminology but is not returned.
+    """
     try:
+        context_block = f"""PRECEDING TEXT (context only, do NOT include it in your answer):
+{context}
+
+""" if context else ''
         prompt = f"""You are correcting a lecture/educational transcript with potential speech-to-text errors.
 
 CONTEXT: This is from an academic lecture (science, medicine, engineering, etc.)
@@ -366,12 +648,12 @@ RULES:
 4. If a word could be scientific, assume it is
 5. Return ONLY the corrected text, no explanations
 
-TRANSCRIPT TO FIX:
+{context_block}TRANSCRIPT TO FIX:
 {raw_transcript}
 
 CORRECTED VERSION:"""
         
-        cleaned = generate_with_gemini(prompt, timeout=30)
+        cleaned = generate_with_gemini(prompt, timeout=30, priority=PRIORITY_BACKGROUND)
         print(f"✅ Transcript cleaned: {len(raw_transcript)} → {len(cleaned)} chars")
         return cleaned
     except Exception as e:
@@ -458,65 +740,6 @@ def decode_audio_to_np(path: str, target_sr: int = 16000) -> Tuple[Optional[np.n
         print(f"decode_audio_to_np failed: {e}")
         return None, None
 
-def chunk_audio_file(input_path, chunk_duration_sec=60):
-    """
-    Split audio/video file into smaller chunks for transcription.
-    Returns list of chunk file paths.
-    """
-    chunks = []
-    try:
-        # Get total duration using ffprobe
-        probe_cmd = [
-            'ffprobe', '-v', 'error', '-show_entries',
-            'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1',
-            input_path
-        ]
-        result = subprocess.run(probe_cmd, capture_output=True, text=True)
-        total_duration = float(result.stdout.strip())
-        
-        print(f"Total audio duration: {total_duration:.2f}s")
-        
-        # Calculate number of chunks needed
-        num_chunks = int(np.ceil(total_duration / chunk_duration_sec))
-        
-        # Create chunks
-        for i in range(num_chunks):
-            start_time = i * chunk_duration_sec
-            chunk_path = os.path.join(
-                tempfile.gettempdir(), 
-                f"chunk_{i}_{int(time.time())}.wav"
-            )
-            
-            # Extract chunk using ffmpeg
-            cmd = [
-                'ffmpeg', '-y', '-i', input_path,
-                '-ss', str(start_time),
-                '-t', str(chunk_duration_sec),
-                '-acodec', 'pcm_s16le',
-                '-ac', '1',
-                '-ar', '16000',
-                chunk_path
-            ]
-            
-            proc = subprocess.run(cmd, capture_output=True)
-            if proc.returncode == 0 and os.path.exists(chunk_path):
-                chunks.append(chunk_path)
-                print(f"Created chunk {i+1}/{num_chunks}: {chunk_path}")
-            else:
-                print(f"Failed to create chunk {i}")
-        
-        return chunks
-    
-    except Exception as e:
-        print(f"Error chunking audio: {e}")
-        # Cleanup any created chunks on error
-        for chunk in chunks:
-            try:
-                os.unlink(chunk)
-            except:
-                pass
-        return []
-
 # ===========================
 # 🔐 AUTHENTICATION ROUTES - UPDATED
 # ===========================
@@ -565,6 +788,7 @@ def register():
         'created_at': time.time(),
         'auth_provider': 'local'
     }).inserted_id
+    profile_cache.invalidate(str(user_id))
 
     # ✅ Set session
     session['user_id'] = str(user_id)
@@ -654,17 +878,17 @@ def auth_status():
     
     if user_id:
         try:
-            user = users_collection.find_one({'_id': ObjectId(user_id)})
+            user = profile_cache.get(user_id)
             if user:
                 return jsonify({
                     'authenticated': True,
                     'auth_method': auth_method,
                     'user': {
-                        'id': str(user['_id']),
-                        'email': user.get('email'),
-                        'first_name': user.get('first_name'),
-                        'last_name': user.get('last_name'),
-                        'auth_provider': user.get('auth_provider', 'local')
+                        'id': user['id'],
+                        'email': user['email'],
+                        'first_name': user['first_name'],
+                        'last_name': user['last_name'],
+                        'auth_provider': user['auth_provider']
                     }
                 })
         except Exception as e:
@@ -696,7 +920,7 @@ def verify_token_endpoint():
             return jsonify({'error': 'Invalid or expired token'}), 401
         
         user_id = payload['user_id']
-        user = users_collection.find_one({'_id': ObjectId(user_id)})
+        user = profile_cache.get(user_id)
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -712,13 +936,13 @@ def verify_token_endpoint():
             'authenticated': True,
             'token': token,
             'user': {
-                'id': str(user['_id']),
-                'email': user.get('email'),
-                'first_name': user.get('first_name'),
-                'last_name': user.get('last_name'),
-                'name': f"{user.get('first_name', '')} {user.get('last_name', '')}",
-                'auth_provider': user.get('auth_provider', 'local'),
-                'has_google_auth': 'google_credentials' in user
+                'id': user['id'],
+                'email': user['email'],
+                'first_name': user['first_name'],
+                'last_name': user['last_name'],
+                'name': f"{user['first_name'] or ''} {user['last_name'] or ''}",
+                'auth_provider': user['auth_provider'],
+                'has_google_auth': user['has_google_auth']
             }
         })
         
@@ -753,7 +977,7 @@ def get_current_user():
         }), 401
 
     try:
-        user = users_collection.find_one({'_id': ObjectId(user_id)})
+        user = profile_cache.get(user_id)
         if not user:
             return jsonify({
                 'authenticated': False,
@@ -764,13 +988,13 @@ def get_current_user():
             'authenticated': True,
             'auth_method': auth_method,
             'user': {
-                'id': str(user['_id']),
+                'id': user['id'],
                 'email': user['email'],
-                'name': f"{user.get('first_name', '')} {user.get('last_name', '')}",
-                'first_name': user.get('first_name'),
-                'last_name': user.get('last_name'),
-                'has_google_auth': 'google_credentials' in user,
-                'auth_provider': user.get('auth_provider', 'local')
+                'name': f"{user['first_name'] or ''} {user['last_name'] or ''}",
+                'first_name': user['first_name'],
+                'last_name': user['last_name'],
+                'has_google_auth': user['has_google_auth'],
+                'auth_provider': user['auth_provider']
             }
         })
     except Exception as e:
@@ -786,13 +1010,186 @@ def get_current_user():
 # ===========================
 
 
+def transcribe_pcm_blocks(blocks, profile: TranscriptionProfile, max_chunk_sec: float = CHUNK_DURATION_SEC):
+    """
+    Run the VAD pre-pass over a stream of PCM blocks, transcribe the
+    resulting chunks in order with the profile's model and settings, and
+    yield (text, language) per chunk, with forced-cut overlaps stitched and
+    the local post-processor applied.
+    """
+    transcriber = get_transcriber(profile)
+    if transcriber is None:
+        raise RuntimeError('Whisper model not loaded')
+    segmenter = VadSegmenter(max_chunk_sec=max_chunk_sec, enabled=VAD_PREPASS, **profile.segmenter_options())
+    stitcher = OverlapStitcher()
+    pending = deque()
+
+    def chunk_audio():
+        for chunk in segmenter.chunks(blocks):
+            pending.append(chunk)
+            yield chunk.audio
+
+    for segments, language in transcriber.map_chunks(chunk_audio(), profile.whisper_options()):
+        chunk_transcript = stitcher.add(pending.popleft(), segments)
+        chunk_transcript = postprocessor.process(chunk_transcript)
+        yield chunk_transcript, language
+
+    print(f"🔇 VAD pre-pass: {segmenter.stats()}")
+
+
+def finalize_transcription(transcript: str, language: str, audio_path: str, user_id: str, ts: int,
+                           start_time: float) -> dict:
+    """Keep the audio for playback and build the response for a finished (already cleaned) transcript"""
+    elapsed_time = time.time() - start_time
+    print(f"✅ Transcription completed in {elapsed_time:.2f}s using Whisper")
+
+    # ✅ SAVE AUDIO FILE for playback
+    audio_filename = f"{ts}_{user_id}.webm"
+    saved_audio_path = os.path.join(AUDIO_STORAGE_DIR, audio_filename)
+    shutil.copy(audio_path, saved_audio_path)
+    print(f"💾 Saved audio to: {saved_audio_path}")
+
+    return {
+        'transcript': transcript,
+        'audio_url': f'/audio/{audio_filename}',  # ← Return audio URL
+        'success': True,
+        'length': len(transcript),
+        'duration': f"{elapsed_time:.2f}s",
+        'language': language,
+        'method': 'whisper'
+    }
+
+
+def transcript_cache_key(audio_hash: str, profile: TranscriptionProfile) -> str:
+    return cache_key(
+        audio_hash, profile_model_name(profile), profile.whisper_options(),
+        vad_prepass=VAD_PREPASS, chunk_sec=CHUNK_DURATION_SEC, batched=WHISPER_BATCH_SIZE > 1,
+        segmenter=profile.segmenter_options(), clean=profile.clean, postprocess=postprocessor.signature()
+    )
+
+
+def lookup_cached_transcript(audio_hash: Optional[str], profile: TranscriptionProfile) -> Optional[dict]:
+    if transcript_cache is None or not audio_hash:
+        return None
+    try:
+        return transcript_cache.get(transcript_cache_key(audio_hash, profile))
+    except Exception as e:
+        print(f"⚠️ Transcript cache lookup failed: {e}")
+        return None
+
+
+def store_cached_transcript(audio_hash: Optional[str], profile: TranscriptionProfile, transcript: str,
+                            language: Optional[str]):
+    if transcript_cache is None or not audio_hash:
+        return
+    try:
+        transcript_cache.put(transcript_cache_key(audio_hash, profile), transcript, language)
+    except Exception as e:
+        print(f"⚠️ Transcript cache store failed: {e}")
+
+
+def run_transcription_pipeline(temp_path: str, user_id: str, ts: int, audio_hash: Optional[str] = None,
+                               profile_name: Optional[str] = None, progress=None) -> dict:
+    """
+    Decode, transcribe, clean and store an uploaded recording.
+    Returns the /transcribe response payload. `progress(stage, chunks_done,
+    chunks_total, text)` is called as chunks finish when running as a job.
+    Without `profile_name` the profile is picked from the recording length.
+    With `audio_hash`, identical uploads are served from the transcript cache.
+    Always removes `temp_path`.
+    """
+    cleaner = None
+    try:
+        start_time = time.time()
+        language = 'en'
+
+        # Get audio duration
+        duration = probe_duration(temp_path)
+        profile = TRANSCRIPTION_PROFILES[profile_name or default_profile_name(duration)]
+        print(f"📊 Audio duration: {duration:.2f}s, profile: {profile.name}")
+
+        cached = lookup_cached_transcript(audio_hash, profile)
+        if cached:
+            print(f"⚡ Transcript cache hit for {audio_hash[:12]}")
+            result = finalize_transcription(cached['transcript'], cached['language'], temp_path, user_id, ts, start_time)
+            result['cached'] = True
+            result['profile'] = profile.name
+            return result
+
+        # ✅ SINGLE-PASS DECODE: one ffmpeg process streams PCM, the VAD pre-pass
+        # cuts it into <=60s chunks at pauses and drops long silences
+        total_chunks = max(1, int(np.ceil(duration / CHUNK_DURATION_SEC)))
+        print(f"🎤 Using Whisper {profile_model_name(profile)} on ~{total_chunks} streamed chunk(s)...")
+        if progress:
+            progress('transcribing', 0, total_chunks)
+
+        # ✅ PIPELINED CLEANING: each chunk goes to Gemini while the next one transcribes
+        cleaner = new_cleaner(profile)
+        chunk_transcripts = []
+        whisper_start = time.time()
+        blocks = stream_pcm_chunks(temp_path, VAD_BLOCK_SEC)
+        for idx, (chunk_transcript, chunk_language) in enumerate(transcribe_pcm_blocks(blocks, profile)):
+            print(f"🎤 Transcribed chunk {idx+1}/{total_chunks}")
+            chunk_transcripts.append(chunk_transcript)
+            if cleaner:
+                cleaner.add(chunk_transcript)
+            language = chunk_language
+            if progress:
+                progress('transcribing', idx + 1, max(total_chunks, idx + 1), chunk_transcript)
+        whisper_end = time.time()
+
+        if not chunk_transcripts:
+            raise RuntimeError('Failed to decode audio file')
+
+        if cleaner:
+            if progress:
+                progress('cleaning')
+            transcript = cleaner.finish()
+            print(f"✅ Cleaned {len(chunk_transcripts)} chunks in {cleaner.calls} Gemini call(s)")
+        else:
+            transcript = ' '.join(t for t in chunk_transcripts if t)
+            print(f"✅ Merged {len(chunk_transcripts)} chunks")
+
+        result = finalize_transcription(transcript, language, temp_path, user_id, ts, start_time)
+        result['timing'] = stage_timing(start_time, whisper_start, whisper_end, cleaner)
+        result['cleaning'] = 'gemini' if cleaner else 'local'
+        print(f"⏱️ Stage timing: {result['timing']}")
+        if (cleaner is not None) == profile.clean:
+            # A transcript that skipped Gemini for lack of budget isn't what this profile's key promises
+            store_cached_transcript(audio_hash, profile, result['transcript'], result['language'])
+        result['profile'] = profile.name
+        return result
+    finally:
+        if cleaner:
+            cleaner.close()
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+
+
 @app.route('/transcribe', methods=['POST'])
 @login_required
 def transcribe_audio():
+    """
+    Transcribe an uploaded recording.
+    Pass `mode=async` (form field or query string) to get a job ID back
+    immediately and poll GET /jobs/<job_id> for progress.
+    `profile` (fast, balanced or accurate) trades accuracy for latency; by
+    default short memos use fast and longer recordings balanced.
+    """
     try:
         if 'audio' not in request.files:
             return jsonify({'error': 'No audio file provided'}), 400
 
+        profile_name = request.form.get('profile') or request.args.get('profile')
+        if profile_name and profile_name not in TRANSCRIPTION_PROFILES:
+            return jsonify({'error': f"Unknown profile, expected one of {', '.join(TRANSCRIPTION_PROFILES)}"}), 400
+
+        # Check if Whisper model is loaded (waits briefly while a fresh worker warms up)
+        if get_transcriber() is None:
+            return jsonify({'error': 'Whisper model not loaded'}), 503
+
         audio_file = request.files['audio']
         ts = int(time.time())
 
@@ -807,129 +1204,269 @@ def transcribe_audio():
                 orig_ext = '.mp4'
 
         with tempfile.NamedTemporaryFile(delete=False, suffix=orig_ext) as tf:
-            audio_file.save(tf.name)
             temp_path = tf.name
+        audio_hash = save_and_hash(audio_file.stream, temp_path)
 
         print(f"Saved upload to: {temp_path} (Size: {os.path.getsize(temp_path)} bytes)")
 
         debug_orig_path = os.path.join(DEBUG_DIR, f"{ts}_original{orig_ext}")
         shutil.copy(temp_path, debug_orig_path)
 
-        start_time = time.time()
-        transcript = None
-        language = 'en'
-        
-        # Check if Whisper model is loaded
-        if model is None:
-            return jsonify({'error': 'Whisper model not loaded'}), 500
+        mode = request.form.get('mode') or request.args.get('mode')
+        if mode == 'async':
+            if job_store is None:
+                os.unlink(temp_path)
+                return jsonify({'error': 'Database not available for async jobs'}), 503
 
-        # Get audio duration
-        probe_cmd = [
-            'ffprobe', '-v', 'error', '-show_entries',
-            'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1',
-            temp_path
-        ]
-        duration_result = subprocess.run(probe_cmd, capture_output=True, text=True)
-        
-        try:
-            duration = float(duration_result.stdout.strip())
-        except:
-            duration = 0
-        
-        print(f"📊 Audio duration: {duration:.2f}s")
-
-        # ✅ CORRECT CHUNKING LOGIC
-        if duration > 60:
-            print(f"🎤 Using Whisper with chunking (file > 60s)...")
-            chunks = chunk_audio_file(temp_path, chunk_duration_sec=60)
-            
-            if not chunks:
-                return jsonify({'error': 'Failed to chunk audio file'}), 500
-            
-            chunk_transcripts = []
-            for idx, chunk_path in enumerate(chunks):
-                print(f"🎤 Transcribing chunk {idx+1}/{len(chunks)}...")
-                
-                segments, info = model.transcribe(
-                    chunk_path,
-                    language=None,
-                    task='translate',
-                    beam_size=5,
-                    vad_filter=True,
-                    vad_parameters=dict(min_silence_duration_ms=500),
-                    temperature=0.0,
-                    condition_on_previous_text=False,
-                )
-                
-                chunk_transcript = ' '.join([segment.text.strip() for segment in segments])
-                chunk_transcript = chunk_transcript.replace(' um ', ' ').replace(' uh ', ' ').strip()
-                chunk_transcripts.append(chunk_transcript)
-                language = info.language
-                
-                # Clean up chunk file
-                try:
-                    os.unlink(chunk_path)
-                except:
-                    pass
-            
-            # ✅ MERGE CHUNKS FIRST, THEN CLEAN ONCE
-            transcript = ' '.join(chunk_transcripts)
-            print(f"✅ Merged {len(chunk_transcripts)} chunks")
-            
-            # ✅ NOW clean the merged transcript with Gemini
-            print(f"🧹 Cleaning merged transcript with Gemini...")
-            transcript = clean_transcript_with_gemini(transcript)
-            
-        else:
-            # Original approach for short files
-            print(f"🎤 Using Whisper (local)...")
-            segments, info = model.transcribe(
-                temp_path,
-                language=None,
-                task='translate',
-                beam_size=5,
-                vad_filter=True,
-                vad_parameters=dict(min_silence_duration_ms=500),
-                temperature=0.0,
-                condition_on_previous_text=False,
+            job_id = job_store.submit(
+                request.user_id, 'transcription',
+                run_transcription_pipeline, temp_path, request.user_id, ts, audio_hash, profile_name
             )
-            transcript = ' '.join([segment.text.strip() for segment in segments])
-            transcript = transcript.replace(' um ', ' ').replace(' uh ', ' ').strip()
-            language = info.language
-            
-            # ✅ Clean short transcripts too
-            print(f"🧹 Cleaning transcript with Gemini...")
-            transcript = clean_transcript_with_gemini(transcript)
-
-        elapsed_time = time.time() - start_time
-        print(f"✅ Transcription completed in {elapsed_time:.2f}s using Whisper")
-
-        # ✅ SAVE AUDIO FILE for playback
-        audio_filename = f"{ts}_{request.user_id}.webm"
-        saved_audio_path = os.path.join(AUDIO_STORAGE_DIR, audio_filename)
-        shutil.copy(temp_path, saved_audio_path)
-        print(f"💾 Saved audio to: {saved_audio_path}")
+            print(f"📥 Queued transcription job {job_id}")
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status_url': f'/jobs/{job_id}'
+            }), 202
 
-        try:
-            os.unlink(temp_path)
-        except:
-            pass
+        return jsonify(run_transcription_pipeline(temp_path, request.user_id, ts, audio_hash, profile_name))
+
+    except Exception as e:
+        print(f"ERROR: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+@login_required
+def get_job(job_id):
+    """Poll a background job: state, chunk progress, partial transcript and result"""
+    try:
+        if job_store is None:
+            return jsonify({'error': 'Database not available'}), 503
+
+        job = job_store.get(job_id, request.user_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+
+        return jsonify({'success': True, **job})
+    except Exception as e:
+        print(f"Error fetching job: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+# ===========================
+# 🔴 LIVE TRANSCRIPTION ROUTES
+# ===========================
+
+
+def live_session_dir(job_id: str) -> str:
+    return os.path.join(LIVE_SESSION_DIR, str(ObjectId(job_id)))
+
+
+@app.route('/live/start', methods=['POST'])
+@login_required
+def start_live_transcription():
+    """
+    Open a live session; MediaRecorder timeslices are then posted to /live/<id>/segments.
+    Optional JSON `profile` picks the transcription profile (default balanced).
+    """
+    session_dir = None
+    try:
+        data = request.get_json(silent=True) or {}
+        profile_name = data.get('profile') or PROFILE_BALANCED
+        if profile_name not in TRANSCRIPTION_PROFILES:
+            return jsonify({'error': f"Unknown profile, expected one of {', '.join(TRANSCRIPTION_PROFILES)}"}), 400
+        profile = TRANSCRIPTION_PROFILES[profile_name]
+
+        if get_transcriber(profile) is None:
+            return jsonify({'error': 'Whisper model not loaded'}), 503
+        if live_job_store is None:
+            return jsonify({'error': 'Database not available for live sessions'}), 503
+
+        user_id = request.user_id
+        ts = int(time.time())
+        job_id = ObjectId()
+        session_dir = live_session_dir(str(job_id))
+        os.makedirs(session_dir)
+        # Held until the job ends, even while it waits for a free live session thread
+        claim_session(session_dir)
+
+        # Windows are cleaned while the recording is still going
+        cleaner = new_cleaner(profile)
+
+        def finalize(transcript, language, recording_path, start_time, progress=None):
+            if cleaner:
+                if progress:
+                    progress('cleaning')
+                transcript = cleaner.finish()
+            result = finalize_transcription(transcript, language, recording_path, user_id, ts, start_time)
+            result['profile'] = profile.name
+            return result
+
+        def transcribe_windows(blocks):
+            try:
+                for text, language in transcribe_pcm_blocks(blocks, profile, max_chunk_sec=LIVE_WINDOW_SEC):
+                    if cleaner:
+                        cleaner.add(text)
+                    yield text, language
+            except Exception:
+                if cleaner:
+                    cleaner.close()
+                raise
+
+        live_job_store.submit(
+            user_id, 'live',
+            run_live_transcription, session_dir, transcribe_windows, finalize,
+            job_id=job_id
+        )
+        print(f"🔴 Live session {job_id} started for user {user_id}")
 
         return jsonify({
-            'transcript': transcript,
-            'audio_url': f'/audio/{audio_filename}',  # ← Return audio URL
             'success': True,
-            'length': len(transcript),
-            'duration': f"{elapsed_time:.2f}s",
-            'language': language,
-            'method': 'whisper'
+            'job_id': str(job_id),
+            'status_url': f'/jobs/{job_id}'
         })
+    except Exception as e:
+        if session_dir:
+            release_session(session_dir)
+        print(f"❌ Error starting live session: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/live/<job_id>/segments', methods=['POST'])
+@login_required
+def upload_live_segment(job_id):
+    """Accept one timeslice (form fields `seq` and file `segment`) and return the partial transcript"""
+    try:
+        job = job_store.get(job_id, request.user_id) if job_store else None
+        if not job or not os.path.isdir(live_session_dir(job_id)):
+            return jsonify({'error': 'Live session not found'}), 404
 
+        if job['state'] in (JOB_COMPLETED, JOB_FAILED):
+            return jsonify({'error': f"Live session already {job['state']}"}), 409
+
+        if 'segment' not in request.files or 'seq' not in request.form:
+            return jsonify({'error': 'segment and seq are required'}), 400
+
+        seq = int(request.form['seq'])
+        save_segment(live_session_dir(job_id), seq, request.files['segment'].read())
+
+        return jsonify({
+            'success': True,
+            'seq': seq,
+            'state': job['state'],
+            'chunks_done': job['chunks_done'],
+            'partial_transcript': job['partial_transcript']
+        })
     except Exception as e:
-        print(f"ERROR: {e}")
+        print(f"❌ Error receiving live segment: {e}")
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/live/<job_id>/finish', methods=['POST'])
+@login_required
+def finish_live_transcription(job_id):
+    """Mark the recording complete; the job finishes once `total_segments` have arrived"""
+    try:
+        job = job_store.get(job_id, request.user_id) if job_store else None
+        if not job or not os.path.isdir(live_session_dir(job_id)):
+            return jsonify({'error': 'Live session not found'}), 404
+
+        data = request.json or {}
+        total_segments = data.get('total_segments')
+        if total_segments is None:
+            return jsonify({'error': 'total_segments is required'}), 400
+
+        mark_finished(live_session_dir(job_id), int(total_segments))
+        print(f"⏹️ Live session {job_id} finished with {total_segments} segments")
+
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status_url': f'/jobs/{job_id}'
+        })
+    except Exception as e:
+        print(f"❌ Error finishing live session: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+def resolve_notes_mode(mode: Optional[str], transcript: str) -> Optional[str]:
+    """'single' = one prompt, 'hierarchical' = map-reduce over sections, 'auto' picks by length"""
+    mode = mode or 'auto'
+    if mode not in ('auto', 'single', 'hierarchical'):
+        return None
+    if mode == 'auto':
+        mode = 'hierarchical' if note_reducer.should_split(transcript) else 'single'
+    return mode
+
+
+def generate_structured_notes(transcript: str, mode: str) -> Tuple[dict, Optional[str]]:
+    """
+    One JSON call for title, key points, concepts and summary (after the map
+    phase in hierarchical mode). Returns (fields, content): content is the raw
+    text when Gemini answered in Markdown instead, None when the fields are
+    complete. Output that is neither (e.g. truncated JSON) is retried once,
+    then raises rather than saving an empty note.
+    """
+    if mode == 'hierarchical':
+        prompt = note_reducer.final_prompt(transcript, structured=True)
+    else:
+        prompt = notes_prompt(transcript, structured=True)
+    for attempt in range(2):
+        text = generate_with_gemini(prompt, generation_config=JSON_OUTPUT)
+        try:
+            return parse_structured_notes(text), None
+        except ValueError as e:
+            fields = parse_markdown_notes(text)
+            if any(fields.values()):
+                print(f"⚠️ Structured notes failed validation ({e}), reading them as Markdown")
+                return fields, text
+            print(f"⚠️ Structured notes unusable ({e}), attempt {attempt + 1} of 2")
+    raise ValueError('Gemini returned notes that are neither valid JSON nor Markdown')
+
+
+def save_generated_note(user_id: str, transcript: str, fields: dict, mode: str,
+                        content: Optional[str] = None) -> dict:
+    """
+    Store generated notes with their structured fields; `content` is the Markdown
+    (rendered from the fields unless given, e.g. the streamed text). Returns the
+    response payload.
+    """
+    content = content or render_notes_markdown(fields)
+    title = fields.get('title')
+    if not title:
+        title = f"Lecture Notes {time.strftime('%Y-%m-%d %H:%M')}"
+        print(f"📝 Using fallback timestamp title: {title}")
+    preview_source = fields.get('summary') or content
+
+    # Body first: a failed note insert leaves only an unreachable body, never a note without one
+    note_id = ObjectId()
+    note_bodies.save(note_id, user_id, title=title, content=content, transcript=transcript,
+                     passage_index=build_note_index(content, transcript).to_doc())
+    notes_repo.create({
+        '_id': note_id,
+        'user_id': user_id,
+        'preview': preview_source[:150] + '...' if len(preview_source) > 150 else preview_source,
+        'title': title,
+        'key_points': fields.get('key_points', []),
+        'concepts': fields.get('concepts', []),
+        'summary': fields.get('summary', ''),
+        'created_at': time.time(),
+        'updated_at': time.time()
+    })
+
+    return {
+        'notes': content,
+        'note_id': str(note_id),
+        'title': title,
+        'key_points': fields.get('key_points', []),
+        'concepts': fields.get('concepts', []),
+        'summary': fields.get('summary', ''),
+        'mode': mode,
+        'success': True
+    }
+
+
 @app.route('/generate-notes', methods=['POST'])
 @login_required
 def generate_notes():
@@ -940,98 +1477,65 @@ def generate_notes():
         if not transcript:
             return jsonify({'error': 'No transcript provided'}), 400
 
-        prompt = f"""You are an expert note-taker. Analyze the following lecture transcript and create structured, easy-to-read notes.
-
-TRANSCRIPT:
-{transcript}
+        mode = resolve_notes_mode(data.get('mode'), transcript)
+        if not mode:
+            return jsonify({'error': "mode must be 'auto', 'single' or 'hierarchical'"}), 400
 
-INSTRUCTIONS:
-1. Identify the Main Topic.
-2. List Key Points with bullet points.
-3. Extract Important Concepts and define them briefly.
-4. Provide a concise Summary.
+        print(f"Generating notes for transcript of length {len(transcript)} ({mode})")
+        fields, content = generate_structured_notes(transcript, mode)
+        print(f"Notes generated successfully!")
 
-OUTPUT FORMAT:
-## Main Topic
+        # Get user_id from request context (set by login_required decorator)
+        user_id = getattr(request, 'user_id', session.get('user_id'))
+        return jsonify(save_generated_note(user_id, transcript, fields, mode, content=content))
 
-### Key Points
-- [Point 1]
-- [Point 2]
+    except RateLimited as e:
+        return rate_limited_response(e)
+    except Exception as e:
+        print(f"ERROR generating notes: {str(e)}")
+        return jsonify({'error': str(e)}), 500
 
-### Important Concepts
-- **[Concept]**: [Definition]
 
-### Summary
-[Summary text]
-"""
+@app.route('/generate-notes/stream', methods=['POST'])
+@login_required
+def generate_notes_stream():
+    """
+    Same as /generate-notes, but relays Gemini's output as server-sent events:
+    `token` events while it generates, then `done` with the saved note
+    (note_id, title, notes) or `error`. In hierarchical mode the section notes
+    are generated first and the final merge is streamed.
+    """
+    try:
+        data = request.json
+        transcript = data.get('transcript', '')
 
-        print(f"Generating notes for transcript of length {len(transcript)}")
-        notes = generate_with_gemini(prompt)
-        print(f"Notes generated successfully!")
+        if not transcript:
+            return jsonify({'error': 'No transcript provided'}), 400
 
-        # ✨ Extract AI-generated title from Main Topic
-        import re
-        title = None
-        
-        # Try to extract the Main Topic section
-        title_match = re.search(r'## Main Topic\s*\n+(.+?)(?:\n|$)', notes, re.IGNORECASE)
-        
-        if title_match:
-            title = title_match.group(1).strip()
-            # Remove any markdown formatting
-            title = re.sub(r'[#*_`]', '', title)
-            # Limit to 80 characters for UI
-            if len(title) > 80:
-                title = title[:77] + '...'
-            print(f"📝 Extracted title from Main Topic: {title}")
-        
-        # Fallback: Use Gemini to generate a title if extraction fails
-        if not title or len(title) < 5:
-            print("⚠️ Could not extract title, generating with Gemini...")
-            title_prompt = f"""Based on these lecture notes, generate a short, descriptive title (max 60 characters). 
-Return ONLY the title, nothing else.
-
-NOTES:
-{notes[:500]}"""
-            
-            try:
-                title = generate_with_gemini(title_prompt, timeout=10).strip()
-                # Remove quotes if Gemini added them
-                title = title.strip('"\'')
-                if len(title) > 80:
-                    title = title[:77] + '...'
-                print(f"📝 Generated title with Gemini: {title}")
-            except Exception as e:
-                print(f"❌ Error generating title: {e}")
-                title = None
-        
-        # Final fallback: Use timestamp
-        if not title or len(title) < 5:
-            title = f"Lecture Notes {time.strftime('%Y-%m-%d %H:%M')}"
-            print(f"📝 Using fallback timestamp title: {title}")
+        mode = resolve_notes_mode(data.get('mode'), transcript)
+        if not mode:
+            return jsonify({'error': "mode must be 'auto', 'single' or 'hierarchical'"}), 400
 
-        # Get user_id from request context (set by login_required decorator)
         user_id = getattr(request, 'user_id', session.get('user_id'))
+        print(f"Streaming notes for transcript of length {len(transcript)} ({mode})")
 
-        note_id = notes_collection.insert_one({
-            'user_id': user_id,
-            'transcript': transcript,
-            'content': notes,
-            'preview': notes[:150] + '...' if len(notes) > 150 else notes,
-            'title': title,
-            'created_at': time.time(),
-            'updated_at': time.time()
-        }).inserted_id
+        def tokens():
+            prompt = note_reducer.final_prompt(transcript) if mode == 'hierarchical' else notes_prompt(transcript)
+            yield from gemini.stream(prompt, priority=PRIORITY_NOTES)
 
-        return jsonify({
-            'notes': notes,
-            'note_id': str(note_id),
-            'title': title,
-            'success': True
-        })
-        
+        def on_complete(notes):
+            print(f"Notes streamed successfully!")
+            # Streamed text is the Markdown layout; its fields are read locally, no extra call
+            return save_generated_note(user_id, transcript, parse_markdown_notes(notes), mode, content=notes)
+
+        gemini_governor.check(PRIORITY_NOTES)
+        return Response(stream_with_context(relay_tokens(tokens(), on_complete)),
+                        mimetype='text/event-stream', headers=SSE_HEADERS)
+
+    except RateLimited as e:
+        return rate_limited_response(e)
     except Exception as e:
-        print(f"ERROR generating notes: {str(e)}")
+        print(f"ERROR streaming notes: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 # ===========================
@@ -1042,28 +1546,49 @@ NOTES:
 @app.route('/notes', methods=['GET'])
 @login_required
 def get_notes():
+    """Newest first; pass `limit` (and `after` = the previous next_cursor) to page"""
     try:
         user_id = getattr(request, 'user_id', session.get('user_id'))
-        notes_cursor = notes_collection.find({'user_id': user_id}).sort('created_at', -1)
-
-        notes = []
-        for note in notes_cursor:
-            notes.append({
-                'id': str(note['_id']),
-                'title': note.get('title', 'Untitled Note'),
-                'created_at': note.get('created_at'),
-                'updated_at': note.get('updated_at'),
-                'google_doc_url': note.get('google_doc_url'),
-                'google_doc_id': note.get('google_doc_id'),
-                'preview': note.get('preview', ''),
-                'is_favorite': note.get('is_favorite', False)
-            })
+        limit = request.args.get('limit', type=int)
+        after = request.args.get('after') or None
+        try:
+            notes, next_cursor = notes_repo.list(user_id, limit=limit, after=after)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        return jsonify({'success': True, 'notes': notes})
+        return jsonify({'success': True, 'notes': notes, 'next_cursor': next_cursor})
     except Exception as e:
         print(f"Error fetching notes: {e}")
         return jsonify({'error': str(e)}), 500
-    
+
+
+@app.route('/search', methods=['GET'])
+@login_required
+def search():
+    """Ranked full-text search over the user's note titles, content and transcripts"""
+    try:
+        user_id = getattr(request, 'user_id', session.get('user_id'))
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'Query parameter q is required'}), 400
+
+        page = request.args.get('page', 1, type=int)
+        page_size = request.args.get('page_size', 20, type=int)
+        results, has_more, took_ms = notes_repo.search(user_id, query, page, page_size)
+        print(f"🔍 Search '{query[:50]}': {len(results)} results in {took_ms} ms")
+
+        return jsonify({
+            'success': True,
+            'query': query,
+            'results': results,
+            'page': max(1, page),
+            'has_more': has_more,
+            'took_ms': took_ms
+        })
+    except Exception as e:
+        print(f"❌ Search error: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/notes', methods=['POST'])
 @login_required
 def create_note_metadata():
@@ -1073,7 +1598,11 @@ def create_note_metadata():
         title = data.get('title', 'Untitled Note')
         preview = data.get('preview', '')
 
+        # An empty body keeps the note in search (the text index lives on note_bodies)
+        note_id = ObjectId()
+        note_bodies.save(note_id, user_id, title=title, content='')
         note_doc = {
+            '_id': note_id,
             'user_id': user_id,
             'title': title,
             'preview': preview,
@@ -1083,11 +1612,11 @@ def create_note_metadata():
             'google_doc_id': None
         }
 
-        result = notes_collection.insert_one(note_doc)
+        notes_repo.create(note_doc)
 
         return jsonify({
             'success': True, 
-            'note_id': str(result.inserted_id)
+            'note_id': str(note_id)
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1098,13 +1627,14 @@ def get_note(note_id):
     """Get a single note by ID"""
     try:
         user_id = getattr(request, 'user_id', session.get('user_id'))
-        note = notes_collection.find_one({
-            '_id': ObjectId(note_id),
-            'user_id': user_id
-        })
+        note = notes_repo.get(note_id, user_id, {'passage_index': 0, 'transcript': 0})
         
         if not note:
             return jsonify({'error': 'Note not found'}), 404
+
+        note_bodies.attach(note, ('content',))
+        if not note.get('content'):
+            note_bodies.attach(note, ('transcript',))  # notes saved without Markdown show the transcript
         
         return jsonify({
             'success': True,
@@ -1112,6 +1642,9 @@ def get_note(note_id):
             'title': note.get('title', 'Untitled Note'),
             'content': note.get('content', note.get('transcript', '')),  # Return full content
             'preview': note.get('preview', ''),
+            'key_points': note.get('key_points', []),
+            'concepts': note.get('concepts', []),
+            'summary': note.get('summary', ''),
             'created_at': note.get('created_at'),
             'updated_at': note.get('updated_at'),
             'google_doc_url': note.get('google_doc_url'),
@@ -1129,21 +1662,33 @@ def update_note(note_id):
         data = request.json
         user_id = getattr(request, 'user_id', session.get('user_id'))
 
-        note = notes_collection.find_one({'_id': ObjectId(note_id), 'user_id': user_id})
-        if not note:
-            return jsonify({'error': 'Note not found'}), 404
-
-        update_fields = {'updated_at': time.time()}
+        update = {'$set': {'updated_at': time.time()}}
+        body = {}
 
         if 'title' in data:
-            update_fields['title'] = data['title']
+            update['$set']['title'] = data['title']
+            body['title'] = data['title']  # the text index ranks on the body's copy
         if 'content' in data:
-            update_fields['content'] = data['content']
+            fields = parse_markdown_notes(data['content'])
+            update['$set'].update({k: fields[k] for k in ('key_points', 'concepts', 'summary')})
+            body['content'] = data['content']
+        if body:
+            # A note saved before the split moves its body out of line with this edit
+            update['$unset'] = {field: '' for field in BODY_FIELDS}
+
+        # Ownership check and update in one command; the previous version carries
+        # any inline body fields (only notes not migrated yet have them)
+        note = notes_repo.update(note_id, user_id, update, projection={field: 1 for field in BODY_FIELDS},
+                                 before=True)
+        if not note:
+            return jsonify({'error': 'Note not found'}), 404
 
-        notes_collection.update_one(
-            {'_id': ObjectId(note_id)},
-            {'$set': update_fields}
-        )
+        if body:
+            for field in BODY_FIELDS:
+                if field in note and not (field == 'passage_index' and 'content' in data):
+                    body.setdefault(field, note[field])
+            # One body write; new content drops the passage index, which chat rebuilds on first use
+            note_bodies.save(note['_id'], user_id, unset=('passage_index',) if 'content' in data else (), **body)
 
         return jsonify({'success': True})
     except Exception as e:
@@ -1155,10 +1700,10 @@ def update_note(note_id):
 def delete_note(note_id):
     try:
         user_id = getattr(request, 'user_id', session.get('user_id'))
-        result = notes_collection.delete_one({'_id': ObjectId(note_id), 'user_id': user_id})
-
-        if result.deleted_count == 0:
+        if not notes_repo.delete(note_id, user_id):
             return jsonify({'error': 'Note not found'}), 404
+        if chat_sessions_collection is not None:
+            chat_sessions_collection.delete_many({'note_id': note_id, 'user_id': user_id})
 
         return jsonify({'success': True})
     except Exception as e:
@@ -1170,21 +1715,75 @@ def delete_note(note_id):
 def toggle_favorite(note_id):
     try:
         user_id = getattr(request, 'user_id', session.get('user_id'))
-        note = notes_collection.find_one({'_id': ObjectId(note_id), 'user_id': user_id})
+        new_status = notes_repo.toggle_favorite(note_id, user_id)
 
-        if not note:
+        if new_status is None:
             return jsonify({'error': 'Note not found'}), 404
 
-        new_status = not note.get('is_favorite', False)
-        notes_collection.update_one(
-            {'_id': ObjectId(note_id)},
-            {'$set': {'is_favorite': new_status}}
-        )
-
         return jsonify({'success': True, 'is_favorite': new_status})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     
+# ✅ Long notes: chat sends only the passages relevant to the question
+RAG_TOP_K = int(os.getenv('RAG_TOP_K', '6'))
+RAG_MIN_CHARS = int(os.getenv('RAG_MIN_CHARS', '6000'))
+
+
+def note_passage_index(note: dict) -> PassageIndex:
+    """Stored passage index, built and saved on the note if missing (notes created before indexing)"""
+    index = load_note_index(note)
+    if index is None:
+        note_bodies.attach(note, ('transcript',))
+        index = build_note_index(note.get('content'), note.get('transcript'))
+        if not note_bodies.set_index(note['_id'], index.to_doc()):
+            # Not migrated yet: keep the index inline with the rest of the body
+            notes_repo.set_inline_index(note['_id'], index.to_doc())
+        print(f"🔎 Indexed note {note['_id']} ({len(index.passages)} passages)")
+    return index
+
+
+def open_chat_session(note_id: str, user_id: str, data: dict) -> Tuple[Optional[dict], str, list]:
+    """
+    The request's chat session, its running summary and pending turns. Without
+    a `session_id` the latest session for the note is reused (a new one with
+    `new_session: true`). Returns (None, '', []) for an unknown session_id.
+    A `history` list from older clients is used when the session is empty.
+    """
+    session_id = data.get('session_id')
+    if session_id:
+        chat_session = chat_sessions.get(session_id, note_id, user_id)
+        if chat_session is None:
+            return None, '', []
+    elif data.get('new_session'):
+        chat_session = chat_sessions.create(note_id, user_id)
+    else:
+        chat_session = chat_sessions.latest(note_id, user_id)
+    if not chat_session['turns'] and not chat_session['summary']:
+        return chat_session, '', data.get('history', [])[-CHAT_RECENT_TURNS:]
+    summary, turns = chat_sessions.context(chat_session)
+    return chat_session, summary, turns
+
+
+def chat_prompt_for(note: dict, question: str, chat_history: list, summary: str = '') -> Tuple[str, dict]:
+    """Prompt for a chat question plus retrieval info for the response"""
+    start = time.time()
+    hits = []
+    # Gate on the notes alone: the full prompt sends only them, never the transcript
+    if len(note.get('content') or '') > RAG_MIN_CHARS:
+        index = note_passage_index(note)
+        hits = index.search(retrieval_query(question, chat_history), k=RAG_TOP_K)
+    # No hits, or the passages outweigh the whole note: send the whole note
+    prompt, mode, full_chars = choose_chat_prompt(note, [p for _, p in hits], question, chat_history, summary)
+    retrieval = {'mode': mode}
+    if mode == 'rag':
+        retrieval.update(passages=len(hits), indexed_passages=len(index.passages))
+    retrieval['prompt_chars'] = len(prompt)
+    retrieval['full_prompt_chars'] = full_chars
+    retrieval['retrieval_ms'] = round((time.time() - start) * 1000, 1)
+    print(f"🔎 Chat prompt: {retrieval}")
+    return prompt, retrieval
+
+
 @app.route('/notes/<note_id>/chat', methods=['POST'])
 @login_required
 def chat_with_note(note_id):
@@ -1193,83 +1792,137 @@ def chat_with_note(note_id):
         user_id = getattr(request, 'user_id', session.get('user_id'))
         
         # Get the note
-        note = notes_collection.find_one({
-            '_id': ObjectId(note_id),
-            'user_id': user_id
-        })
+        note = notes_repo.get(note_id, user_id, {'transcript': 0})
         
         if not note:
             return jsonify({'error': 'Note not found'}), 404
+        note_bodies.attach(note, ('content', 'passage_index'))
         
-        # Get user's question
+        # Get user's question; context comes from the server-side chat session
         data = request.json
         question = data.get('question', '')
-        chat_history = data.get('history', [])  # Optional: for context
         
         if not question:
             return jsonify({'error': 'Question is required'}), 400
+
+        chat_session, summary, chat_history = open_chat_session(note_id, user_id, data)
+        if chat_session is None:
+            return jsonify({'error': 'Chat session not found'}), 404
         
-        # Get note content
-        note_content = note.get('content', note.get('transcript', ''))
         note_title = note.get('title', 'Untitled Note')
-        
-        # Build context-aware prompt
-        prompt = f"""You are an AI tutor helping a student understand their lecture notes.
-
-**Note Title:** {note_title}
-
-**Note Content:**
-{note_content}
+        prompt, retrieval = chat_prompt_for(note, question, chat_history, summary)
 
-**Student's Question:** {question}
-
-**Instructions:**
-1. Answer based ONLY on the content of these notes
-2. Be clear, concise, and educational
-3. If the question isn't covered in the notes, politely say so
-4. Use examples from the notes when possible
-5. Keep responses under 200 words unless explaining complex topics
-
-**Your Answer:**"""
-        
-        # Add chat history for context (if provided)
-        if chat_history:
-            history_text = "\n".join([
-                f"Student: {msg['question']}\nAI: {msg['answer']}" 
-                for msg in chat_history[-3:]  # Last 3 exchanges
-            ])
-            prompt = f"""Previous conversation:
-{history_text}
-
-{prompt}"""
-        
         # Get AI response
         print(f"💬 Chat request for note {note_id}: {question[:50]}...")
-        response = generate_with_gemini(prompt, timeout=30)
+        response = generate_with_gemini(prompt, timeout=30, priority=PRIORITY_INTERACTIVE)
+        chat_sessions.append(chat_session, question, response)
         
         print(f"✅ Chat response generated ({len(response)} chars)")
         
         return jsonify({
             'success': True,
             'answer': response,
-            'note_title': note_title
+            'note_title': note_title,
+            'session_id': str(chat_session['_id']),
+            'retrieval': retrieval
         })
-        
+
+    except RateLimited as e:
+        return rate_limited_response(e)
     except Exception as e:
         print(f"❌ Chat error: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@app.route('/notes/<note_id>/chat/stream', methods=['POST'])
+@login_required
+def chat_with_note_stream(note_id):
+    """Same as /notes/<id>/chat, but the answer arrives as `token` server-sent events, then `done`"""
+    try:
+        user_id = getattr(request, 'user_id', session.get('user_id'))
+        note = notes_repo.get(note_id, user_id, {'transcript': 0})
+
+        if not note:
+            return jsonify({'error': 'Note not found'}), 404
+        note_bodies.attach(note, ('content', 'passage_index'))
+
+        data = request.json
+        question = data.get('question', '')
+
+        if not question:
+            return jsonify({'error': 'Question is required'}), 400
+
+        chat_session, summary, chat_history = open_chat_session(note_id, user_id, data)
+        if chat_session is None:
+            return jsonify({'error': 'Chat session not found'}), 404
+
+        note_title = note.get('title', 'Untitled Note')
+        prompt, retrieval = chat_prompt_for(note, question, chat_history, summary)
+        print(f"💬 Streaming chat for note {note_id}: {question[:50]}...")
+
+        def on_complete(answer):
+            print(f"✅ Chat response streamed ({len(answer)} chars)")
+            chat_sessions.append(chat_session, question, answer)
+            return {'success': True, 'answer': answer, 'note_title': note_title,
+                    'session_id': str(chat_session['_id']), 'retrieval': retrieval}
+
+        gemini_governor.check(PRIORITY_INTERACTIVE)
+        tokens = gemini.stream(prompt, timeout=30, priority=PRIORITY_INTERACTIVE)
+        return Response(stream_with_context(relay_tokens(tokens, on_complete)),
+                        mimetype='text/event-stream', headers=SSE_HEADERS)
+
+    except RateLimited as e:
+        return rate_limited_response(e)
+    except Exception as e:
+        print(f"❌ Chat error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/notes/<note_id>/chat/sessions', methods=['GET'])
+@login_required
+def list_chat_sessions(note_id):
+    """The note's chat sessions, most recent first (without their turns)"""
+    try:
+        user_id = getattr(request, 'user_id', session.get('user_id'))
+        cursor = chat_sessions_collection.find(
+            {'note_id': note_id, 'user_id': user_id},
+            {'summary': 1, 'created_at': 1, 'updated_at': 1}
+        ).sort('updated_at', -1).limit(50)
+
+        return jsonify({'success': True, 'sessions': [{
+            'session_id': str(s['_id']),
+            'summary': s.get('summary', ''),
+            'created_at': s.get('created_at'),
+            'updated_at': s.get('updated_at')
+        } for s in cursor]})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/notes/<note_id>/chat/sessions/<session_id>', methods=['GET'])
+@login_required
+def get_chat_session(note_id, session_id):
+    """One chat session (summary of the folded turns plus the turns kept verbatim), for restoring the chat panel"""
+    try:
+        user_id = getattr(request, 'user_id', session.get('user_id'))
+        chat_session = chat_sessions.get(session_id, note_id, user_id)
+        if not chat_session:
+            return jsonify({'error': 'Chat session not found'}), 404
+        return jsonify({'success': True, **ChatSessionStore.public(chat_session)})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/notes/<note_id>/export-pdf', methods=['GET'])
 @login_required
 def export_pdf(note_id):
     try:
         user_id = getattr(request, 'user_id', session.get('user_id'))
-        note = notes_collection.find_one({'_id': ObjectId(note_id), 'user_id': user_id})
+        note = notes_repo.get(note_id, user_id, {'title': 1, 'content': 1, 'created_at': 1})
 
         if not note:
             return jsonify({'error': 'Note not found'}), 404
+        note_bodies.attach(note, ('content',))
 
         title = note.get('title', 'Untitled Note')
         content = note.get('content', '')
@@ -1396,10 +2049,8 @@ def export_pdf(note_id):
 def get_folders():
     try:
         user_id = getattr(request, 'user_id', session.get('user_id'))
-        folders_cursor = db.folders.find({'user_id': user_id}).sort('created_at', -1)
-
         folders = []
-        for folder in folders_cursor:
+        for folder in folders_repo.list(user_id):
             folders.append({
                 'id': str(folder['_id']),
                 'name': folder.get('name'),
@@ -1423,15 +2074,8 @@ def create_folder():
         if not name:
             return jsonify({'error': 'Folder name is required'}), 400
 
-        folder_doc = {
-            'user_id': user_id,
-            'name': name,
-            'note_ids': note_ids,
-            'created_at': time.time()
-        }
-
-        result = db.folders.insert_one(folder_doc)
-        return jsonify({'success': True, 'folder_id': str(result.inserted_id)})
+        folder_id = folders_repo.create(user_id, name, note_ids)
+        return jsonify({'success': True, 'folder_id': str(folder_id)})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1443,20 +2087,18 @@ def update_folder(folder_id):
         data = request.json
         user_id = getattr(request, 'user_id', session.get('user_id'))
 
-        folder = db.folders.find_one({'_id': ObjectId(folder_id), 'user_id': user_id})
-        if not folder:
-            return jsonify({'error': 'Folder not found'}), 404
-
         update_fields = {}
         if 'name' in data:
             update_fields['name'] = data['name']
         if 'note_ids' in data:
             update_fields['note_ids'] = data['note_ids']
 
-        db.folders.update_one(
-            {'_id': ObjectId(folder_id)},
-            {'$set': update_fields}
-        )
+        if update_fields:
+            folder = folders_repo.update(folder_id, user_id, {'$set': update_fields})
+        else:
+            folder = folders_repo.get(folder_id, user_id, {'_id': 1})  # nothing to change
+        if not folder:
+            return jsonify({'error': 'Folder not found'}), 404
 
         return jsonify({'success': True})
     except Exception as e:
@@ -1468,9 +2110,7 @@ def update_folder(folder_id):
 def delete_folder(folder_id):
     try:
         user_id = getattr(request, 'user_id', session.get('user_id'))
-        result = db.folders.delete_one({'_id': ObjectId(folder_id), 'user_id': user_id})
-
-        if result.deleted_count == 0:
+        if not folders_repo.delete(folder_id, user_id):
             return jsonify({'error': 'Folder not found'}), 404
 
         return jsonify({'success': True})
@@ -1478,28 +2118,62 @@ def delete_folder(folder_id):
         return jsonify({'error': str(e)}), 500
 
 
+def folder_note_ids(data: dict) -> list:
+    """Distinct, valid note ids from a request body"""
+    note_ids = data.get('note_ids') or []
+    return list(dict.fromkeys(n for n in note_ids if isinstance(n, str) and ObjectId.is_valid(n)))
+
+
+@app.route('/folders/<folder_id>/notes', methods=['GET'])
+@login_required
+def get_folder_notes(folder_id):
+    """The folder and its notes, newest first; `limit`/`after` page like GET /notes"""
+    try:
+        user_id = getattr(request, 'user_id', session.get('user_id'))
+        folder = folders_repo.get(folder_id, user_id)
+        if not folder:
+            return jsonify({'error': 'Folder not found'}), 404
+
+        note_ids = [ObjectId(n) for n in folder.get('note_ids', []) if ObjectId.is_valid(n)]
+        try:
+            notes, next_cursor = notes_repo.list(user_id, limit=request.args.get('limit', type=int),
+                                                 after=request.args.get('after') or None, note_ids=note_ids)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return jsonify({
+            'success': True,
+            'folder': {
+                'id': str(folder['_id']),
+                'name': folder.get('name'),
+                'note_count': len(note_ids),
+                'created_at': folder.get('created_at')
+            },
+            'notes': notes,
+            'next_cursor': next_cursor
+        })
+    except Exception as e:
+        print(f"Error fetching folder notes: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/folders/<folder_id>/notes', methods=['POST'])
 @login_required
 def add_notes_to_folder(folder_id):
     try:
         user_id = getattr(request, 'user_id', session.get('user_id'))
-        data = request.json
-        note_ids = data.get('note_ids', [])
+        note_ids = folder_note_ids(request.json or {})
 
         if not note_ids:
             return jsonify({"error": "No notes provided"}), 400
 
-        folder = db.folders.find_one({"_id": ObjectId(folder_id), "user_id": user_id})
-        if not folder:
-            return jsonify({"error": "Folder not found"}), 404
-
-        current_note_ids = folder.get('note_ids', [])
-        updated_note_ids = list(set(current_note_ids + note_ids))
+        note_ids = notes_repo.owned_ids(user_id, note_ids)
+        if not note_ids:
+            return jsonify({"error": "Notes not found"}), 404
 
-        db.folders.update_one(
-            {"_id": ObjectId(folder_id)},
-            {"$set": {"note_ids": updated_note_ids}}
-        )
+        # One atomic update: concurrent adds never overwrite each other
+        if not folders_repo.add_notes(folder_id, user_id, note_ids):
+            return jsonify({"error": "Folder not found"}), 404
 
         return jsonify({
             "success": True, 
@@ -1511,6 +2185,29 @@ def add_notes_to_folder(folder_id):
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/folders/<folder_id>/notes', methods=['DELETE'])
+@login_required
+def remove_notes_from_folder(folder_id):
+    try:
+        user_id = getattr(request, 'user_id', session.get('user_id'))
+        note_ids = folder_note_ids(request.json or {})
+
+        if not note_ids:
+            return jsonify({"error": "No notes provided"}), 400
+
+        if not folders_repo.remove_notes(folder_id, user_id, note_ids):
+            return jsonify({"error": "Folder not found"}), 404
+
+        return jsonify({
+            "success": True,
+            "message": f"{len(note_ids)} note(s) removed from folder"
+        })
+
+    except Exception as e:
+        print(f"Error removing notes from folder: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
 # ===========================
 # 📤 GOOGLE DOCS INTEGRATION
 # ===========================
@@ -1577,6 +2274,7 @@ def oauth2callback():
             {'_id': ObjectId(session['user_id'])},
             {'$set': {'google_credentials': creds_data}}
         )
+        profile_cache.invalidate(session['user_id'])
 
         print(f"✅ Google Docs credentials updated for user: {session['user_id']}")
 
@@ -1651,6 +2349,7 @@ def revoke_google_access():
                 {'_id': ObjectId(user_id)},
                 {'$unset': {'google_credentials': ''}}
             )
+            profile_cache.invalidate(user_id)
 
         return jsonify({
             'success': True,
@@ -1670,13 +2369,11 @@ def export_to_google_docs(note_id):
         user_id = getattr(request, 'user_id', session.get('user_id'))
 
         # Get the note
-        note = notes_collection.find_one({
-            '_id': ObjectId(note_id),
-            'user_id': user_id
-        })
+        note = notes_repo.get(note_id, user_id, {'title': 1, 'content': 1})
 
         if not note:
             return jsonify({'error': 'Note not found'}), 404
+        note_bodies.attach(note, ('content',))
 
         # Get user's Google credentials
         user = users_collection.find_one({'_id': ObjectId(user_id)})
@@ -1772,14 +2469,11 @@ def export_to_google_docs(note_id):
         doc_url = f"https://docs.google.com/document/d/{doc_id}/edit"
 
         # Update note with Google Doc info
-        notes_collection.update_one(
-            {'_id': ObjectId(note_id)},
-            {'$set': {
-                'google_doc_id': doc_id,
-                'google_doc_url': doc_url,
-                'updated_at': time.time()
-            }}
-        )
+        notes_repo.update(note_id, user_id, {'$set': {
+            'google_doc_id': doc_id,
+            'google_doc_url': doc_url,
+            'updated_at': time.time()
+        }})
 
         print(f"✅ Note exported to Google Docs: {doc_url}")
 
@@ -1892,6 +2586,7 @@ def google_login_callback():
                 }}
             )
             user_id = str(user['_id'])
+            profile_cache.invalidate(user_id)
             print(f"✅ Updated existing user {email} with Google credentials")
         else:
             # ✅ CREATE new user with complete credentials
@@ -1905,6 +2600,7 @@ def google_login_callback():
             }
             result = users_collection.insert_one(new_user)
             user_id = str(result.inserted_id)
+            profile_cache.invalidate(user_id)
             print(f"✅ Created new user {email} with Google credentials")
 
         # Create JWT token
@@ -1974,9 +2670,59 @@ def serve_audio(filename):
 # ===========================
 
 
+@app.after_request
+def record_first_request(response):
+    if not request.path.startswith('/health'):
+        lifecycle.mark('first_request')
+    return response
+
+
+@app.before_request
+def start_round_trip_count():
+    mongo_round_trips.begin()
+
+
+@app.after_request
+def report_round_trips(response):
+    # Streamed bodies run after this, so their commands aren't counted
+    response.headers['X-Mongo-Round-Trips'] = str(mongo_round_trips.end(request.endpoint))
+    return response
+
+
+@app.route('/health/live', methods=['GET'])
+def health_live():
+    """Liveness: the worker is up and serving; never waits on warm-up"""
+    return jsonify({'status': 'alive', 'pid': os.getpid()})
+
+
+@app.route('/health/ready', methods=['GET'])
+def health_ready():
+    """Readiness: 200 only once the model is hot and MongoDB answers, 503 until then"""
+    lifecycle.start()
+    report = lifecycle.report()
+    return jsonify(report), 200 if report['ready'] else 503
+
+
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({'status': 'running'})
+    status = {'status': 'running', 'ready': lifecycle.ready}
+    if transcript_cache is not None:
+        try:
+            status['transcript_cache'] = transcript_cache.stats()
+        except Exception as e:
+            status['transcript_cache'] = {'error': str(e)}
+    status['gemini'] = gemini.stats()
+    status['gemini_governor'] = gemini_governor.stats()
+    status['mongo_round_trips'] = mongo_round_trips.stats()
+    if profile_cache is not None:
+        status['profile_cache'] = profile_cache.stats()
+    for model_name, executor in list(transcribers.items()):
+        if isinstance(executor.model, BatchingWhisperModel):
+            status.setdefault('whisper_batcher', {})[model_name] = executor.model.stats()
+    return jsonify(status)
+
+
+lifecycle.mark('app_loaded')
 
 
 # ===========================
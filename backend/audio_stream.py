@@ -0,0 +1,124 @@
+"""
+Single-pass audio decoding for transcription.
+Runs ffmpeg once per upload and yields 16 kHz mono float32 chunks
+that can be handed straight to `model.transcribe`.
+"""
+import shutil
+import subprocess
+from typing import Iterator, Optional
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2  # s16le
+
+
+def probe_duration(path: str) -> float:
+    """Return the container duration in seconds (0 if ffprobe can't tell)"""
+    probe_cmd = [
+        'ffprobe', '-v', 'error', '-show_entries',
+        'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1',
+        path
+    ]
+    result = subprocess.run(probe_cmd, capture_output=True, text=True)
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return 0.0
+
+
+def open_pcm_stream(path: str, sample_rate: int = SAMPLE_RATE, stdin=None) -> subprocess.Popen:
+    """
+    Start one ffmpeg process that writes raw s16le mono PCM to stdout.
+    Pass path='pipe:0' with stdin=subprocess.PIPE to feed the input incrementally.
+    """
+    if not shutil.which('ffmpeg'):
+        raise RuntimeError("ffmpeg not found in PATH")
+
+    cmd = [
+        'ffmpeg', '-v', 'error',
+        '-i', path,
+        '-f', 's16le',
+        '-acodec', 'pcm_s16le',
+        '-ac', '1',
+        '-ar', str(sample_rate),
+        '-'
+    ]
+    if stdin is None:
+        cmd.insert(1, '-nostdin')
+    return subprocess.Popen(cmd, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def _read_exactly(stream, num_bytes: int) -> bytes:
+    """Read up to num_bytes, only returning short at EOF"""
+    buf = bytearray(num_bytes)
+    view = memoryview(buf)
+    filled = 0
+    while filled < num_bytes:
+        n = stream.readinto(view[filled:])
+        if not n:
+            break
+        filled += n
+    return bytes(buf[:filled])
+
+
+def pcm_to_float(raw: bytes) -> np.ndarray:
+    """Convert s16le bytes to the float32 [-1, 1] layout Whisper expects"""
+    return np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def read_pcm_chunks(
+    proc: subprocess.Popen,
+    chunk_duration_sec: float = 60,
+    sample_rate: int = SAMPLE_RATE,
+    min_chunk_sec: Optional[float] = 0.5,
+) -> Iterator[np.ndarray]:
+    """
+    Yield consecutive float32 chunks of `chunk_duration_sec` seconds from a
+    process started by open_pcm_stream, then reap it. The last chunk may be
+    shorter; a trailing sliver below `min_chunk_sec` is dropped since Whisper
+    can't use it.
+    """
+    chunk_bytes = int(chunk_duration_sec * sample_rate) * BYTES_PER_SAMPLE
+    min_bytes = int((min_chunk_sec or 0) * sample_rate) * BYTES_PER_SAMPLE
+
+    yielded = 0
+    try:
+        while True:
+            raw = _read_exactly(proc.stdout, chunk_bytes)
+            if not raw:
+                break
+            # ffmpeg may flush an odd byte count on truncated input
+            raw = raw[:len(raw) - (len(raw) % BYTES_PER_SAMPLE)]
+            if yielded and len(raw) < min_bytes:
+                break
+            yielded += 1
+            yield pcm_to_float(raw)
+
+            if len(raw) < chunk_bytes:
+                break
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        stderr = proc.stderr.read().decode('utf-8', errors='ignore')
+        proc.stderr.close()
+        returncode = proc.wait()
+
+    if returncode not in (0, -9) and not yielded:
+        raise RuntimeError(f"ffmpeg decode failed: {stderr.strip()}")
+
+
+def stream_pcm_chunks(
+    path: str,
+    chunk_duration_sec: float = 60,
+    sample_rate: int = SAMPLE_RATE,
+    min_chunk_sec: Optional[float] = 0.5,
+) -> Iterator[np.ndarray]:
+    """
+    Decode `path` once and yield consecutive float32 chunks of
+    `chunk_duration_sec` seconds. Decode cost is linear in the file length
+    and nothing touches disk.
+    """
+    proc = open_pcm_stream(path, sample_rate)
+    yield from read_pcm_chunks(proc, chunk_duration_sec, sample_rate, min_chunk_sec)
@@ -0,0 +1,78 @@
+"""
+Benchmark: per-request Whisper vs the cross-request micro-batcher.
+
+Simulates 1, 4 and 16 students uploading at once: each "upload" is a thread
+transcribing the same recording chunk by chunk, the way the /transcribe job
+does. Runs once against the plain model (batch size 1 per call) and once
+through BatchingWhisperModel, and reports audio-seconds processed per
+wall-clock second.
+
+Usage:
+    python benchmarks/bench_batcher.py [audio_file] [--minutes M] [--batch-size N] [--wait-ms W]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from faster_whisper import WhisperModel  # noqa: E402
+
+from audio_stream import SAMPLE_RATE, stream_pcm_chunks  # noqa: E402
+from bench_segmenter import make_fixture  # noqa: E402
+from whisper_batcher import BatchingWhisperModel  # noqa: E402
+
+OPTIONS = dict(
+    language='en',
+    task='translate',
+    beam_size=5,
+    vad_filter=False,
+    temperature=0.0,
+    condition_on_previous_text=False,
+)
+CONCURRENCY = (1, 4, 16)
+
+
+def upload(model, chunks):
+    for chunk in chunks:
+        segments, _ = model.transcribe(chunk, **OPTIONS)
+        list(segments)
+
+
+def throughput(model, chunks, concurrency: int) -> float:
+    audio_sec = sum(len(c) for c in chunks) / SAMPLE_RATE * concurrency
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda _: upload(model, chunks), range(concurrency)))
+    return audio_sec / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('audio', nargs='?')
+    parser.add_argument('--minutes', type=int, default=2)
+    parser.add_argument('--model', default=os.getenv('WHISPER_MODEL', 'tiny'))
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--wait-ms', type=float, default=20)
+    args = parser.parse_args()
+
+    path = args.audio or make_fixture(args.minutes)
+    chunks = list(stream_pcm_chunks(path, 30))
+
+    model = WhisperModel(args.model, device='cpu', compute_type='int8',
+                         download_root='./whisper_models', num_workers=4)
+    batcher = BatchingWhisperModel(model, args.batch_size, args.wait_ms)
+    upload(model, chunks[:1])  # warm-up
+
+    print(f"{'uploads':>8} {'plain (audio s/s)':>18} {'batched (audio s/s)':>20} {'speedup':>8}")
+    for concurrency in CONCURRENCY:
+        plain = throughput(model, chunks, concurrency)
+        batched = throughput(batcher, chunks, concurrency)
+        print(f"{concurrency:>8} {plain:>18.1f} {batched:>20.1f} {batched / plain:>7.2f}x")
+    print(f"batcher: {batcher.stats()}")
+
+
+if __name__ == '__main__':
+    main()
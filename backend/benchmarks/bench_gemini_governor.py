@@ -0,0 +1,105 @@
+"""
+Benchmark: Gemini traffic from several workers through the host-wide governor.
+
+Starts one process per simulated gunicorn worker, all sharing one token
+bucket in a temporary state directory. Each worker runs a mix of
+background cleaning calls (a bulk backlog), note generation and
+interactive chat, all against a fake Gemini call that just sleeps. The
+script reports per-class grants, fast rejections (the 429s the API would
+return) and wait times, so you can check that chat stays fast while
+cleaning soaks up the remaining budget. It also reports the total call
+rate, which should stay at or under the configured RPM.
+
+Usage:
+    python benchmarks/bench_gemini_governor.py [--workers 2] [--rpm 120] [--burst 10] [--seconds 20]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gemini_governor import (  # noqa: E402
+    GeminiGovernor, RateLimited, PRIORITIES, PRIORITY_INTERACTIVE, PRIORITY_NOTES, PRIORITY_BACKGROUND
+)
+
+# Concurrent callers per worker and think time between their calls
+CALLERS = {PRIORITY_BACKGROUND: (4, 0.0), PRIORITY_NOTES: (1, 3.0), PRIORITY_INTERACTIVE: (2, 4.0)}
+FAKE_CALL_SEC = 0.2
+
+
+def worker(state_dir: str, rpm: float, burst: int, seconds: float, results):
+    governor = GeminiGovernor('bench-key', rate_per_min=rpm, burst=burst, state_dir=state_dir)
+    stop_at = time.monotonic() + seconds
+    records = []
+    lock = threading.Lock()
+
+    def caller(priority: str, think_sec: float):
+        rng = random.Random()
+        while time.monotonic() < stop_at:
+            start = time.monotonic()
+            try:
+                governor.acquire(priority)
+                waited = time.monotonic() - start
+                time.sleep(FAKE_CALL_SEC)
+                outcome = 'granted'
+            except RateLimited:
+                waited = time.monotonic() - start
+                outcome = 'rejected'
+            with lock:
+                records.append((priority, outcome, waited, time.monotonic()))
+            if outcome == 'rejected' or think_sec:
+                time.sleep(think_sec * rng.uniform(0.5, 1.5) or 0.5)
+
+    threads = [threading.Thread(target=caller, args=(p, think)) for p, (n, think) in CALLERS.items() for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    results.extend(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--rpm', type=float, default=120)
+    parser.add_argument('--burst', type=int, default=10)
+    parser.add_argument('--seconds', type=float, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as state_dir, multiprocessing.Manager() as manager:
+        results = manager.list()
+        start = time.monotonic()
+        procs = [multiprocessing.Process(target=worker, args=(state_dir, args.rpm, args.burst, args.seconds, results))
+                 for _ in range(args.workers)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        elapsed = time.monotonic() - start
+        records = list(results)
+
+    print(f"{args.workers} workers, {args.rpm:.0f} RPM, burst {args.burst}, {args.seconds:.0f}s\n")
+    print(f"{'class':<12} {'granted':>8} {'rejected':>9} {'p50 wait ms':>12} {'p95 wait ms':>12} {'reject ms':>10}")
+    for priority in PRIORITIES:
+        waits = sorted(w for p, o, w, _ in records if p == priority and o == 'granted')
+        rejects = [w for p, o, w, _ in records if p == priority and o == 'rejected']
+        p50 = statistics.median(waits) * 1000 if waits else 0.0
+        p95 = waits[max(0, int(len(waits) * 0.95) - 1)] * 1000 if waits else 0.0
+        reject_ms = statistics.mean(rejects) * 1000 if rejects else 0.0
+        print(f"{priority:<12} {len(waits):>8} {len(rejects):>9} {p50:>12.0f} {p95:>12.0f} {reject_ms:>10.0f}")
+
+    granted = sum(1 for _, o, _, _ in records if o == 'granted')
+    allowed = args.burst + args.rpm / 60 * elapsed
+    print(f"\nCalls granted: {granted} in {elapsed:.1f}s ({granted / elapsed * 60:.0f}/min; "
+          f"bucket allows at most {allowed:.0f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark: GET /notes for a user with thousands of notes.
+
+Seeds a throwaway database with full-size synthetic notes (Markdown body,
+hour-long transcript, passage index) and compares three ways of listing
+them: the old full-document scan without an index, the projected full list
+the endpoint still returns when no `limit` is given, and keyset pages of
+`--page-size` notes walked with the `after` cursor. Reports bytes moved
+from MongoDB (raw BSON) and p50/p95 latency for each, plus whether the
+query plan needed an in-memory sort. The database is dropped afterwards.
+
+Needs a reachable MongoDB (MONGO_URI or --mongo-uri).
+
+Usage:
+    python benchmarks/bench_note_listing.py [--notes 5000] [--page-size 50] [--runs 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson.codec_options import CodecOptions  # noqa: E402
+from bson.raw_bson import RawBSONDocument  # noqa: E402
+from pymongo import MongoClient  # noqa: E402
+
+from note_listing import NOTE_LIST_FIELDS, encode_cursor, ensure_list_index, list_query, public_note  # noqa: E402
+
+WORDS = ('the lecturer explains mitochondria enzyme derivative integral entropy algorithm recursion '
+         'example previous topic exam membrane voltage matrix inflation sonnet protocol').split()
+
+
+def fake_text(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed(collection, user_id: str, count: int, rng: random.Random, transcript_words: int):
+    now = time.time()
+    batch = []
+    for i in range(count):
+        content = fake_text(rng, 800)
+        batch.append({
+            'user_id': user_id,
+            'title': f"Lecture {i}",
+            'content': content,
+            'transcript': fake_text(rng, transcript_words),
+            'key_points': [fake_text(rng, 12) for _ in range(6)],
+            'summary': fake_text(rng, 60),
+            'passage_index': {'version': 1, 'passages': [fake_text(rng, 100) for _ in range(20)]},
+            'preview': content[:150] + '...',
+            'is_favorite': rng.random() < 0.1,
+            'created_at': now - i * 600,
+            'updated_at': now - i * 600
+        })
+        if len(batch) == 200:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+
+
+def old_listing(raw, user_id):
+    # What get_notes did before: every field of every note, sorted without an index
+    return list(raw.find({'user_id': user_id}).sort('created_at', -1))
+
+
+def projected_listing(raw, user_id):
+    return list(raw.find(list_query(user_id), NOTE_LIST_FIELDS).sort([('created_at', -1), ('_id', -1)]))
+
+
+def make_paged_listing(page_size: int, max_pages: int):
+    def paged_listing(raw, user_id):
+        # Walk the first few pages the way a client follows next_cursor
+        docs, after = [], None
+        for _ in range(max_pages):
+            page = list(raw.find(list_query(user_id, after), NOTE_LIST_FIELDS)
+                        .sort([('created_at', -1), ('_id', -1)]).limit(page_size + 1))
+            docs.extend(page[:page_size])
+            if len(page) <= page_size:
+                break
+            after = encode_cursor(page[page_size - 1])
+        return docs
+    return paged_listing
+
+
+def measure(fn, raw, user_id: str, runs: int):
+    timings, moved = [], 0
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        docs = fn(raw, user_id)
+        for d in docs:
+            public_note(d)
+        timings.append((time.perf_counter() - t0) * 1000)
+        moved = sum(len(d.raw) for d in docs)
+    timings.sort()
+    return len(docs), moved, statistics.median(timings), timings[max(0, int(len(timings) * 0.95) - 1)]
+
+
+def in_memory_sort(collection, query: dict, sort: list) -> bool:
+    plan = collection.find(query).sort(sort).explain()['queryPlanner']['winningPlan']
+    return '"SORT"' in str(plan).replace("'", '"')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default=os.getenv('MONGO_URI', 'mongodb://localhost:27017'))
+    parser.add_argument('--notes', type=int, default=5000, help='notes for the listed user')
+    parser.add_argument('--other-users', type=int, default=5)
+    parser.add_argument('--transcript-words', type=int, default=9000, help='~1 hour of speech')
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--pages', type=int, default=3, help='pages walked per paged run')
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongo_uri, serverSelectionTimeoutMS=5000)
+    db_name = f"noteflow_bench_listing_{os.getpid()}"
+    collection = client[db_name].notes
+    raw = collection.with_options(codec_options=CodecOptions(document_class=RawBSONDocument))
+    rng = random.Random(11)
+    try:
+        start = time.perf_counter()
+        seed(collection, 'bench-user', args.notes, rng, args.transcript_words)
+        for u in range(args.other_users):
+            seed(collection, f"other-{u}", args.notes // 10, rng, args.transcript_words)
+        print(f"Seeded {collection.estimated_document_count():,} notes ({args.notes:,} for the listed user) "
+              f"in {time.perf_counter() - start:.1f}s\n")
+
+        print(f"{'listing':<34} {'notes':>6} {'MB moved':>9} {'p50 ms':>8} {'p95 ms':>8} {'sort in RAM':>12}")
+        old_sort = in_memory_sort(collection, {'user_id': 'bench-user'}, [('created_at', -1)])
+        row = measure(old_listing, raw, 'bench-user', max(3, args.runs // 4))
+        print(f"{'full documents, no index (before)':<34} {row[0]:>6} {row[1] / 1e6:>9.1f} "
+              f"{row[2]:>8.0f} {row[3]:>8.0f} {str(old_sort):>12}")
+
+        ensure_list_index(collection)
+        new_sort = in_memory_sort(collection, list_query('bench-user'), [('created_at', -1), ('_id', -1)])
+        for label, fn in (('projected, all notes', projected_listing),
+                          (f"projected, {args.pages} pages of {args.page_size}",
+                           make_paged_listing(args.page_size, args.pages))):
+            row = measure(fn, raw, 'bench-user', args.runs)
+            print(f"{label:<34} {row[0]:>6} {row[1] / 1e6:>9.2f} {row[2]:>8.1f} {row[3]:>8.1f} {str(new_sort):>12}")
+    finally:
+        client.drop_database(db_name)
+
+
+if __name__ == '__main__':
+    main()
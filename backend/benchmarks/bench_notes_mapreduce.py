@@ -0,0 +1,146 @@
+"""
+Benchmark: single-prompt vs map-reduce note generation, against a local
+Gemini stand-in.
+
+FakeGemini sleeps like a real model call (fixed overhead plus time per
+input and output character) and records how many calls are in flight, so
+the script shows both end-to-end latency as the lecture grows and that one
+request never runs more than NOTES_MAP_WORKERS calls at once.
+
+It then runs several long lectures at the same time: with one pool per
+request each finishes in about the time of a lone lecture, where a pool
+shared by the worker (emulated with a semaphore) made them queue.
+
+Usage:
+    python benchmarks/bench_notes_mapreduce.py [--workers N] [--minutes 15 30 60 120] [--concurrent 4]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from note_generation import NoteMapReducer, notes_prompt  # noqa: E402
+
+WORDS_PER_MINUTE = 140  # typical lecture speaking rate
+
+
+class FakeGemini:
+    """Stand-in for generate_with_gemini with a latency model and a concurrency gauge"""
+
+    def __init__(self, overhead_sec=0.3, sec_per_input_kchar=0.01, sec_per_output_kchar=0.2,
+                 max_output_chars=8000):
+        self.overhead_sec = overhead_sec
+        self.sec_per_input_kchar = sec_per_input_kchar
+        self.sec_per_output_kchar = sec_per_output_kchar
+        self.max_output_chars = max_output_chars
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt: str) -> str:
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            # Notes are roughly a fifth of their input, capped by the output limit
+            output_chars = min(self.max_output_chars, max(500, len(prompt) // 5))
+            time.sleep(self.overhead_sec
+                       + len(prompt) / 1000 * self.sec_per_input_kchar
+                       + output_chars / 1000 * self.sec_per_output_kchar)
+            return '## Main Topic\nFake\n' + 'x' * output_chars
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def make_transcript(minutes: int) -> str:
+    sentence = 'The lecturer explains another step of the derivation in detail.'
+    words_per_sentence = len(sentence.split())
+    return ' '.join([sentence] * (minutes * WORDS_PER_MINUTE // words_per_sentence))
+
+
+def run_concurrent(make_reducer, transcript: str, requests: int) -> list:
+    """Latency of each of `requests` simultaneous note generations"""
+    latencies = [0.0] * requests
+
+    def one(i):
+        t0 = time.perf_counter()
+        make_reducer().generate_notes(transcript)
+        latencies[i] = time.perf_counter() - t0
+
+    threads = [threading.Thread(target=one, args=(i,)) for i in range(requests)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--section-chars', type=int, default=12000)
+    parser.add_argument('--minutes', type=int, nargs='+', default=[15, 30, 60, 120])
+    parser.add_argument('--concurrent', type=int, default=4, help='simultaneous lectures of the longest length')
+    args = parser.parse_args()
+
+    print(f"{'lecture':>8} {'chars':>8} {'single':>8} {'map-reduce':>11} {'calls':>6} {'peak conc.':>11} {'truncated':>10}")
+    for minutes in args.minutes:
+        transcript = make_transcript(minutes)
+
+        single_model = FakeGemini()
+        t0 = time.perf_counter()
+        single_model(notes_prompt(transcript))
+        single = time.perf_counter() - t0
+        # A single call caps out at the output limit however long the lecture is
+        truncated = len(transcript) // 5 > single_model.max_output_chars
+
+        model = FakeGemini()
+        reducer = NoteMapReducer(model, max_workers=args.workers,
+                                 section_chars=args.section_chars, reduce_chars=2 * args.section_chars)
+        t0 = time.perf_counter()
+        reducer.generate_notes(transcript)
+        mapped = time.perf_counter() - t0
+
+        assert model.peak_in_flight <= args.workers, 'map phase exceeded the worker bound'
+        print(f"{minutes:>6}min {len(transcript):>8} {single:>7.2f}s {mapped:>10.2f}s {model.calls:>6} "
+              f"{model.peak_in_flight:>11} {'yes' if truncated else 'no':>10}")
+
+    if args.concurrent > 1:
+        minutes = max(args.minutes)
+        transcript = make_transcript(minutes)
+        model = FakeGemini()
+        per_request = run_concurrent(
+            lambda: NoteMapReducer(model, max_workers=args.workers, section_chars=args.section_chars,
+                                   reduce_chars=2 * args.section_chars),
+            transcript, args.concurrent)
+        per_request_peak = model.peak_in_flight
+
+        # The old layout: every request's map calls went through one pool per worker
+        shared_model = FakeGemini()
+        shared_pool = threading.BoundedSemaphore(args.workers)
+
+        def shared_generate(prompt):
+            with shared_pool:
+                return shared_model(prompt)
+        shared = run_concurrent(
+            lambda: NoteMapReducer(shared_generate, max_workers=args.workers, section_chars=args.section_chars,
+                                   reduce_chars=2 * args.section_chars),
+            transcript, args.concurrent)
+
+        print(f"\n{args.concurrent} x {minutes}min lectures at once:")
+        print(f"{'pool':<18} {'p50':>7} {'max':>7} {'peak conc.':>11}")
+        print(f"{'per request':<18} {statistics.median(per_request):>6.2f}s {max(per_request):>6.2f}s "
+              f"{per_request_peak:>11}")
+        print(f"{'shared (before)':<18} {statistics.median(shared):>6.2f}s {max(shared):>6.2f}s "
+              f"{shared_model.peak_in_flight:>11}")
+
+
+if __name__ == '__main__':
+    main()
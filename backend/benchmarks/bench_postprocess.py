@@ -0,0 +1,143 @@
+"""
+Benchmark: local transcript post-processing throughput.
+
+Builds a long synthetic lecture transcript the way Whisper tends to produce
+it (fillers, stutters, doubled words, the odd hallucinated loop and
+misheard technical terms), or reads a real one with --file, then runs
+TranscriptPostProcessor over it chunk by chunk as the transcription
+pipeline does. Reports time per chunk, words per second, and how much
+shorter the text handed to Gemini gets (characters and rough tokens).
+
+It also runs sentences that must come through the glossary pass unchanged
+(real words close to a term, plurals, "an algorithm") and exits non-zero
+if any of them is rewritten.
+
+Usage:
+    python benchmarks/bench_postprocess.py [--minutes 90] [--file transcript.txt] [--glossary terms.txt] [--vocab /usr/share/dict/words]
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcript_postprocess import TranscriptPostProcessor  # noqa: E402
+
+WORDS_PER_MINUTE = 140
+CHARS_PER_TOKEN = 4  # rough for English
+
+SENTENCES = [
+    "so the {term} is really the key idea for today's lecture",
+    "if you remember from last week we talked about how the {term} works",
+    "let's write this on the board and go through it step by step",
+    "this is going to be on the exam so make sure you understand the {term}",
+    "any questions about that before we move on to the next part",
+    "you can see here that the result depends on the {term} in a nonlinear way",
+]
+MISHEARD = {
+    'mitochondria': ['mito condria', 'mitocondria'], 'photosynthesis': ['photo synthesis', 'photosynthasis'],
+    'Fourier transform': ['fourier transfrom', 'fouriay transform'], 'eigenvalue': ['eigen value', 'eigenvallue'],
+    'thermodynamics': ['thermo dynamics', 'thermodinamics'], 'polymorphism': ['poly morphism', 'polymorfism'],
+}
+FILLERS = ['um', 'uh', 'uh,', 'um,', 'er', 'hmm']
+# Correct English that sits within fuzzy range of a glossary term
+FALSE_POSITIVES = [
+    "the internal energy of the system",
+    "over the interval from zero to one",
+    "the election results came in",
+    "that was an insulting remark",
+    "we test both hypotheses",
+    "the two equilibria are stable",
+    "we use an algorithm to sort the list",
+    "my mitochondria lecture notes",
+    "these substates are recursing and polymorphic",
+    "prokaryote cells and ribose sugars",
+]
+
+
+def make_transcript(minutes: int, seed: int = 3) -> str:
+    rng = random.Random(seed)
+    words = []
+    while len(words) < minutes * WORDS_PER_MINUTE:
+        term = rng.choice(list(MISHEARD))
+        spoken = rng.choice(MISHEARD[term]) if rng.random() < 0.4 else term
+        sentence = rng.choice(SENTENCES).format(term=spoken).split()
+        noisy = []
+        for w in sentence:
+            if rng.random() < 0.06:
+                noisy.append(rng.choice(FILLERS))
+            if rng.random() < 0.03:
+                noisy.append(w)  # doubled word
+            if rng.random() < 0.01:
+                noisy.append(w[:2] + '-')  # stutter
+            noisy.append(w)
+        words.extend(noisy)
+        words[-1] += '.'
+        if rng.random() < 0.02:  # hallucination loop
+            words.extend(['thank', 'you.'] * rng.randint(3, 8))
+    return ' '.join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--minutes', type=int, default=90)
+    parser.add_argument('--file', help='real transcript to process instead of the synthetic one')
+    parser.add_argument('--glossary', help='extra glossary terms, one per line')
+    parser.add_argument('--vocab', help='known words, one per line, never rewritten')
+    parser.add_argument('--chunk-sec', type=int, default=60)
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding='utf-8') as f:
+            transcript = f.read()
+    else:
+        transcript = make_transcript(args.minutes)
+    words = transcript.split()
+    chunk_words = WORDS_PER_MINUTE * args.chunk_sec // 60
+    chunks = [' '.join(words[i:i + chunk_words]) for i in range(0, len(words), chunk_words)]
+
+    start = time.perf_counter()
+    processor = TranscriptPostProcessor.from_file(args.glossary, args.vocab)
+    setup_ms = (time.perf_counter() - start) * 1000
+
+    timings = []
+    out = []
+    for chunk in chunks:
+        t0 = time.perf_counter()
+        out.append(processor.process(chunk))
+        timings.append((time.perf_counter() - t0) * 1000)
+    total_sec = sum(timings) / 1000
+    cleaned = ' '.join(out)
+
+    timings.sort()
+    print(f"Transcript: {len(words):,} words, {len(transcript):,} chars, {len(chunks)} chunks of ~{args.chunk_sec}s")
+    print(f"Glossary: {len(processor.terms)} terms, set up in {setup_ms:.1f} ms\n")
+    print(f"Per chunk: p50 {statistics.median(timings):.2f} ms, p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms, "
+          f"max {timings[-1]:.2f} ms")
+    print(f"Throughput: {len(words) / total_sec:,.0f} words/s ({total_sec * 1000:.0f} ms for the whole transcript)")
+    print(f"Text for Gemini: {len(transcript):,} -> {len(cleaned):,} chars "
+          f"(~{len(transcript) // CHARS_PER_TOKEN:,} -> ~{len(cleaned) // CHARS_PER_TOKEN:,} tokens, "
+          f"{(1 - len(cleaned) / len(transcript)) * 100:.1f}% fewer)")
+    if not args.file:
+        misheard = re.compile(r'\b(?:' + '|'.join(m for variants in MISHEARD.values() for m in variants) + r')\b',
+                              re.IGNORECASE)
+        before, left = len(misheard.findall(transcript)), len(misheard.findall(cleaned))
+        print(f"Misheard terms: {before} -> {left}; 'thank you.' loops: "
+              f"{transcript.count('thank you. thank you. thank you.')} -> "
+              f"{cleaned.lower().count('thank you. thank you. thank you.')}")
+
+    rewritten = [(s, processor.apply_glossary(s)) for s in FALSE_POSITIVES]
+    rewritten = [(s, out) for s, out in rewritten if out != s]
+    print(f"\nFalse positives: {len(rewritten)} of {len(FALSE_POSITIVES)} correct sentences rewritten")
+    for before, after in rewritten:
+        print(f"  ❌ {before!r} -> {after!r}")
+    if rewritten:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
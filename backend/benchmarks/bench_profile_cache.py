@@ -0,0 +1,112 @@
+"""
+Load test: MongoDB reads behind /me, /auth/status and /auth/verify-token.
+
+Seeds a throwaway users collection, then runs several threads that look up
+profiles the way page loads do (a few active users account for most hits,
+and a small share of requests invalidate, like a Google reconnect). It runs
+once with the cache off (TTL 0, one read per lookup, the old behavior) and
+once with the configured TTL. For each run it reports lookups/s, MongoDB
+reads/s (counted with the app's RoundTripCounter), hit rate and lookup
+latency. The database is dropped afterwards.
+
+Needs a reachable MongoDB (MONGO_URI or --mongo-uri).
+
+Usage:
+    python benchmarks/bench_profile_cache.py [--users 500] [--threads 8] [--seconds 10] [--ttl 60]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo import MongoClient  # noqa: E402
+
+from profile_cache import ProfileCache  # noqa: E402
+from repository import RoundTripCounter  # noqa: E402
+
+
+def run(collection, counter, user_ids, ttl: float, threads: int, seconds: float, invalidate_rate: float):
+    cache = ProfileCache(collection, ttl_sec=ttl)
+    stop_at = time.monotonic() + seconds
+    timings, reads = [], []
+    lock = threading.Lock()
+
+    def client(seed: int):
+        rng = random.Random(seed)
+        local_ms = []
+        counter.begin()
+        while time.monotonic() < stop_at:
+            # Skewed: low indexes (active users) come up far more often
+            user_id = user_ids[min(int(rng.paretovariate(1.2)) - 1, len(user_ids) - 1)]
+            if rng.random() < invalidate_rate:
+                cache.invalidate(user_id)
+            t0 = time.perf_counter()
+            cache.get(user_id)
+            local_ms.append((time.perf_counter() - t0) * 1000)
+        trips = counter.end()
+        with lock:
+            timings.extend(local_ms)
+            reads.append(trips)
+
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    timings.sort()
+    return {
+        'lookups_per_sec': len(timings) / seconds,
+        'reads_per_sec': sum(reads) / seconds,
+        'hit_rate': cache.stats()['hit_rate'],
+        'p50_ms': statistics.median(timings),
+        'p95_ms': timings[max(0, int(len(timings) * 0.95) - 1)]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default=os.getenv('MONGO_URI', 'mongodb://localhost:27017'))
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--ttl', type=float, default=60)
+    parser.add_argument('--invalidate-rate', type=float, default=0.001)
+    args = parser.parse_args()
+
+    counter = RoundTripCounter()
+    client = MongoClient(args.mongo_uri, serverSelectionTimeoutMS=5000, event_listeners=[counter])
+    db_name = f"noteflow_bench_profiles_{os.getpid()}"
+    users = client[db_name].users
+    try:
+        user_ids = [str(i) for i in users.insert_many([{
+            'email': f"student{i}@example.edu", 'first_name': 'Student', 'last_name': str(i),
+            'password': 'x' * 60, 'auth_provider': 'local', 'created_at': time.time(),
+            **({'google_credentials': {'token': 't' * 200, 'refresh_token': 'r' * 100,
+                                       'token_uri': 'https://oauth2.googleapis.com/token'}} if i % 3 == 0 else {})
+        } for i in range(args.users)]).inserted_ids]
+        print(f"{args.users} users, {args.threads} threads, {args.seconds:.0f}s per run, "
+              f"{args.invalidate_rate:.1%} of requests invalidate\n")
+
+        print(f"{'run':<18} {'lookups/s':>10} {'Mongo reads/s':>14} {'hit rate':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        rows = {}
+        for label, ttl in (('no cache', 0), (f"cache, TTL {args.ttl:.0f}s", args.ttl)):
+            row = rows[label] = run(users, counter, user_ids, ttl, args.threads, args.seconds, args.invalidate_rate)
+            print(f"{label:<18} {row['lookups_per_sec']:>10,.0f} {row['reads_per_sec']:>14,.0f} "
+                  f"{row['hit_rate']:>9.1%} {row['p50_ms']:>8.3f} {row['p95_ms']:>8.3f}")
+
+        before, after = rows.values()
+        # Compare reads per lookup: the cached run serves far more lookups in the same time
+        per_lookup = [r['reads_per_sec'] / r['lookups_per_sec'] for r in (before, after)]
+        print(f"\nMongoDB reads per lookup: {per_lookup[0]:.3f} -> {per_lookup[1]:.3f} "
+              f"({(1 - per_lookup[1] / per_lookup[0]) * 100:.1f}% fewer)")
+    finally:
+        client.drop_database(db_name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark: real-time factor of each transcription profile on this CPU.
+
+Runs the same recording through the /transcribe decode path (streamed PCM,
+energy VAD pre-pass, Whisper) once per profile and reports
+RTF = processing time / audio duration (lower is faster; 0.1 means an hour
+of audio in six minutes). Gemini cleaning is not included.
+
+Usage:
+    python benchmarks/bench_profiles.py [audio_file] [--minutes M] [--profiles fast balanced accurate] [--json out.json]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from faster_whisper import WhisperModel  # noqa: E402
+
+from audio_stream import probe_duration, stream_pcm_chunks  # noqa: E402
+from bench_segmenter import make_fixture  # noqa: E402
+from transcription_executor import TranscriptionExecutor  # noqa: E402
+from transcription_profiles import build_profiles  # noqa: E402
+from vad_segmenter import VadSegmenter  # noqa: E402
+
+
+def load_model(name: str, models: dict) -> WhisperModel:
+    if name not in models:
+        t0 = time.perf_counter()
+        models[name] = WhisperModel(name, device='cpu', compute_type='int8', download_root='./whisper_models')
+        print(f"loaded {name} in {time.perf_counter() - t0:.1f}s")
+    return models[name]
+
+
+def run_profile(profile, path: str, models: dict) -> dict:
+    executor = TranscriptionExecutor(load_model(profile.model_name, models))
+    # Untimed warm-up so the first profile doesn't pay for model initialization
+    list(executor.map_chunks([next(stream_pcm_chunks(path, 5))], profile.whisper_options()))
+
+    segmenter = VadSegmenter(max_chunk_sec=60, **profile.segmenter_options())
+    t0 = time.perf_counter()
+    words = 0
+    chunks = (chunk.audio for chunk in segmenter.chunks(stream_pcm_chunks(path, 10)))
+    for segments, _ in executor.map_chunks(chunks, profile.whisper_options()):
+        words += sum(len(text.split()) for _, _, text in segments)
+    elapsed = time.perf_counter() - t0
+    return {'seconds': round(elapsed, 2), 'words': words, 'vad': segmenter.stats()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('audio', nargs='?')
+    parser.add_argument('--minutes', type=int, default=3)
+    parser.add_argument('--model', default=os.getenv('WHISPER_MODEL', 'tiny'))
+    parser.add_argument('--profiles', nargs='+', default=['fast', 'balanced', 'accurate'])
+    parser.add_argument('--json', help='also write the results here')
+    args = parser.parse_args()
+
+    path = args.audio or make_fixture(args.minutes)
+    duration = probe_duration(path)
+    profiles = build_profiles(args.model)
+
+    models = {}
+    results = {}
+    for name in args.profiles:
+        profile = profiles[name]
+        result = run_profile(profile, path, models)
+        result['rtf'] = round(result['seconds'] / duration, 4)
+        results[name] = {**profile.public(), **result}
+
+    print(f"host: {platform.processor() or platform.machine()}, {os.cpu_count()} cores; audio {duration:.0f}s")
+    print(f"{'profile':<10} {'model':<10} {'beam':>4} {'time':>8} {'RTF':>7} {'words':>6}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['model']:<10} {r['beam_size']:>4} {r['seconds']:>7.2f}s {r['rtf']:>7.3f} {r['words']:>6}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'host_cores': os.cpu_count(), 'audio_sec': duration, 'profiles': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Benchmark: whole-note vs retrieved-passage chat prompts on a long lecture.
+
+The fixture is a synthetic lecture (transcript and notes) covering one
+topic per section, each with its own vocabulary. For each question the
+script reports prompt size and answer latency for the whole-note prompt
+(before) and the prompt the app actually sends (after: the top-k passage
+prompt when the notes exceed --min-chars and it is the smaller one), and
+whether the passages retrieved actually came from the section the question
+is about. It runs twice: with long notes, and with short notes (a few KB)
+over the same long transcript, where the whole note should win.
+
+Latency comes from FakeGemini (fixed overhead plus time per input
+character) unless --live is given and GEMINI_API_KEY is set, in which case
+the real model answers both prompts.
+
+Usage:
+    python benchmarks/bench_rag_chat.py [--minutes 90] [--top-k 6] [--min-chars 6000] [--short-notes 3000] [--live]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from note_chat import build_note_index, choose_chat_prompt  # noqa: E402
+
+WORDS_PER_MINUTE = 140
+
+TOPICS = [
+    ('mitochondria', 'ATP synthase', 'oxidative phosphorylation'),
+    ('photosynthesis', 'chlorophyll', 'Calvin cycle'),
+    ('ribosome', 'messenger RNA', 'translation'),
+    ('enzyme', 'activation energy', 'Michaelis constant'),
+    ('membrane', 'phospholipid bilayer', 'osmosis'),
+    ('neuron', 'action potential', 'myelin sheath'),
+    ('DNA replication', 'helicase', 'Okazaki fragments'),
+    ('glycolysis', 'pyruvate', 'hexokinase'),
+    ('immune system', 'antibody', 'lymphocyte'),
+    ('hormone', 'insulin', 'negative feedback'),
+    ('meiosis', 'crossing over', 'homologous chromosomes'),
+    ('evolution', 'natural selection', 'genetic drift'),
+]
+
+QUESTIONS = [
+    (0, 'What does ATP synthase do during oxidative phosphorylation?'),
+    (2, 'How does the ribosome read messenger RNA?'),
+    (5, 'Why does the myelin sheath speed up an action potential?'),
+    (6, 'What are Okazaki fragments and where do they come from?'),
+    (9, 'Explain how insulin is regulated by negative feedback.'),
+    (11, 'What is the difference between natural selection and genetic drift?'),
+]
+
+FILLER = ('the lecturer walks through an example on the board, pauses for questions, '
+          'and relates it back to what was covered earlier in the course')
+
+
+def make_fixture(minutes: int):
+    """Transcript of roughly `minutes` of speech and notes about a fifth of its size"""
+    words_per_topic = minutes * WORDS_PER_MINUTE // len(TOPICS)
+    transcript_parts = []
+    notes_parts = []
+    for main, a, b in TOPICS:
+        sentences = [
+            f"Now we turn to {main}, and the key idea is how {a} relates to {b}.",
+            f"In {main}, {a} is essential, {FILLER}.",
+            f"Students often confuse {b} with other processes, {FILLER}.",
+            f"Remember that {a} and {b} together explain {main}.",
+        ]
+        section = []
+        while sum(len(s.split()) for s in section) < words_per_topic:
+            section.extend(sentences)
+        transcript_parts.append(' '.join(section))
+        notes_parts.append(f"### {main.title()}\n- **{a}**: central to {main}\n- **{b}**: follows from {a}\n"
+                           + ' '.join(section[:len(section) // 5]))
+    return '\n\n'.join(transcript_parts), '\n\n'.join(notes_parts)
+
+
+class FakeGemini:
+    """Latency grows with the prompt, like a real model's prefill"""
+
+    def __init__(self, overhead_sec=0.4, sec_per_input_kchar=0.015):
+        self.overhead_sec = overhead_sec
+        self.sec_per_input_kchar = sec_per_input_kchar
+
+    def __call__(self, prompt: str) -> str:
+        time.sleep(self.overhead_sec + len(prompt) / 1000 * self.sec_per_input_kchar)
+        return 'Fake answer.'
+
+
+def live_model():
+    import google.generativeai as genai
+    from llm_client import GeminiClient
+
+    genai.configure(api_key=os.environ['GEMINI_API_KEY'])
+    client = GeminiClient(os.getenv('GEMINI_MODEL', 'gemini-2.5-flash'), timeout=60)
+    return lambda prompt: client.generate(prompt, use_cache=False)
+
+
+def timed(generate, prompt: str) -> float:
+    start = time.perf_counter()
+    generate(prompt)
+    return time.perf_counter() - start
+
+
+def run(label: str, note: dict, generate, top_k: int, min_chars: int):
+    start = time.perf_counter()
+    index = build_note_index(note['content'], note['transcript'])
+    build_ms = (time.perf_counter() - start) * 1000
+    stored_kb = len(repr(index.to_doc())) / 1024
+    print(f"{label}: notes {len(note['content']):,} chars, transcript {len(note['transcript']):,} chars")
+    print(f"Index: {len(index.passages)} passages, built in {build_ms:.1f} ms, ~{stored_kb:.0f} KB stored\n")
+
+    print(f"{'question':<44} {'full chars':>10} {'full s':>7} {'sent chars':>10} {'sent s':>6} {'mode':>5} "
+          f"{'search ms':>9} {'on-topic':>8}")
+    totals = [0, 0.0, 0, 0.0]
+    for topic, question in QUESTIONS:
+        full_prompt, _, _ = choose_chat_prompt(note, [], question, [])
+
+        # Same gate and choice as the app's chat_prompt_for
+        start = time.perf_counter()
+        hits = index.search(question, k=top_k) if len(note['content']) > min_chars else []
+        search_ms = (time.perf_counter() - start) * 1000
+        prompt, mode, _ = choose_chat_prompt(note, [p for _, p in hits], question, [])
+
+        main_term = TOPICS[topic][0].lower()
+        on_topic = sum(main_term in p['text'].lower() for _, p in hits)
+
+        full_sec = timed(generate, full_prompt)
+        sent_sec = timed(generate, prompt)
+        totals[0] += len(full_prompt)
+        totals[1] += full_sec
+        totals[2] += len(prompt)
+        totals[3] += sent_sec
+        print(f"{question[:44]:<44} {len(full_prompt):>10,} {full_sec:>7.2f} {len(prompt):>10,} "
+              f"{sent_sec:>6.2f} {mode:>5} {search_ms:>9.2f} {on_topic:>5}/{len(hits)}")
+
+    n = len(QUESTIONS)
+    print(f"\nMean prompt: {totals[0] / n:,.0f} -> {totals[2] / n:,.0f} chars "
+          f"({totals[0] / max(totals[2], 1):.1f}x smaller)")
+    print(f"Mean latency: {totals[1] / n:.2f}s -> {totals[3] / n:.2f}s\n")
+    return totals[2] <= totals[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--minutes', type=int, default=90)
+    parser.add_argument('--top-k', type=int, default=6)
+    parser.add_argument('--min-chars', type=int, default=int(os.getenv('RAG_MIN_CHARS', '6000')),
+                        help='notes longer than this use passage retrieval (RAG_MIN_CHARS)')
+    parser.add_argument('--short-notes', type=int, default=3000, help='notes size for the short-notes run')
+    parser.add_argument('--live', action='store_true', help='answer with the real Gemini model')
+    args = parser.parse_args()
+
+    generate = live_model() if args.live and os.getenv('GEMINI_API_KEY') else FakeGemini()
+    transcript, notes = make_fixture(args.minutes)
+    print(f"Fixture: {args.minutes} min lecture\n")
+    ok = run('Long notes', {'title': 'Cell Biology Review', 'content': notes, 'transcript': transcript},
+             generate, args.top_k, args.min_chars)
+    ok &= run('Short notes', {'title': 'Cell Biology Review', 'content': notes[:args.short_notes],
+                              'transcript': transcript},
+              generate, args.top_k, args.min_chars)
+    if not ok:
+        print("❌ A prompt sent was larger than the whole-note prompt")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+"""
+Benchmark: MongoDB round trips and latency per note/folder mutation.
+
+Seeds a throwaway database, then runs each mutation the old way (find_one
+to check ownership, then update_one on _id) and through the repository
+(one ownership-scoped find_one_and_update), counting the commands actually
+sent with the same RoundTripCounter the app installs.
+
+It then loads app.py against the same throwaway database and calls
+PUT and DELETE /notes/<id> through Flask's test client, reading the
+X-Mongo-Round-Trips header the app sets on every response, so everything a
+route sends is counted, not just the repository call.
+
+Exits non-zero if a repository mutation needs more than one round trip or
+a route goes over its budget in ROUTE_BUDGETS, so it doubles as a check in
+CI. The database is dropped afterwards.
+
+Needs a reachable MongoDB (MONGO_URI or --mongo-uri); the route section
+also needs the app's dependencies installed (skip it with --no-routes).
+
+Usage:
+    python benchmarks/bench_round_trips.py [--runs 200] [--no-routes]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson.objectid import ObjectId  # noqa: E402
+from pymongo import MongoClient  # noqa: E402
+
+from note_bodies import NoteBodyStore  # noqa: E402
+from repository import FolderRepository, NoteRepository, RoundTripCounter  # noqa: E402
+
+USER = 'bench-user'
+
+# Most round trips each route may take: a note edit writes the note and its body,
+# a delete removes the note, its body, its folder memberships and its chat sessions
+ROUTE_BUDGETS = {
+    'PUT title': 2,
+    'PUT content': 2,
+    'PUT title + content': 2,
+    "PUT someone else's note": 1,
+    'DELETE': 4,
+}
+
+
+def old_toggle_favorite(db, note_id):
+    note = db.notes.find_one({'_id': ObjectId(note_id), 'user_id': USER})
+    new_status = not note.get('is_favorite', False)
+    db.notes.update_one({'_id': ObjectId(note_id)}, {'$set': {'is_favorite': new_status}})
+
+
+def old_update_note(db, note_id):
+    db.notes.find_one({'_id': ObjectId(note_id), 'user_id': USER})
+    db.notes.update_one({'_id': ObjectId(note_id)}, {'$set': {'updated_at': time.time()}})
+
+
+def old_update_folder(db, folder_id):
+    db.folders.find_one({'_id': ObjectId(folder_id), 'user_id': USER})
+    db.folders.update_one({'_id': ObjectId(folder_id)}, {'$set': {'name': f"Folder {time.time()}"}})
+
+
+def measure(counter, fn, runs: int):
+    timings, trips = [], []
+    for _ in range(runs):
+        with counter.track() as counts:
+            t0 = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - t0) * 1000)
+        trips.append(sum(counts.values()))
+    timings.sort()
+    return max(trips), statistics.median(timings), timings[max(0, int(len(timings) * 0.95) - 1)]
+
+
+def route_round_trips(mongo_uri: str, db_name: str, runs: int):
+    """Each route's max X-Mongo-Round-Trips and p50 latency, through app.py's own middleware"""
+    os.environ.update({'MONGODB_URL': mongo_uri, 'MONGODB_DB': db_name, 'MONGODB_TLS': '0',
+                       'WARMUP_ON_BOOT': '0', 'NOTE_BODY_BACKFILL': '0'})
+    import app as server
+
+    client = server.app.test_client()
+    headers = {'Authorization': f"Bearer {server.create_access_token(USER)}"}
+    content = '# Lecture\n\n## Key Points\n- one\n- two\n\n## Summary\nShort summary.\n'
+
+    def new_note():
+        note_id = ObjectId()
+        server.note_bodies.save(note_id, USER, title='Lecture', content=content, transcript='words ' * 2000)
+        server.notes_repo.create({'_id': note_id, 'user_id': USER, 'title': 'Lecture', 'created_at': time.time()})
+        return str(note_id)
+
+    note_id = new_note()
+    cases = {
+        'PUT title': lambda: client.put(f"/notes/{note_id}", json={'title': f"Lecture {time.time()}"},
+                                        headers=headers),
+        'PUT content': lambda: client.put(f"/notes/{note_id}", json={'content': content}, headers=headers),
+        'PUT title + content': lambda: client.put(f"/notes/{note_id}", json={'title': 'Lecture', 'content': content},
+                                                  headers=headers),
+        "PUT someone else's note": lambda: client.put(
+            f"/notes/{note_id}", json={'title': 'x'},
+            headers={'Authorization': f"Bearer {server.create_access_token('someone-else')}"}),
+    }
+    rows = {}
+    for name, call in cases.items():
+        trips, timings = [], []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            response = call()
+            timings.append((time.perf_counter() - t0) * 1000)
+            trips.append(int(response.headers['X-Mongo-Round-Trips']))
+        rows[name] = (max(trips), statistics.median(timings))
+
+    trips, timings = [], []
+    for _ in range(max(1, runs // 10)):
+        delete_id = new_note()
+        t0 = time.perf_counter()
+        response = client.delete(f"/notes/{delete_id}", headers=headers)
+        timings.append((time.perf_counter() - t0) * 1000)
+        assert response.status_code == 200, response.get_json()
+        trips.append(int(response.headers['X-Mongo-Round-Trips']))
+    rows['DELETE'] = (max(trips), statistics.median(timings))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default=os.getenv('MONGO_URI', 'mongodb://localhost:27017'))
+    parser.add_argument('--runs', type=int, default=200)
+    parser.add_argument('--no-routes', action='store_true', help='only measure the repository methods')
+    args = parser.parse_args()
+
+    counter = RoundTripCounter()
+    client = MongoClient(args.mongo_uri, serverSelectionTimeoutMS=5000, event_listeners=[counter])
+    db_name = f"noteflow_bench_trips_{os.getpid()}"
+    db = client[db_name]
+    notes = NoteRepository(db.notes, NoteBodyStore(db.note_bodies), db.folders)
+    folders = FolderRepository(db.folders)
+    try:
+        note_id = str(db.notes.insert_one({'user_id': USER, 'title': 'Lecture', 'preview': 'x' * 150,
+                                           'created_at': time.time()}).inserted_id)
+        other_ids = [str(i) for i in db.notes.insert_many(
+            [{'user_id': USER, 'title': f"Lecture {i}", 'created_at': time.time()} for i in range(20)]
+        ).inserted_ids]
+        folder_id = str(folders.create(USER, 'Biology', []))
+
+        cases = [
+            ('toggle favorite', lambda: old_toggle_favorite(db, note_id),
+             lambda: notes.toggle_favorite(note_id, USER)),
+            ('update note metadata', lambda: old_update_note(db, note_id),
+             lambda: notes.update(note_id, USER, {'$set': {'updated_at': time.time()}})),
+            ('rename folder', lambda: old_update_folder(db, folder_id),
+             lambda: folders.update(folder_id, USER, {'$set': {'name': f"Folder {time.time()}"}})),
+            ('add notes to folder', None,
+             lambda: folders.add_notes(folder_id, USER, other_ids[:5])),
+            ('remove notes from folder', None,
+             lambda: folders.remove_notes(folder_id, USER, other_ids[:5])),
+        ]
+
+        print(f"{'mutation':<26} {'old trips':>9} {'old p50 ms':>11} {'new trips':>9} "
+              f"{'new p50 ms':>11} {'new p95 ms':>11}")
+        failures = []
+        for name, old, new in cases:
+            old_row = measure(counter, old, args.runs) if old else None
+            trips, p50, p95 = measure(counter, new, args.runs)
+            old_text = f"{old_row[0]:>9} {old_row[1]:>11.2f}" if old_row else f"{'-':>9} {'-':>11}"
+            print(f"{name:<26} {old_text} {trips:>9} {p50:>11.2f} {p95:>11.2f}")
+            if trips != 1:
+                failures.append(name)
+
+        # Someone else's note is rejected by the same single command
+        with counter.track() as counts:
+            assert notes.toggle_favorite(note_id, 'someone-else') is None
+        print(f"\nForeign-note toggle: rejected in {sum(counts.values())} round trip")
+
+        if not args.no_routes:
+            print(f"\n{'route':<26} {'trips':>9} {'budget':>9} {'p50 ms':>11}")
+            for name, (trips, p50) in route_round_trips(args.mongo_uri, db_name, args.runs).items():
+                print(f"{name:<26} {trips:>9} {ROUTE_BUDGETS[name]:>9} {p50:>11.2f}")
+                if trips > ROUTE_BUDGETS[name]:
+                    failures.append(name)
+
+        if failures:
+            print(f"❌ Over the round-trip budget: {', '.join(failures)}")
+            sys.exit(1)
+        print("✅ Every mutation is within its round-trip budget")
+    finally:
+        client.drop_database(db_name)
+
+
+if __name__ == '__main__':
+    main()
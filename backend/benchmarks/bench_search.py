@@ -0,0 +1,112 @@
+"""
+Benchmark: /search latency for a user with thousands of notes.
+
+Seeds a throwaway database with synthetic lecture notes (title, notes and a
+transcript per note, split into notes and note_bodies as the app stores
+them) for one heavy user plus background users, creates the same text index
+the app uses, and times search_notes() for a set of
+queries across several pages. The database is dropped afterwards.
+
+Needs a reachable MongoDB (MONGO_URI or --mongo-uri).
+
+Usage:
+    python benchmarks/bench_search.py [--notes 5000] [--other-users 20] [--runs 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson.objectid import ObjectId  # noqa: E402
+from pymongo import MongoClient  # noqa: E402
+
+from note_bodies import NoteBodyStore  # noqa: E402
+from note_search import search_notes  # noqa: E402
+
+VOCABULARY = ('mitochondria photosynthesis ribosome enzyme membrane neuron replication glycolysis antibody '
+              'insulin meiosis evolution derivative integral matrix eigenvalue entropy momentum voltage '
+              'capacitor algorithm recursion pointer inflation elasticity tariff sonnet metaphor renaissance '
+              'feudalism democracy protocol latency bandwidth catalyst isotope polymer osmosis').split()
+FILLER = 'the lecturer explains this with an example and connects it to the previous topic'.split()
+QUERIES = ['mitochondria', 'eigenvalue matrix', 'insulin feedback', 'recursion algorithm pointer',
+           '"oxidative phosphorylation"', 'renaissance sonnet', 'bandwidth latency protocol']
+
+
+def fake_text(rng: random.Random, words: int) -> str:
+    return ' '.join(rng.choice(VOCABULARY) if rng.random() < 0.15 else rng.choice(FILLER) for _ in range(words))
+
+
+def seed(db, user_id: str, count: int, rng: random.Random):
+    notes, bodies = [], []
+    for i in range(count):
+        content = fake_text(rng, 600)
+        note_id = ObjectId()
+        title = f"Lecture {i}: {rng.choice(VOCABULARY).title()} and {rng.choice(VOCABULARY).title()}"
+        notes.append({
+            '_id': note_id,
+            'user_id': user_id,
+            'title': title,
+            'preview': content[:150] + '...',
+            'created_at': time.time() - i * 3600,
+            'updated_at': time.time() - i * 3600
+        })
+        bodies.append({'_id': note_id, 'user_id': user_id, 'title': title, 'content': content,
+                       'transcript': fake_text(rng, 6000)})
+        if len(notes) == 500:
+            db.notes.insert_many(notes)
+            db.note_bodies.insert_many(bodies)
+            notes, bodies = [], []
+    if notes:
+        db.notes.insert_many(notes)
+        db.note_bodies.insert_many(bodies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default=os.getenv('MONGO_URI', 'mongodb://localhost:27017'))
+    parser.add_argument('--notes', type=int, default=5000, help='notes for the user being searched')
+    parser.add_argument('--other-users', type=int, default=20)
+    parser.add_argument('--notes-per-other-user', type=int, default=200)
+    parser.add_argument('--runs', type=int, default=20, help='timed runs per query and page')
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongo_uri, serverSelectionTimeoutMS=5000)
+    db_name = f"noteflow_bench_search_{os.getpid()}"
+    db = client[db_name]
+    rng = random.Random(7)
+    try:
+        start = time.perf_counter()
+        seed(db, 'bench-user', args.notes, rng)
+        for u in range(args.other_users):
+            seed(db, f"other-{u}", args.notes_per_other_user, rng)
+        NoteBodyStore(db.note_bodies).ensure_indexes()
+        print(f"Seeded {db.notes.estimated_document_count():,} notes "
+              f"({args.notes:,} for the searched user) in {time.perf_counter() - start:.1f}s\n")
+
+        print(f"{'query':<30} {'page':>4} {'hits':>4} {'p50 ms':>7} {'p95 ms':>7}")
+        all_ms = []
+        for query in QUERIES:
+            for page in (1, 2, 5):
+                timings = []
+                for _ in range(args.runs):
+                    t0 = time.perf_counter()
+                    results, _, _ = search_notes(db.note_bodies, db.notes, 'bench-user', query, page=page)
+                    timings.append((time.perf_counter() - t0) * 1000)
+                timings.sort()
+                all_ms.extend(timings)
+                p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+                print(f"{query[:30]:<30} {page:>4} {len(results):>4} {statistics.median(timings):>7.1f} {p95:>7.1f}")
+
+        all_ms.sort()
+        print(f"\nOverall p50 {statistics.median(all_ms):.1f} ms, "
+              f"p95 {all_ms[int(len(all_ms) * 0.95) - 1]:.1f} ms (target < 50 ms)")
+    finally:
+        client.drop_database(db_name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: legacy per-chunk ffmpeg re-decode vs single-pass PCM streaming.
+
+Generates synthetic lectures of increasing length and times how long it takes
+to turn each one into 60s chunks. The legacy path (`-i input -ss start -t 60`
+per chunk) decodes from the start of the file every time, so it grows
+quadratically; the streaming segmenter should grow linearly.
+
+Usage:
+    python benchmarks/bench_segmenter.py [minutes ...]
+"""
+import os
+import sys
+import subprocess
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_stream import stream_pcm_chunks  # noqa: E402
+
+CHUNK_SEC = 60
+
+
+def make_fixture(minutes: int) -> str:
+    """Encode a speech-band tone sweep to Opus/WebM like MediaRecorder uploads"""
+    path = os.path.join(tempfile.gettempdir(), f"bench_lecture_{minutes}m.webm")
+    if os.path.exists(path):
+        return path
+    cmd = [
+        'ffmpeg', '-y', '-v', 'error',
+        '-f', 'lavfi', '-i', f"sine=frequency=220:sample_rate=48000:duration={minutes * 60}",
+        '-c:a', 'libopus', '-b:a', '32k',
+        path
+    ]
+    subprocess.run(cmd, check=True)
+    return path
+
+
+def legacy_chunking(path: str, minutes: int) -> int:
+    """The old chunk_audio_file loop, minus Whisper"""
+    num_chunks = minutes * 60 // CHUNK_SEC
+    for i in range(num_chunks):
+        chunk_path = os.path.join(tempfile.gettempdir(), f"bench_chunk_{i}.wav")
+        cmd = [
+            'ffmpeg', '-y', '-v', 'error', '-i', path,
+            '-ss', str(i * CHUNK_SEC),
+            '-t', str(CHUNK_SEC),
+            '-acodec', 'pcm_s16le', '-ac', '1', '-ar', '16000',
+            chunk_path
+        ]
+        subprocess.run(cmd, check=True)
+        os.unlink(chunk_path)
+    return num_chunks
+
+
+def streamed_chunking(path: str) -> int:
+    return sum(1 for _ in stream_pcm_chunks(path, CHUNK_SEC))
+
+
+def main():
+    lengths = [int(m) for m in sys.argv[1:]] or [5, 10, 20, 40]
+
+    print(f"{'minutes':>8} {'legacy (s)':>11} {'stream (s)':>11} {'stream s/min':>13} {'speedup':>8}")
+    for minutes in lengths:
+        path = make_fixture(minutes)
+
+        t0 = time.perf_counter()
+        legacy_chunks = legacy_chunking(path, minutes)
+        legacy = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        stream_chunks = streamed_chunking(path)
+        streamed = time.perf_counter() - t0
+
+        assert stream_chunks == legacy_chunks, (stream_chunks, legacy_chunks)
+        print(f"{minutes:>8} {legacy:>11.2f} {streamed:>11.2f} {streamed / minutes:>13.3f} {legacy / streamed:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark: time to first byte, buffered vs server-sent-event streaming.
+
+A local fake streaming model stands in for Gemini: it waits FIRST_TOKEN_SEC
+before the first chunk, then emits a chunk every TOKEN_INTERVAL_SEC. The
+same GeminiClient the app uses wraps it, and a minimal Flask app serves
+both a buffered JSON route (like /generate-notes) and an SSE route (like
+/generate-notes/stream) built with relay_tokens. The script checks the
+streamed text matches and that the completion callback (where the app
+saves the note) ran once with the full text.
+
+Usage:
+    python benchmarks/bench_sse_ttfb.py [--first-token 0.8] [--interval 0.05] [--chunks 200]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, Response, jsonify, stream_with_context  # noqa: E402
+
+from llm_client import GeminiClient  # noqa: E402
+from sse import SSE_HEADERS, relay_tokens  # noqa: E402
+
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeStreamingModel:
+    """GenerativeModel stand-in with first-token latency and a steady token rate"""
+
+    def __init__(self, first_token_sec: float, interval_sec: float, chunks: int):
+        self.first_token_sec = first_token_sec
+        self.interval_sec = interval_sec
+        self.chunks = chunks
+
+    def _chunks(self):
+        time.sleep(self.first_token_sec)
+        for i in range(self.chunks):
+            if i:
+                time.sleep(self.interval_sec)
+            yield FakeChunk(f"word{i} ")
+
+    def generate_content(self, prompt, stream=False, request_options=None):
+        if stream:
+            return self._chunks()
+        return FakeChunk(''.join(c.text for c in self._chunks()))
+
+
+def make_app(client: GeminiClient, saved: list) -> Flask:
+    app = Flask(__name__)
+
+    def on_complete(text):
+        saved.append(text)
+        return {'notes': text, 'success': True}
+
+    @app.route('/buffered', methods=['POST'])
+    def buffered():
+        text = client.generate('prompt', use_cache=False)
+        return jsonify(on_complete(text))
+
+    @app.route('/stream', methods=['POST'])
+    def stream():
+        chunks = client.stream('prompt', use_cache=False)
+        return Response(stream_with_context(relay_tokens(chunks, on_complete)),
+                        mimetype='text/event-stream', headers=SSE_HEADERS)
+
+    return app
+
+
+def timed(client_app, path: str):
+    t0 = time.perf_counter()
+    resp = client_app.post(path, buffered=False)
+    first = None
+    body = b''
+    for piece in resp.response:
+        if first is None:
+            first = time.perf_counter() - t0
+        body += piece
+    return first, time.perf_counter() - t0, body
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--first-token', type=float, default=0.8)
+    parser.add_argument('--interval', type=float, default=0.05)
+    parser.add_argument('--chunks', type=int, default=200)
+    args = parser.parse_args()
+
+    client = GeminiClient('fake')
+    client._model = FakeStreamingModel(args.first_token, args.interval, args.chunks)
+    saved = []
+    test_client = make_app(client, saved).test_client()
+
+    b_first, b_total, b_body = timed(test_client, '/buffered')
+    s_first, s_total, s_body = timed(test_client, '/stream')
+
+    events = [frame for frame in s_body.decode().split('\n\n') if frame]
+    done = json.loads(events[-1].split('data: ', 1)[1])
+    assert events[-1].startswith('event: done'), 'stream did not finish with a done event'
+    assert done['notes'] == json.loads(b_body)['notes'], 'streamed text differs from buffered text'
+    assert len(saved) == 2 and saved[0] == saved[1], 'completion callback did not run once per request'
+
+    expected_total = args.first_token + args.interval * (args.chunks - 1)
+    print(f"fake model: first token {args.first_token}s, {args.chunks} chunks, ~{expected_total:.1f}s total")
+    print(f"{'':<10} {'TTFB':>8} {'total':>8}")
+    print(f"{'buffered':<10} {b_first:>7.2f}s {b_total:>7.2f}s")
+    print(f"{'SSE':<10} {s_first:>7.2f}s {s_total:>7.2f}s   ({len(events) - 1} token events)")
+
+
+if __name__ == '__main__':
+    main()
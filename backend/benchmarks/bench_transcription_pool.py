@@ -0,0 +1,75 @@
+"""
+Benchmark: sequential chunk loop vs TranscriptionExecutor process pool.
+
+Transcribes the same multi-minute recording once in-process and once on a
+pool of worker processes, checks the merged text comes back in chunk order,
+and reports wall-clock speedup.
+
+Usage:
+    python benchmarks/bench_transcription_pool.py [audio_file] [--pool N] [--minutes M]
+
+Without an audio file a synthetic fixture is generated; VAD is disabled so
+Whisper does real work on every chunk either way.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from faster_whisper import WhisperModel  # noqa: E402
+
+from audio_stream import stream_pcm_chunks  # noqa: E402
+from bench_segmenter import make_fixture  # noqa: E402
+from transcription_executor import TranscriptionExecutor, join_segments  # noqa: E402
+
+OPTIONS = dict(
+    language='en',
+    task='translate',
+    beam_size=5,
+    vad_filter=False,
+    temperature=0.0,
+    condition_on_previous_text=False,
+)
+
+
+def run(executor: TranscriptionExecutor, path: str):
+    t0 = time.perf_counter()
+    texts = [join_segments(segments) for segments, _ in executor.map_chunks(stream_pcm_chunks(path, 60), OPTIONS)]
+    return time.perf_counter() - t0, texts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('audio', nargs='?')
+    parser.add_argument('--pool', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--minutes', type=int, default=5)
+    parser.add_argument('--model', default=os.getenv('WHISPER_MODEL', 'tiny'))
+    args = parser.parse_args()
+
+    path = args.audio or make_fixture(args.minutes)
+
+    model = WhisperModel(args.model, device='cpu', compute_type='int8', download_root='./whisper_models')
+    sequential = TranscriptionExecutor(model)
+    seq_time, seq_texts = run(sequential, path)
+    del model
+
+    pool = TranscriptionExecutor(model_name=args.model, pool_size=args.pool)
+    # Warm the pool so model loading isn't billed to the parallel run
+    list(pool.map_chunks([next(stream_pcm_chunks(path, 5))] * args.pool, OPTIONS))
+    pool_time, pool_texts = run(pool, path)
+    pool.shutdown()
+
+    assert len(pool_texts) == len(seq_texts)
+    matching = sum(a == b for a, b in zip(seq_texts, pool_texts))
+
+    print(f"chunks:        {len(seq_texts)}")
+    print(f"sequential:    {seq_time:.2f}s")
+    print(f"pool ({args.pool:>2}):     {pool_time:.2f}s")
+    print(f"speedup:       {seq_time / pool_time:.2f}x")
+    print(f"chunk texts identical to sequential: {matching}/{len(seq_texts)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: worker boot time under gunicorn.
+
+Starts gunicorn with gunicorn_config.py, then polls /health/live and
+/health/ready until both answer 200, and sends one real request. Prints the
+wall-clock time to each, plus the per-worker milestones (seconds since
+fork: app_loaded, ready, first_request) the workers report themselves.
+
+Usage:
+    python benchmarks/bench_worker_boot.py [--port P] [--timeout S]
+
+Needs the same environment as the server (.env, MongoDB, model cache). Run
+with WARMUP_ON_BOOT=0 to compare against loading the model on first use.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def get(url: str):
+    try:
+        with urllib.request.urlopen(url, timeout=2) as resp:
+            return resp.status, resp.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+    except OSError:
+        return None, b''
+
+
+def wait_for(url: str, t0: float, timeout: float):
+    while time.perf_counter() - t0 < timeout:
+        status, body = get(url)
+        if status == 200:
+            return time.perf_counter() - t0, body
+        time.sleep(0.05)
+    return None, b''
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--timeout', type=float, default=300)
+    args = parser.parse_args()
+
+    base = f"http://127.0.0.1:{args.port}"
+    env = dict(os.environ, PORT=str(args.port))
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn_config.py', 'app:app'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        live, _ = wait_for(f"{base}/health/live", t0, args.timeout)
+        ready, body = wait_for(f"{base}/health/ready", t0, args.timeout)
+        first = None
+        if ready is not None:
+            get(f"{base}/auth/status")
+            first = time.perf_counter() - t0
+            # Let the worker that served it report its own fork → first request time
+            _, body = get(f"{base}/health/ready")
+
+        print(f"launch → live:          {live:.2f}s" if live else "launch → live:          timed out")
+        print(f"launch → ready:         {ready:.2f}s" if ready else "launch → ready:         timed out")
+        print(f"launch → first request: {first:.2f}s" if first else "launch → first request: n/a")
+        if body:
+            report = json.loads(body)
+            print(f"worker {report['pid']} since fork: {report['since_fork']}")
+            for name, step in report['steps'].items():
+                print(f"  {name:<8} {step['state']:<8} {step['seconds']}s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Server-side chat sessions for note chat.
+
+Prompts use a running summary of the older turns plus the turns not yet
+folded into it, so prompt size stays bounded however long the session
+runs, and clients only send the new question. Older turns are folded into
+the summary on a background thread once enough of them pile up, and are
+then dropped from the session document, so the document (loaded on every
+chat request) stays small too. The write is conditional on the summary not
+having moved in the meantime, so concurrent compactions can't clobber
+each other. A failed compaction leaves the turns pending in the document;
+the next turn retries it, and the prompt keeps only the latest of them.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+
+
+class ChatSessionStore:
+    """
+    `summarize(summary, turns) -> str` folds `turns` ({question, answer}) into
+    the existing `summary` (Gemini in the app).
+    """
+
+    def __init__(self, collection, summarize: Callable[[str, List[dict]], str],
+                 recent_turns: int = 3, compact_every: int = 3, max_workers: int = 2):
+        self.collection = collection
+        self.summarize = summarize
+        self.recent_turns = recent_turns
+        self.compact_every = compact_every
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='chat-summary')
+        self._compacting = set()
+        self._lock = threading.Lock()
+
+    def ensure_indexes(self):
+        self.collection.create_index([('note_id', 1), ('user_id', 1), ('updated_at', -1)])
+
+    @staticmethod
+    def _new(note_id: str, user_id: str) -> dict:
+        return {
+            'note_id': note_id,
+            'user_id': user_id,
+            'turns': [],
+            'summary': '',
+            'summarized_turns': 0,
+            'dropped_turns': 0,
+            'created_at': time.time(),
+            'updated_at': time.time()
+        }
+
+    def create(self, note_id: str, user_id: str) -> dict:
+        session = self._new(note_id, user_id)
+        session['_id'] = self.collection.insert_one(session).inserted_id
+        return session
+
+    def latest(self, note_id: str, user_id: str) -> dict:
+        """
+        The most recently used session for (note, user), created if there is
+        none (one round trip). There is deliberately no unique index on
+        (note_id, user_id), since a note keeps several sessions, so two
+        concurrent first requests can each create one. The race is accepted:
+        the extra session is an ordinary session in the list, and later
+        requests continue whichever was used last.
+        """
+        return self.collection.find_one_and_update(
+            {'note_id': note_id, 'user_id': user_id},
+            {'$setOnInsert': self._new(note_id, user_id)},
+            sort=[('updated_at', -1)],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+    def get(self, session_id: str, note_id: str, user_id: str) -> Optional[dict]:
+        if not ObjectId.is_valid(session_id):
+            return None
+        return self.collection.find_one({'_id': ObjectId(session_id), 'note_id': note_id, 'user_id': user_id})
+
+    @staticmethod
+    def _pending(session: dict) -> List[dict]:
+        """Turns not yet folded into the summary (sessions written before
+        compaction dropped turns still hold their folded ones)"""
+        return session['turns'][session['summarized_turns'] - session.get('dropped_turns', 0):]
+
+    def context(self, session: dict) -> Tuple[str, List[dict]]:
+        """
+        Summary of the folded turns, and the latest turns not yet folded into
+        it. Turns past the cap stay in the document for the next compaction
+        but are left out of the prompt, so it stays bounded while compaction
+        keeps failing.
+        """
+        pending = self._pending(session)
+        limit = self.recent_turns + self.compact_every
+        if len(pending) > limit:
+            print(f"⚠️ Chat session {session['_id']}: {len(pending)} turns awaiting summary, "
+                  f"prompt keeps the last {limit}")
+        return session['summary'], pending[-limit:]
+
+    def append(self, session: dict, question: str, answer: str):
+        """Record a turn and compact in the background when enough older turns have piled up"""
+        self.collection.update_one(
+            {'_id': session['_id']},
+            {'$push': {'turns': {'question': question, 'answer': answer, 'at': time.time()}},
+             '$set': {'updated_at': time.time()}}
+        )
+        older = len(self._pending(session)) + 1 - self.recent_turns
+        if older >= self.compact_every:
+            self._schedule(session['_id'])
+
+    def _schedule(self, session_id):
+        with self._lock:
+            if session_id in self._compacting:
+                return
+            self._compacting.add(session_id)
+        self._executor.submit(self._compact, session_id)
+
+    def _compact(self, session_id):
+        try:
+            session = self.collection.find_one(
+                {'_id': session_id}, {'turns': 1, 'summary': 1, 'summarized_turns': 1, 'dropped_turns': 1})
+            done = session['summarized_turns']
+            pending = self._pending(session)
+            fold = pending[:len(pending) - self.recent_turns]
+            if len(fold) < self.compact_every:
+                return
+            summary = self.summarize(session['summary'], fold)
+            # Drop every folded turn from the document; turns appended since the
+            # read sit past them and are kept
+            folded = done + len(fold)
+            keep_from = folded - session.get('dropped_turns', 0)
+            result = self.collection.update_one(
+                {'_id': session_id, 'summarized_turns': done},
+                [{'$set': {
+                    'summary': summary,
+                    'summarized_turns': folded,
+                    'dropped_turns': folded,
+                    'turns': {'$slice': ['$turns', keep_from, 2 ** 31 - 1]}
+                }}]
+            )
+            if result.modified_count:
+                print(f"🗜️ Chat session {session_id}: folded {len(fold)} turns into summary ({len(summary)} chars)")
+        except Exception as e:
+            print(f"⚠️ Chat summary failed for session {session_id}, keeping its turns pending: {e}")
+        finally:
+            with self._lock:
+                self._compacting.discard(session_id)
+
+    @staticmethod
+    def public(session: dict) -> dict:
+        return {
+            'session_id': str(session['_id']),
+            'note_id': session['note_id'],
+            'turns': session['turns'],
+            'summary': session['summary'],
+            'summarized_turns': session['summarized_turns'],
+            'turn_count': session.get('dropped_turns', 0) + len(session['turns']),
+            'created_at': session['created_at'],
+            'updated_at': session['updated_at']
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,185 @@
+"""
+Host-wide Gemini rate limiting with priority classes.
+
+One token bucket per API key, kept in a small JSON file under the temp
+directory and updated under an exclusive file lock, so every gunicorn
+worker on the host draws from the same budget. Priorities are enforced
+with reserves: interactive chat may take the last token, note generation
+leaves a few for chat, and background cleaning leaves half the burst.
+A caller that would have to wait longer than its class allows gets
+RateLimited with a Retry-After estimate right away instead of hanging.
+When Gemini itself answers 429, `penalize` pauses the whole host so the
+workers back off together instead of retrying into the storm.
+"""
+import fcntl
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+PRIORITY_INTERACTIVE = 'interactive'  # note chat
+PRIORITY_NOTES = 'notes'              # note generation
+PRIORITY_BACKGROUND = 'background'    # transcript cleaning, chat summaries
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_NOTES, PRIORITY_BACKGROUND)
+
+POLL_SEC = 0.25
+
+
+class RateLimited(Exception):
+    """The Gemini budget is exhausted for longer than this priority class may wait"""
+
+    def __init__(self, retry_after: float, priority: str):
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.priority = priority
+        super().__init__(f"Gemini rate limit reached for {priority} requests, retry after {self.retry_after}s")
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class GeminiGovernor:
+    """
+    `rate_per_min` tokens are added per minute up to `burst`. `reserve` is how
+    many tokens a class must leave in the bucket; `max_wait` is the longest a
+    class queues before RateLimited.
+    """
+
+    def __init__(self, api_key: str, rate_per_min: float = 60, burst: int = 10,
+                 reserve: Optional[Dict[str, float]] = None, max_wait: Optional[Dict[str, float]] = None,
+                 state_dir: Optional[str] = None):
+        self.rate = rate_per_min / 60.0
+        self.burst = burst
+        self.reserve = reserve or {
+            PRIORITY_INTERACTIVE: 0,
+            PRIORITY_NOTES: burst * 0.2,
+            PRIORITY_BACKGROUND: burst * 0.5
+        }
+        self.max_wait = max_wait or {PRIORITY_INTERACTIVE: 2, PRIORITY_NOTES: 15, PRIORITY_BACKGROUND: 60}
+
+        state_dir = state_dir or os.path.join(tempfile.gettempdir(), 'noteflow_gemini')
+        os.makedirs(state_dir, exist_ok=True)
+        key_id = hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:12]
+        self.path = os.path.join(state_dir, f"{key_id}.json")
+        self._lock_path = self.path + '.lock'
+
+        # Per-process counters; queue depth is host-wide and lives in the state file
+        self._stats_lock = threading.Lock()
+        self.granted = {p: 0 for p in PRIORITIES}
+        self.rejected = {p: 0 for p in PRIORITIES}
+        self.wait_sec = {p: 0.0 for p in PRIORITIES}
+
+    @contextmanager
+    def _state(self):
+        """Read-modify-write the shared bucket under the host-wide lock"""
+        with open(self._lock_path, 'a+') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.path) as f:
+                        state = json.load(f)
+                except (OSError, ValueError):
+                    state = {'tokens': self.burst, 'updated_at': time.time(), 'blocked_until': 0, 'waiting': {}}
+
+                now = time.time()
+                state['tokens'] = min(self.burst, state['tokens'] + max(0.0, now - state['updated_at']) * self.rate)
+                state['updated_at'] = now
+                state['waiting'] = {k: n for k, n in state['waiting'].items()
+                                    if n > 0 and _pid_alive(int(k.split(':')[0]))}
+                yield state
+
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, self.path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _wait_needed(self, state: dict, priority: str) -> float:
+        """Seconds until this class could take a token (0 = now)"""
+        blocked = state['blocked_until'] - state['updated_at']
+        if blocked > 0:
+            return blocked
+        need = 1 + self.reserve[priority]
+        if need > self.burst:
+            need = self.burst  # a reserve larger than the bucket would never be met
+        return max(0.0, (need - state['tokens']) / self.rate)
+
+    def acquire(self, priority: str, timeout: Optional[float] = None):
+        """Take one token, queueing up to this class's max wait (or `timeout` if sooner)"""
+        max_wait = self.max_wait[priority] if timeout is None else min(self.max_wait[priority], timeout)
+        start = time.monotonic()
+        waiter = f"{os.getpid()}:{priority}"
+        queued = False
+        try:
+            while True:
+                with self._state() as state:
+                    wait = self._wait_needed(state, priority)
+                    if wait == 0:
+                        state['tokens'] -= 1
+                        break
+                    if time.monotonic() - start + wait > max_wait:
+                        with self._stats_lock:
+                            self.rejected[priority] += 1
+                        raise RateLimited(wait, priority)
+                    if not queued:
+                        state['waiting'][waiter] = state['waiting'].get(waiter, 0) + 1
+                        queued = True
+                time.sleep(min(wait, POLL_SEC))
+        finally:
+            if queued:
+                with self._state() as state:
+                    state['waiting'][waiter] = state['waiting'].get(waiter, 1) - 1
+
+        with self._stats_lock:
+            self.granted[priority] += 1
+            self.wait_sec[priority] += time.monotonic() - start
+
+    def check(self, priority: str, max_wait: Optional[float] = None):
+        """Raise RateLimited now if a call of this class could not start within its max wait (or `max_wait`)"""
+        with self._state() as state:
+            wait = self._wait_needed(state, priority)
+        if wait > (self.max_wait[priority] if max_wait is None else max_wait):
+            with self._stats_lock:
+                self.rejected[priority] += 1
+            raise RateLimited(wait, priority)
+
+    def penalize(self, seconds: float):
+        """Gemini answered 429: empty the bucket and pause every worker on the host"""
+        with self._state() as state:
+            state['tokens'] = 0
+            state['blocked_until'] = max(state['blocked_until'], time.time() + seconds)
+        print(f"🚦 Gemini rate limited upstream, pausing this host's calls for {seconds:.1f}s")
+
+    def stats(self) -> dict:
+        with self._state() as state:
+            tokens = state['tokens']
+            blocked = max(0.0, state['blocked_until'] - state['updated_at'])
+            queued = {p: 0 for p in PRIORITIES}
+            for waiter, n in state['waiting'].items():
+                queued[waiter.split(':', 1)[1]] += n
+        with self._stats_lock:
+            per_class = {p: {
+                'queued': queued[p],
+                'granted': self.granted[p],
+                'rejected': self.rejected[p],
+                'avg_wait_ms': round(self.wait_sec[p] / self.granted[p] * 1000, 1) if self.granted[p] else 0.0
+            } for p in PRIORITIES}
+        return {
+            'tokens': round(tokens, 2),
+            'burst': self.burst,
+            'rate_per_min': round(self.rate * 60, 2),
+            'blocked_for_sec': round(blocked, 2),
+            'classes': per_class
+        }
@@ -1,4 +1,9 @@
 import os
+import secrets
+import sys
+import subprocess
+import threading
+import time
 import multiprocessing
 
 bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
@@ -12,3 +17,66 @@ preload_app = False  # ← CHANGE THIS TO FALSE temporarily
 accesslog = '-'
 errorlog = '-'
 loglevel = 'info'
+
+
+# ✅ Opt-in shared Whisper server: one model per host instead of one per worker
+def on_starting(server):
+    socket_path = os.getenv('WHISPER_INFERENCE_SOCKET')
+    if socket_path:
+        # Fresh secret per start unless one is configured; the server and the
+        # workers (forked later) inherit it through the environment
+        if not os.getenv('WHISPER_INFERENCE_AUTHKEY'):
+            os.environ['WHISPER_INFERENCE_AUTHKEY'] = secrets.token_hex(32)
+        server.inference_stopping = threading.Event()
+        server.inference_proc = None
+        threading.Thread(target=supervise_inference_server, args=(server, socket_path),
+                         daemon=True, name='inference-supervisor').start()
+
+
+def supervise_inference_server(server, socket_path):
+    """Run the inference server and start it again whenever it exits"""
+    backoff = 1
+    while not server.inference_stopping.is_set():
+        server.log.info(f"Starting Whisper inference server on {socket_path}")
+        started = time.time()
+        server.inference_proc = subprocess.Popen([
+            sys.executable,
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'inference_server.py'),
+            '--socket', socket_path
+        ])
+        code = server.inference_proc.wait()
+        if server.inference_stopping.is_set():
+            break
+        # Back off if it keeps dying during startup (bad model path, no memory)
+        backoff = 1 if time.time() - started > 60 else min(backoff * 2, 60)
+        server.log.error(f"Whisper inference server exited with {code}, restarting in {backoff}s")
+        server.inference_stopping.wait(backoff)
+
+
+def on_exit(server):
+    stopping = getattr(server, 'inference_stopping', None)
+    if stopping:
+        stopping.set()
+    proc = getattr(server, 'inference_proc', None)
+    if proc and proc.poll() is None:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+# 🔴 Background jobs and live sessions run on threads in the worker that
+# accepted them and die with it, so hold off max_requests recycling while it owns any
+def pre_request(worker, req):
+    from jobs import owned_job_count
+    from live_transcription import owned_session_count
+    if not hasattr(worker, 'recycle_after'):
+        worker.recycle_after = worker.max_requests
+    if owned_session_count() or owned_job_count():
+        worker.max_requests = sys.maxsize
+    elif worker.max_requests != worker.recycle_after:
+        worker.max_requests = worker.recycle_after
+        worker.log.info(f"No jobs or live sessions left, recycling after {worker.recycle_after} requests again")
+
+
+# ⏱️ Stamp the fork so the worker can report fork → ready / first request
+def post_fork(server, worker):
+    os.environ['NOTEFLOW_WORKER_FORKED_AT'] = str(time.time())
@@ -0,0 +1,174 @@
+"""
+Shared Whisper inference server.
+
+One process per host owns the WhisperModel and serves transcription over a
+Unix socket, so weight memory and CPU threads are paid once no matter how
+many gunicorn workers there are. Flask workers use RemoteWhisperModel, a
+drop-in for WhisperModel.transcribe that sends PCM and gets segments back.
+
+Opt in by setting WHISPER_INFERENCE_SOCKET; gunicorn_config.py then starts
+the server from the master process, restarts it if it dies and, unless
+WHISPER_INFERENCE_AUTHKEY is set, generates a fresh authkey for each start
+that the server and the workers inherit. It can also be run by hand (with
+the same WHISPER_INFERENCE_AUTHKEY exported to the app):
+
+    python inference_server.py --socket /tmp/noteflow-whisper.sock
+"""
+import argparse
+import os
+import threading
+import time
+import traceback
+from collections import namedtuple
+from typing import Optional
+from multiprocessing.connection import Client, Listener
+
+RemoteSegment = namedtuple('RemoteSegment', ['start', 'end', 'text'])
+RemoteInfo = namedtuple('RemoteInfo', ['language', 'language_probability', 'duration'])
+
+AUTHKEY_ENV = 'WHISPER_INFERENCE_AUTHKEY'
+
+
+def inference_authkey() -> bytes:
+    """Shared secret from the environment (there is deliberately no default)"""
+    key = os.getenv(AUTHKEY_ENV)
+    if not key:
+        raise RuntimeError(f"{AUTHKEY_ENV} is not set; gunicorn_config.py generates one, or export it")
+    return key.encode('utf-8')
+
+
+class InferenceServer:
+    """Accept connections and run each request on a thread against one shared model"""
+
+    def __init__(self, socket_path: str, model, authkey: Optional[bytes] = None):
+        self.socket_path = socket_path
+        self.model = model
+        self.authkey = authkey or inference_authkey()
+        self.requests_served = 0
+        self._lock = threading.Lock()
+
+    def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        with Listener(self.socket_path, family='AF_UNIX', authkey=self.authkey) as listener:
+            os.chmod(self.socket_path, 0o600)
+            print(f"✅ Whisper inference server listening on {self.socket_path}")
+            while True:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    print(f"⚠️ Rejected inference connection: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            try:
+                while True:
+                    try:
+                        request = conn.recv()
+                    except EOFError:
+                        return
+                    conn.send(self._dispatch(request))
+            except Exception as e:
+                print(f"❌ Inference connection error: {e}")
+
+    def _dispatch(self, request: tuple) -> tuple:
+        op = request[0]
+        if op == 'ping':
+            return ('ok', {'pid': os.getpid(), 'requests_served': self.requests_served})
+        if op == 'transcribe':
+            _, audio, options = request
+            try:
+                segments, info = self.model.transcribe(audio, **options)
+                segments = [(s.start, s.end, s.text) for s in segments]
+                with self._lock:
+                    self.requests_served += 1
+                return ('ok', segments, (info.language, info.language_probability, info.duration))
+            except Exception as e:
+                traceback.print_exc()
+                return ('error', str(e))
+        return ('error', f"Unknown op {op!r}")
+
+
+class RemoteWhisperModel:
+    """
+    Client with the WhisperModel.transcribe interface.
+    Opens a short-lived connection per call, so it is safe to share between threads.
+    If the server goes away (restarted by gunicorn's master) calls wait up to
+    `connect_timeout` for it to come back, and a call cut off mid-request is
+    sent again once.
+    """
+
+    def __init__(self, socket_path: str, authkey: Optional[bytes] = None, connect_timeout: float = 30):
+        self.socket_path = socket_path
+        self.authkey = authkey or inference_authkey()
+        self.connect_timeout = connect_timeout
+
+    def _connect(self):
+        deadline = time.time() + self.connect_timeout
+        while True:
+            try:
+                return Client(self.socket_path, family='AF_UNIX', authkey=self.authkey)
+            except (FileNotFoundError, ConnectionRefusedError, ConnectionResetError, EOFError):
+                # Server may be going down, or still loading the model after a deploy or a restart
+                if time.time() > deadline:
+                    raise RuntimeError(f"Whisper inference server not reachable at {self.socket_path}")
+                time.sleep(0.5)
+
+    def _call(self, request: tuple) -> tuple:
+        for attempt in range(2):
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.send(request)
+                    reply = conn.recv()
+                break
+            except (EOFError, ConnectionResetError, BrokenPipeError):
+                if attempt:
+                    raise RuntimeError("Whisper inference server closed the connection mid-request")
+                print(f"⚠️ Whisper inference server dropped a request, reconnecting to {self.socket_path}")
+        if reply[0] != 'ok':
+            raise RuntimeError(f"Inference server error: {reply[1]}")
+        return reply
+
+    def ping(self) -> dict:
+        return self._call(('ping',))[1]
+
+    def transcribe(self, audio, **options):
+        _, segments, info = self._call(('transcribe', audio, options))
+        return [RemoteSegment(*s) for s in segments], RemoteInfo(*info)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Shared Whisper inference server')
+    parser.add_argument('--socket', default=os.getenv('WHISPER_INFERENCE_SOCKET', '/tmp/noteflow-whisper.sock'))
+    parser.add_argument('--model', default=os.getenv('WHISPER_MODEL', 'tiny'))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WHISPER_INFERENCE_WORKERS', '4')),
+                        help='concurrent transcriptions')
+    parser.add_argument('--threads', type=int, default=0, help='CPU threads (0 = all cores)')
+    parser.add_argument('--batch-size', type=int, default=int(os.getenv('WHISPER_BATCH_SIZE', '1')),
+                        help='>1 batches clips from concurrent requests')
+    parser.add_argument('--batch-wait-ms', type=float, default=float(os.getenv('WHISPER_BATCH_WAIT_MS', '20')))
+    args = parser.parse_args()
+
+    from faster_whisper import WhisperModel
+
+    print(f"Loading Whisper model: {args.model} for the inference server...")
+    model = WhisperModel(
+        args.model,
+        device='cpu',
+        compute_type='int8',
+        download_root='./whisper_models',
+        cpu_threads=args.threads,
+        num_workers=args.workers
+    )
+    if args.batch_size > 1:
+        from whisper_batcher import BatchingWhisperModel
+        model = BatchingWhisperModel(model, args.batch_size, args.batch_wait_ms)
+        print(f"✅ Batching concurrent requests (batch {args.batch_size}, wait {args.batch_wait_ms}ms)")
+    InferenceServer(args.socket, model).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
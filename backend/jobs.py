@@ -0,0 +1,167 @@
+"""
+Background jobs with progress persisted in MongoDB.
+The worker that accepts an upload runs the job on its own thread pool;
+any gunicorn worker can answer a poll because state lives in the database.
+While a job is queued or running, its worker stamps `heartbeat_at` every
+`heartbeat_sec`, so a job waiting behind long transcriptions (or a live
+session between windows) is never mistaken for one whose worker died.
+
+A job dies with its owning worker, so gunicorn_config.py holds off
+max_requests recycling while `owned_job_count()` is non-zero.
+"""
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from bson.objectid import ObjectId
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+# Every JobStore in this process, for owned_job_count()
+_stores = []
+_stores_lock = threading.Lock()
+
+
+def owned_job_count() -> int:
+    """Queued or running jobs owned by this process, across every JobStore"""
+    with _stores_lock:
+        stores = list(_stores)
+    return sum(store.owned_count() for store in stores)
+
+
+class JobStore:
+    """Create, run and report on jobs stored in `collection`"""
+
+    def __init__(self, collection, max_workers: int = 2, stale_after_sec: int = 600, heartbeat_sec: int = 30):
+        self.collection = collection
+        self.stale_after_sec = stale_after_sec
+        self.heartbeat_sec = heartbeat_sec
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._active = set()  # queued or running job IDs owned by this process
+        self._lock = threading.Lock()
+        self._heartbeat = None
+        with _stores_lock:
+            _stores.append(self)
+
+    def owned_count(self) -> int:
+        with self._lock:
+            return len(self._active)
+
+    def _start_heartbeat(self):
+        with self._lock:
+            if self._heartbeat is not None:
+                return
+            self._heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True, name='job-heartbeat')
+        self._heartbeat.start()
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(self.heartbeat_sec)
+            with self._lock:
+                job_ids = list(self._active)
+            if not job_ids:
+                continue
+            try:
+                self.collection.update_many({'_id': {'$in': job_ids}}, {'$set': {'heartbeat_at': time.time()}})
+            except Exception as e:
+                print(f"⚠️ Job heartbeat failed: {e}")
+
+    def submit(self, user_id: str, kind: str, fn: Callable, *args,
+               job_id: Optional[ObjectId] = None) -> str:
+        """
+        Insert a queued job and run `fn(*args, progress=...)` in the background.
+        `progress(stage, chunks_done=None, chunks_total=None, text=None)` records
+        progress; the return value of `fn` becomes the job result. Pass `job_id`
+        when the caller needs the ID before the job starts.
+        """
+        now = time.time()
+        job_id = self.collection.insert_one({
+            '_id': job_id or ObjectId(),
+            'user_id': user_id,
+            'kind': kind,
+            'state': JOB_QUEUED,
+            'stage': None,
+            'chunks_done': 0,
+            'chunks_total': None,
+            'chunk_texts': [],
+            'result': None,
+            'error': None,
+            'created_at': now,
+            'updated_at': now,
+            'heartbeat_at': now
+        }).inserted_id
+
+        with self._lock:
+            self._active.add(job_id)
+        self._start_heartbeat()
+        self._executor.submit(self._run, job_id, fn, args)
+        return str(job_id)
+
+    def _run(self, job_id: ObjectId, fn: Callable, args: tuple):
+        try:
+            self._execute(job_id, fn, args)
+        finally:
+            with self._lock:
+                self._active.discard(job_id)
+
+    def _execute(self, job_id: ObjectId, fn: Callable, args: tuple):
+        self._set(job_id, {'state': JOB_RUNNING, 'started_at': time.time()})
+
+        def progress(stage: str, chunks_done: Optional[int] = None,
+                     chunks_total: Optional[int] = None, text: Optional[str] = None):
+            update = {'$set': {'stage': stage, 'updated_at': time.time()}}
+            if chunks_done is not None:
+                update['$set']['chunks_done'] = chunks_done
+            if chunks_total is not None:
+                update['$set']['chunks_total'] = chunks_total
+            if text is not None:
+                update['$push'] = {'chunk_texts': text}
+            self.collection.update_one({'_id': job_id}, update)
+
+        try:
+            result = fn(*args, progress=progress)
+            self._set(job_id, {'state': JOB_COMPLETED, 'stage': 'done', 'result': result})
+            print(f"✅ Job {job_id} completed")
+        except Exception as e:
+            print(f"❌ Job {job_id} failed: {e}")
+            traceback.print_exc()
+            self._set(job_id, {'state': JOB_FAILED, 'error': str(e)})
+
+    def _set(self, job_id: ObjectId, fields: dict):
+        fields['updated_at'] = time.time()
+        self.collection.update_one({'_id': job_id}, {'$set': fields})
+
+    def get(self, job_id: str, user_id: str) -> Optional[dict]:
+        """Return the public view of a job owned by `user_id`, or None"""
+        if not ObjectId.is_valid(job_id):
+            return None
+        job = self.collection.find_one({'_id': ObjectId(job_id), 'user_id': user_id})
+        if not job:
+            return None
+
+        state = job['state']
+        error = job.get('error')
+        # A worker that died stops heartbeating its queued and running jobs; don't poll forever
+        last_seen = max(job['updated_at'], job.get('heartbeat_at') or 0)
+        if state in (JOB_QUEUED, JOB_RUNNING) and time.time() - last_seen > self.stale_after_sec:
+            state = JOB_FAILED
+            error = 'Job stopped reporting progress'
+
+        return {
+            'job_id': str(job['_id']),
+            'kind': job.get('kind'),
+            'state': state,
+            'stage': job.get('stage'),
+            'chunks_done': job.get('chunks_done', 0),
+            'chunks_total': job.get('chunks_total'),
+            'partial_transcript': ' '.join(t for t in job.get('chunk_texts', []) if t),
+            'result': job.get('result'),
+            'error': error,
+            'created_at': job.get('created_at'),
+            'updated_at': job.get('updated_at')
+        }
@@ -0,0 +1,171 @@
+"""
+Live transcription of MediaRecorder timeslices.
+
+The browser posts each one-second blob as a numbered segment file in a
+session directory on local disk, so any gunicorn worker on the host can
+accept it. The worker that started the session owns a single ffmpeg process
+fed from those files in order; decoded PCM is transcribed window by window
+while recording is still in progress. Multi-host deployments need sticky
+routing for /live/* so all segments land on the same host.
+
+A session dies with its owning worker, so the worker must not be recycled
+while it owns one: gunicorn_config.py holds off max_requests while
+`owned_session_count()` is non-zero.
+"""
+import os
+import shutil
+import subprocess
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+
+from audio_stream import open_pcm_stream, read_pcm_chunks
+
+LIVE_WINDOW_SEC = 30  # max chunk handed to Whisper
+LIVE_BLOCK_SEC = 5    # PCM read size; the VAD pre-pass assembles blocks into windows
+LIVE_IDLE_TIMEOUT_SEC = 120
+FINISH_MARKER = 'FINISHED'
+
+_owned_sessions = set()  # session dirs whose job runs in this process
+_owned_lock = threading.Lock()
+
+
+def claim_session(session_dir: str):
+    """Mark a session as owned by this process from /live/start until its job ends"""
+    with _owned_lock:
+        _owned_sessions.add(session_dir)
+
+
+def release_session(session_dir: str):
+    with _owned_lock:
+        _owned_sessions.discard(session_dir)
+
+
+def owned_session_count() -> int:
+    with _owned_lock:
+        return len(_owned_sessions)
+
+
+def segment_path(session_dir: str, seq: int) -> str:
+    return os.path.join(session_dir, f"seg_{seq:06d}")
+
+
+def save_segment(session_dir: str, seq: int, data: bytes):
+    """Write one timeslice atomically so the feeder never sees a partial file"""
+    final_path = segment_path(session_dir, seq)
+    tmp_path = f"{final_path}.part"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, final_path)
+
+
+def mark_finished(session_dir: str, total_segments: int):
+    with open(os.path.join(session_dir, FINISH_MARKER), 'w') as f:
+        f.write(str(total_segments))
+
+
+def _read_finish_marker(session_dir: str) -> Optional[int]:
+    try:
+        with open(os.path.join(session_dir, FINISH_MARKER)) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+class LiveSessionFeeder(threading.Thread):
+    """
+    Tail segment files in sequence order into ffmpeg's stdin and into the
+    assembled recording. Closes stdin once the client marks the session
+    finished (or goes quiet for LIVE_IDLE_TIMEOUT_SEC).
+    """
+
+    def __init__(self, session_dir: str, proc: subprocess.Popen, recording_path: str,
+                 poll_interval: float = 0.2, idle_timeout: float = LIVE_IDLE_TIMEOUT_SEC):
+        super().__init__(daemon=True, name='live-feeder')
+        self.session_dir = session_dir
+        self.proc = proc
+        self.recording_path = recording_path
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.segments_fed = 0
+        self.timed_out = False
+
+    def run(self):
+        last_data = time.time()
+        with open(self.recording_path, 'wb') as recording:
+            try:
+                while True:
+                    path = segment_path(self.session_dir, self.segments_fed)
+                    if os.path.exists(path):
+                        with open(path, 'rb') as f:
+                            data = f.read()
+                        recording.write(data)
+                        self.proc.stdin.write(data)
+                        self.proc.stdin.flush()
+                        os.unlink(path)
+                        self.segments_fed += 1
+                        last_data = time.time()
+                        continue
+
+                    total = _read_finish_marker(self.session_dir)
+                    if total is not None and self.segments_fed >= total:
+                        break
+                    if time.time() - last_data > self.idle_timeout:
+                        print(f"⚠️ Live session {self.session_dir} idle, finishing early")
+                        self.timed_out = True
+                        break
+                    time.sleep(self.poll_interval)
+            except (BrokenPipeError, ValueError):
+                # ffmpeg exited (decode error); the reader reports it
+                pass
+            finally:
+                try:
+                    self.proc.stdin.close()
+                except (BrokenPipeError, OSError):
+                    pass
+
+
+def stream_live_blocks(session_dir: str, recording_path: str,
+                       block_sec: float = LIVE_BLOCK_SEC) -> Iterator[np.ndarray]:
+    """Yield PCM blocks for a live session as soon as each one is decoded"""
+    proc = open_pcm_stream('pipe:0', stdin=subprocess.PIPE)
+    feeder = LiveSessionFeeder(session_dir, proc, recording_path)
+    feeder.start()
+    try:
+        yield from read_pcm_chunks(proc, block_sec)
+    finally:
+        feeder.join(timeout=5)
+
+
+def run_live_transcription(session_dir: str, transcribe_windows: Callable, finalize: Callable,
+                           progress=None) -> dict:
+    """
+    Job body for a live session: transcribe windows while the recording grows,
+    then hand the joined text and assembled recording to `finalize`.
+    `transcribe_windows(blocks)` turns PCM blocks into (text, language) per window.
+    """
+    recording_path = os.path.join(session_dir, 'recording.webm')
+    claim_session(session_dir)
+    try:
+        start_time = time.time()
+        texts = []
+        language = 'en'
+        for idx, (text, window_language) in enumerate(
+            transcribe_windows(stream_live_blocks(session_dir, recording_path))
+        ):
+            if text:
+                texts.append(text)
+            language = window_language
+            print(f"🎙️ Live window {idx+1} transcribed ({len(text)} chars)")
+            if progress:
+                progress('transcribing', idx + 1, None, text)
+
+        if not texts:
+            raise RuntimeError('No audio received')
+
+        return finalize(' '.join(texts), language, recording_path, start_time, progress)
+    finally:
+        release_session(session_dir)
+        shutil.rmtree(session_dir, ignore_errors=True)
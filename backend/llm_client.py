@@ -0,0 +1,210 @@
+"""
+Shared Gemini client.
+
+One model handle per process instead of one per call, a real deadline on
+every call (including retries), jittered exponential backoff on errors
+worth retrying (rate limits, 5xx, timeouts, dropped connections), and a
+bounded LRU cache keyed by a hash of (model, prompt) so a repeated prompt
+costs nothing. With a GeminiGovernor every attempt first takes a token in
+its priority class, and rate limits that outlast the retries surface as
+RateLimited.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterator, Optional
+
+import google.generativeai as genai
+from google.api_core import exceptions as api_exceptions
+
+from gemini_governor import PRIORITY_NOTES, GeminiGovernor, RateLimited
+
+RETRYABLE_ERRORS = (
+    api_exceptions.TooManyRequests,
+    api_exceptions.ResourceExhausted,
+    api_exceptions.InternalServerError,
+    api_exceptions.BadGateway,
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.GatewayTimeout,
+    api_exceptions.DeadlineExceeded,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+RATE_LIMIT_ERRORS = (api_exceptions.TooManyRequests, api_exceptions.ResourceExhausted)
+
+
+class LLMTimeoutError(TimeoutError):
+    """The call (with its retries) did not finish before the deadline"""
+
+
+class GeminiClient:
+    def __init__(self, model_name: str, timeout: float = 60, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8, cache_size: int = 256,
+                 governor: Optional[GeminiGovernor] = None):
+        self.model_name = model_name
+        self.governor = governor
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache_size = cache_size
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.retries = 0
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def cache_key(self, prompt: str, generation_config: Optional[dict] = None) -> str:
+        config = json.dumps(generation_config, sort_keys=True) if generation_config else ''
+        return hashlib.sha256(f"{self.model_name}\0{config}\0{prompt}".encode('utf-8')).hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        with self._cache_lock:
+            text = self._cache.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def _cache_put(self, key: str, text: str):
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = text
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: uniform in [0, min(max, base * 2^attempt)]"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def generate(self, prompt: str, timeout: Optional[float] = None, use_cache: bool = True,
+                 generation_config: Optional[dict] = None, priority: str = PRIORITY_NOTES) -> str:
+        """
+        Generate text for `prompt`. `timeout` is the total budget in seconds for
+        all attempts; raises LLMTimeoutError when it runs out. `generation_config`
+        is passed to Gemini as is (e.g. {'response_mime_type': 'application/json'}).
+        `priority` is the governor class; raises RateLimited when it has no budget.
+        """
+        key = self.cache_key(prompt, generation_config)
+        if use_cache:
+            cached = self._cache_get(key)
+            if cached is not None:
+                return cached
+
+        budget = timeout or self.timeout
+        deadline = time.monotonic() + budget
+        attempt = 0
+        while True:
+            self._acquire(priority, deadline, budget)
+            try:
+                response = self.model.generate_content(
+                    prompt, generation_config=generation_config,
+                    request_options={'timeout': self._remaining(deadline, budget)}
+                )
+                text = response.text.strip()
+                break
+            except RETRYABLE_ERRORS as e:
+                self._wait_before_retry(e, attempt, deadline)
+                attempt += 1
+
+        if use_cache:
+            self._cache_put(key, text)
+        return text
+
+    def stream(self, prompt: str, timeout: Optional[float] = None, use_cache: bool = True,
+               generation_config: Optional[dict] = None, priority: str = PRIORITY_NOTES) -> Iterator[str]:
+        """
+        Yield text as Gemini generates it. Retries only before the first chunk
+        has been yielded; a cached prompt is yielded in one piece.
+        """
+        key = self.cache_key(prompt, generation_config)
+        if use_cache:
+            cached = self._cache_get(key)
+            if cached is not None:
+                yield cached
+                return
+
+        budget = timeout or self.timeout
+        deadline = time.monotonic() + budget
+        attempt = 0
+        parts = []
+        while True:
+            self._acquire(priority, deadline, budget)
+            try:
+                response = self.model.generate_content(
+                    prompt, stream=True, generation_config=generation_config,
+                    request_options={'timeout': self._remaining(deadline, budget)}
+                )
+                for chunk in response:
+                    text = chunk.text
+                    if text:
+                        parts.append(text)
+                        yield text
+                    if time.monotonic() > deadline:
+                        raise LLMTimeoutError(f"Gemini stream exceeded {budget}s")
+                break
+            except RETRYABLE_ERRORS as e:
+                if parts:
+                    raise  # part of the answer was already sent
+                self._wait_before_retry(e, attempt, deadline)
+                attempt += 1
+
+        if use_cache:
+            self._cache_put(key, ''.join(parts).strip())
+
+    def _acquire(self, priority: str, deadline: float, budget: float):
+        if self.governor is not None:
+            self.governor.acquire(priority, timeout=self._remaining(deadline, budget))
+
+    def _remaining(self, deadline: float, budget: float) -> float:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMTimeoutError(f"Gemini call exceeded {budget}s")
+        return remaining
+
+    def _wait_before_retry(self, error: Exception, attempt: int, deadline: float):
+        """Sleep before the next attempt, or re-raise if out of retries or time"""
+        delay = self.backoff(attempt)
+        rate_limited = isinstance(error, RATE_LIMIT_ERRORS)
+        if rate_limited and self.governor is not None:
+            # Back the whole host off, not just this call
+            self.governor.penalize(max(1.0, self.backoff_base * (2 ** attempt)))
+        if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+            if isinstance(error, (api_exceptions.DeadlineExceeded, TimeoutError)):
+                raise LLMTimeoutError(str(error)) from error
+            if rate_limited:
+                raise RateLimited(self.backoff_base * (2 ** (attempt + 1)), 'upstream') from error
+            raise error
+        self.retries += 1
+        print(f"⚠️ Gemini {type(error).__name__}, retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+        time.sleep(delay)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'model': self.model_name,
+            'cache_entries': len(self._cache),
+            'cache_hits': self.hits,
+            'cache_misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'retries': self.retries
+        }
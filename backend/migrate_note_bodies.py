@@ -0,0 +1,74 @@
+"""
+Move note bodies (content, transcript, passage index) out of the notes
+collection into note_bodies, in batches.
+
+The app runs the same backfill once in the background at startup
+(NOTE_BODY_BACKFILL=0 turns that off); this script runs it by hand, e.g.
+with a pause on a busy cluster. It also gives notes created from metadata
+alone an empty body so they show up in search. The app reads both layouts,
+so it can run while the app is live, be stopped at any point and rerun.
+When no inline bodies are left, the old full-text index on notes is dropped
+(search now runs on note_bodies).
+
+Usage:
+    python migrate_note_bodies.py [--batch-size 100] [--limit N] [--pause 0.5] [--dry-run]
+"""
+import argparse
+import os
+import time
+from urllib.parse import quote_plus
+
+from dotenv import load_dotenv
+from pymongo import MongoClient
+
+from note_bodies import BODY_FIELDS, NoteBodyStore, create_missing, migrate
+from note_search import SEARCH_INDEX_NAME
+
+
+def mongo_uri() -> str:
+    # Same environment as app.py
+    username = quote_plus(os.getenv('MONGODB_USER_ID', ''))
+    password = quote_plus(os.getenv('MONGODB_PASSWORD', ''))
+    uri = os.getenv('MONGODB_URL', '').replace('<db_username>', username).replace('<db_password>', password)
+    if uri and 'authSource' not in uri:
+        uri += "&authSource=admin" if '?' in uri else "?authSource=admin"
+    return uri
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--limit', type=int, help='stop after this many notes')
+    parser.add_argument('--pause', type=float, default=0.0, help='seconds to sleep between batches')
+    parser.add_argument('--dry-run', action='store_true', help='only count the notes still to move')
+    args = parser.parse_args()
+
+    load_dotenv()
+    uri = mongo_uri()
+    if not uri:
+        raise SystemExit("❌ MONGODB_URL environment variable not set")
+    db = MongoClient(uri, serverSelectionTimeoutMS=10000, tls=os.getenv('MONGODB_TLS', '1') != '0',
+                     tlsAllowInvalidCertificates=True).get_database(os.getenv('MONGODB_DB', 'note_flow_db'))
+    pending = {'$or': [{field: {'$exists': True}} for field in BODY_FIELDS]}
+
+    remaining = db.notes.count_documents(pending)
+    print(f"📋 {remaining} notes with inline bodies")
+    if args.dry_run:
+        return
+
+    store = NoteBodyStore(db.note_bodies)
+    store.ensure_indexes()
+    start = time.time()
+    moved = migrate(db.notes, store, batch_size=args.batch_size, limit=args.limit, pause_sec=args.pause)
+    print(f"✅ Moved {moved} note bodies in {time.time() - start:.1f}s")
+    if args.limit is None:
+        created = create_missing(db.notes, store, batch_size=args.batch_size * 5, pause_sec=args.pause)
+        print(f"✅ Created {created} empty bodies for metadata-only notes")
+
+    if db.notes.count_documents(pending) == 0 and SEARCH_INDEX_NAME in db.notes.index_information():
+        db.notes.drop_index(SEARCH_INDEX_NAME)
+        print(f"🧹 Dropped the old {SEARCH_INDEX_NAME} index on notes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Note bodies, stored apart from note metadata.
+
+A note's Markdown content, lecture transcript and passage index can run to
+megabytes for long lectures, while most routes only need the title, flags
+and timestamps. Bodies live in their own collection under the same _id as
+the note (plus user_id and a copy of the title, which the full-text index
+ranks on), and routes load only the body fields they use.
+
+Notes created before the split still carry their bodies inline until
+`migrate` moves them; reads fall back to the inline fields, so both layouts
+work side by side during the migration. Search only sees notes with a body
+document, so `backfill` (run once in the background at startup) also gives
+metadata-only notes an empty one.
+"""
+import time
+from typing import Iterable, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from note_search import ensure_search_index
+
+DUPLICATE_KEY = 11000
+
+BODY_FIELDS = ('content', 'transcript', 'passage_index')
+
+
+class NoteBodyStore:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def ensure_indexes(self):
+        ensure_search_index(self.collection)
+
+    def save(self, note_id, user_id: str, unset: Iterable[str] = (), **fields):
+        """Create or update the body in one write; pass any of BODY_FIELDS and `title`, and fields to drop"""
+        update = {'$set': {**fields, 'user_id': user_id, 'updated_at': time.time()}}
+        if unset:
+            update['$unset'] = {field: '' for field in unset}
+        self.collection.update_one({'_id': note_id}, update, upsert=True)
+
+    def set_index(self, note_id, index_doc: dict) -> bool:
+        """Store a passage index; False when the note has no body here yet (not migrated)"""
+        result = self.collection.update_one({'_id': note_id}, {'$set': {'passage_index': index_doc}})
+        return result.matched_count > 0
+
+    def attach(self, note: dict, fields: Iterable[str] = BODY_FIELDS) -> dict:
+        """
+        Add the requested body fields to a note document in place. Fields the
+        note already has inline (not migrated yet) are kept; the rest come from
+        one read of the body collection.
+        """
+        missing = [f for f in fields if f not in note]
+        if missing:
+            body = self.collection.find_one({'_id': note['_id']}, {f: 1 for f in missing}) or {}
+            for field in missing:
+                if field in body:
+                    note[field] = body[field]
+        return note
+
+    def delete(self, note_id):
+        self.collection.delete_one({'_id': note_id})
+
+
+def _upsert_bodies(collection, requests: list):
+    try:
+        collection.bulk_write(requests, ordered=False)
+    except BulkWriteError as e:
+        # Another worker's backfill inserted the same body first, which is what $setOnInsert wanted anyway
+        if any(err.get('code') != DUPLICATE_KEY for err in e.details.get('writeErrors', [])):
+            raise
+
+
+def migrate(notes_collection, store: NoteBodyStore, batch_size: int = 100,
+            limit: Optional[int] = None, pause_sec: float = 0.0) -> int:
+    """
+    Move inline bodies out of the notes collection, `batch_size` notes per
+    round trip. Safe to stop and rerun: a body that already exists (the note
+    was edited after the split) is never overwritten by the older inline copy.
+    Returns the number of notes moved.
+    """
+    pending = {'$or': [{field: {'$exists': True}} for field in BODY_FIELDS]}
+    projection = {'user_id': 1, 'title': 1, **{field: 1 for field in BODY_FIELDS}}
+    moved = 0
+    while limit is None or moved < limit:
+        size = batch_size if limit is None else min(batch_size, limit - moved)
+        batch = list(notes_collection.find(pending, projection).limit(size))
+        if not batch:
+            break
+
+        _upsert_bodies(store.collection, [
+            UpdateOne({'_id': note['_id']}, {'$setOnInsert': {
+                'user_id': note.get('user_id'),
+                'title': note.get('title', ''),
+                'updated_at': time.time(),
+                **{field: note[field] for field in BODY_FIELDS if field in note}
+            }}, upsert=True)
+            for note in batch
+        ])
+        notes_collection.bulk_write([
+            UpdateOne({'_id': note['_id']}, {'$unset': {field: '' for field in BODY_FIELDS}})
+            for note in batch
+        ], ordered=False)
+
+        moved += len(batch)
+        print(f"📦 Moved {moved} note bodies")
+        if pause_sec:
+            time.sleep(pause_sec)  # leave room for live traffic on a busy cluster
+    return moved
+
+
+def create_missing(notes_collection, store: NoteBodyStore, batch_size: int = 500,
+                   pause_sec: float = 0.0) -> int:
+    """
+    Give every note without inline fields or a body document an empty body
+    (notes created from metadata alone), in one pass over the notes in _id
+    order. Returns the number of bodies created.
+    """
+    no_inline = {field: {'$exists': False} for field in BODY_FIELDS}
+    created = 0
+    last_id = None
+    while True:
+        query = dict(no_inline, **({'_id': {'$gt': last_id}} if last_id is not None else {}))
+        batch = list(notes_collection.find(query, {'user_id': 1, 'title': 1}).sort('_id', 1).limit(batch_size))
+        if not batch:
+            break
+        last_id = batch[-1]['_id']
+        have = {body['_id'] for body in store.collection.find(
+            {'_id': {'$in': [note['_id'] for note in batch]}}, {'_id': 1}
+        )}
+        missing = [note for note in batch if note['_id'] not in have]
+        if missing:
+            _upsert_bodies(store.collection, [
+                UpdateOne({'_id': note['_id']}, {'$setOnInsert': {
+                    'user_id': note.get('user_id'),
+                    'title': note.get('title', ''),
+                    'content': '',
+                    'updated_at': time.time()
+                }}, upsert=True)
+                for note in missing
+            ])
+            created += len(missing)
+        if pause_sec:
+            time.sleep(pause_sec)
+    return created
+
+
+def backfill(notes_collection, store: NoteBodyStore, batch_size: int = 100, pause_sec: float = 0.0) -> dict:
+    """Move any inline bodies, then create the missing ones, so every note is searchable"""
+    moved = migrate(notes_collection, store, batch_size=batch_size, pause_sec=pause_sec)
+    created = create_missing(notes_collection, store, batch_size=batch_size * 5, pause_sec=pause_sec)
+    return {'moved': moved, 'created': created}
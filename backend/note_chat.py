@@ -0,0 +1,126 @@
+"""
+Prompts for chatting with a note.
+
+Short notes are sent whole. For long ones the note's passage index (notes
+and transcript) picks the passages relevant to the question (and the
+previous question, for follow-ups), and those are sent instead when that
+prompt is the smaller one. Conversation context is the session's running
+summary plus its recent turns.
+"""
+from typing import List, Optional, Tuple
+
+from passage_index import INDEX_VERSION, PassageIndex
+
+_INSTRUCTIONS = """**Instructions:**
+1. Answer based ONLY on the content of these notes
+2. Be clear, concise, and educational
+3. If the question isn't covered in the notes, politely say so
+4. Use examples from the notes when possible
+5. Keep responses under 200 words unless explaining complex topics
+
+**Your Answer:**"""
+
+
+def _with_history(prompt: str, chat_history: list, summary: str = '') -> str:
+    # Add chat history for context (if provided)
+    if chat_history:
+        history_text = "\n".join([
+            f"Student: {msg['question']}\nAI: {msg['answer']}"
+            for msg in chat_history  # callers pass only the recent exchanges
+        ])
+        prompt = f"""Previous conversation:
+{history_text}
+
+{prompt}"""
+    if summary:
+        prompt = f"""Summary of the earlier conversation:
+{summary}
+
+{prompt}"""
+    return prompt
+
+
+def build_chat_prompt(note: dict, question: str, chat_history: list, summary: str = '') -> str:
+    """Tutor prompt over the whole note content"""
+    note_content = note.get('content', note.get('transcript', ''))
+    note_title = note.get('title', 'Untitled Note')
+
+    prompt = f"""You are an AI tutor helping a student understand their lecture notes.
+
+**Note Title:** {note_title}
+
+**Note Content:**
+{note_content}
+
+**Student's Question:** {question}
+
+{_INSTRUCTIONS}"""
+    return _with_history(prompt, chat_history, summary)
+
+
+def build_rag_chat_prompt(note_title: str, passages: List[dict], question: str, chat_history: list,
+                          summary: str = '') -> str:
+    """Tutor prompt over the retrieved passages only"""
+    excerpts = '\n\n'.join(f"[{p['source']}] {p['text']}" for p in passages) or '(no matching passages)'
+    prompt = f"""You are an AI tutor helping a student understand their lecture notes.
+Below are the parts of the notes and lecture transcript most relevant to the question.
+
+**Note Title:** {note_title}
+
+**Relevant Excerpts:**
+{excerpts}
+
+**Student's Question:** {question}
+
+{_INSTRUCTIONS}"""
+    return _with_history(prompt, chat_history, summary)
+
+
+def choose_chat_prompt(note: dict, passages: List[dict], question: str, chat_history: list,
+                       summary: str = '') -> Tuple[str, str, int]:
+    """
+    The whole-note prompt, or the retrieved-passage one when there are
+    passages and it comes out smaller (passages are mostly transcript, so
+    they can outweigh short notes). Returns (prompt, mode, full_prompt_chars).
+    """
+    full = build_chat_prompt(note, question, chat_history, summary)
+    if passages:
+        rag = build_rag_chat_prompt(note.get('title', 'Untitled Note'), passages, question, chat_history, summary)
+        if len(rag) < len(full):
+            return rag, 'rag', len(full)
+    return full, 'full', len(full)
+
+
+def build_note_index(content: Optional[str], transcript: Optional[str]) -> PassageIndex:
+    return PassageIndex.build({'notes': content or '', 'transcript': transcript or ''})
+
+
+def load_note_index(note: dict) -> Optional[PassageIndex]:
+    """The stored index, or None when missing or built by an older version"""
+    doc = note.get('passage_index')
+    if not doc or doc.get('version') != INDEX_VERSION:
+        return None
+    return PassageIndex.from_doc(doc)
+
+
+def retrieval_query(question: str, chat_history: list) -> str:
+    # Follow-ups ("what about the second one?") lean on the previous question
+    if chat_history:
+        return f"{chat_history[-1].get('question', '')} {question}"
+    return question
+
+
+def summary_prompt(summary: str, turns: List[dict]) -> str:
+    """Fold older chat turns into the running summary of a study session"""
+    exchanges = "\n".join(f"Student: {t['question']}\nAI: {t['answer']}" for t in turns)
+    return f"""You keep a running summary of a student's study chat about their lecture notes.
+
+CURRENT SUMMARY:
+{summary or '(none yet)'}
+
+NEW EXCHANGES:
+{exchanges}
+
+Rewrite the summary to include the new exchanges: what the student asked about, what was explained,
+and anything they found confusing. Keep names, numbers and definitions. Stay under 150 words.
+Return ONLY the summary."""
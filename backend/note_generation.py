@@ -0,0 +1,296 @@
+"""
+Map-reduce note generation for long transcripts.
+
+The transcript is split at sentence boundaries into sections, notes for
+each section are generated in parallel (map), and the section notes are
+merged into the final Main Topic / Key Points / Important Concepts /
+Summary layout (reduce). When the section notes are themselves too long for
+one prompt they are reduced in parallel groups first.
+
+Each request gets its own pool of up to `max_workers` threads, so two long
+lectures never queue behind each other; the host-wide Gemini governor is
+what bounds the total rate. Sections grow (up to `max_section_chars`) so a
+long lecture still maps in one wave of `max_workers` calls, which keeps
+latency close to flat in lecture length.
+
+Final notes can be requested as JSON (title, key points, concepts, summary)
+so the title and the small fields come out of the same call; they are
+validated here and rendered back into the Markdown layout for display.
+"""
+import json
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+NOTES_FORMAT = """OUTPUT FORMAT:
+## Main Topic
+
+### Key Points
+- [Point 1]
+- [Point 2]
+
+### Important Concepts
+- **[Concept]**: [Definition]
+
+### Summary
+[Summary text]
+"""
+
+NOTES_JSON_FORMAT = """OUTPUT FORMAT: a single JSON object and nothing else, shaped like:
+{
+  "title": "Short descriptive title of the main topic (max 60 characters)",
+  "key_points": ["Point 1", "Point 2"],
+  "concepts": [{"term": "Concept", "definition": "Brief definition"}],
+  "summary": "Summary text"
+}
+"""
+
+JSON_OUTPUT = {'response_mime_type': 'application/json'}
+TITLE_MAX_CHARS = 80
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+_JSON_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$')
+_HEADING = re.compile(r'^#{1,4}\s*(.+?)\s*$', re.MULTILINE)
+_BULLET = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s+(.+)$')
+_CONCEPT = re.compile(r'^\*\*(.+?)\*\*\s*[:\-–]\s*(.+)$')
+
+
+def _output_format(structured: bool) -> str:
+    return NOTES_JSON_FORMAT if structured else NOTES_FORMAT
+
+
+def notes_prompt(transcript: str, structured: bool = False) -> str:
+    """Single-shot prompt for a transcript that fits in one call"""
+    return f"""You are an expert note-taker. Analyze the following lecture transcript and create structured, easy-to-read notes.
+
+TRANSCRIPT:
+{transcript}
+
+INSTRUCTIONS:
+1. Identify the Main Topic.
+2. List Key Points with bullet points.
+3. Extract Important Concepts and define them briefly.
+4. Provide a concise Summary.
+
+{_output_format(structured)}"""
+
+
+def section_prompt(section: str, index: int, total: int) -> str:
+    return f"""You are an expert note-taker. Below is part {index} of {total} of a lecture transcript.
+Write detailed notes for THIS PART ONLY; they will be merged with the notes for the other parts.
+
+TRANSCRIPT PART {index}/{total}:
+{section}
+
+INSTRUCTIONS:
+1. Start with one line naming the topic of this part.
+2. List every key point made in this part as bullet points, keeping examples, numbers and names.
+3. List the concepts introduced in this part as **Concept**: definition.
+4. End with a two-sentence summary of this part.
+"""
+
+
+def reduce_prompt(section_notes: List[str], final: bool, structured: bool = False) -> str:
+    joined = '\n\n'.join(f"--- PART {i} ---\n{notes}" for i, notes in enumerate(section_notes, 1))
+    if not final:
+        return f"""Merge these consecutive notes from one lecture into a single set of notes.
+Keep every distinct key point and concept, remove duplicates, and keep the order of the lecture.
+
+{joined}
+"""
+    return f"""You are an expert note-taker. Below are notes for consecutive parts of one lecture, in order.
+Combine them into one set of structured notes for the whole lecture.
+
+{joined}
+
+INSTRUCTIONS:
+1. Identify the Main Topic of the whole lecture.
+2. List Key Points with bullet points, grouped in lecture order, without repeating points.
+3. Extract Important Concepts and define them briefly (merge duplicates).
+4. Provide a concise Summary of the whole lecture.
+
+{_output_format(structured)}"""
+
+
+def _sentences(transcript: str, max_chars: int):
+    for sentence in _SENTENCE_END.split(transcript.strip()):
+        if len(sentence) <= max_chars:
+            if sentence:
+                yield sentence
+            continue
+        # Unpunctuated run-on text: fall back to word boundaries
+        words = sentence.split()
+        step = max(1, max_chars // 8)  # ~8 chars per word
+        for i in range(0, len(words), step):
+            yield ' '.join(words[i:i + step])
+
+
+def split_sections(transcript: str, max_chars: int) -> List[str]:
+    """Split at sentence boundaries into sections of at most ~max_chars"""
+    sections = []
+    current = []
+    size = 0
+    for sentence in _sentences(transcript, max_chars):
+        if current and size + len(sentence) + 1 > max_chars:
+            sections.append(' '.join(current))
+            current = []
+            size = 0
+        current.append(sentence)
+        size += len(sentence) + 1
+    if current:
+        sections.append(' '.join(current))
+    return sections
+
+
+class NoteMapReducer:
+    """
+    Generate notes for long transcripts with at most `max_workers` concurrent
+    model calls per request. `generate(prompt) -> str` is the model call
+    (Gemini in the app, a stand-in in the benchmark).
+    """
+
+    def __init__(self, generate: Callable[[str], str], max_workers: int = 8,
+                 section_chars: int = 12000, reduce_chars: int = 24000, max_section_chars: Optional[int] = None):
+        self.generate = generate
+        self.max_workers = max_workers
+        self.section_chars = section_chars
+        self.max_section_chars = max_section_chars or 3 * section_chars
+        self.reduce_chars = reduce_chars
+
+    def section_size(self, transcript: str) -> int:
+        """Smallest section size (within bounds) that maps the transcript in one wave"""
+        one_wave = math.ceil(len(transcript) / self.max_workers)
+        return max(self.section_chars, min(self.max_section_chars, one_wave))
+
+    def should_split(self, transcript: str) -> bool:
+        return len(transcript) > self.section_chars * 1.5
+
+    def generate_notes(self, transcript: str) -> str:
+        return self.generate(self.final_prompt(transcript))
+
+    def final_prompt(self, transcript: str, structured: bool = False) -> str:
+        """
+        Run the map and intermediate reduce steps and return the prompt for
+        the last call, so callers can stream that one (or ask for JSON)
+        """
+        sections = split_sections(transcript, self.section_size(transcript))
+        if len(sections) <= 1:
+            return notes_prompt(transcript, structured)
+
+        total = len(sections)
+        print(f"🗺️ Generating notes for {total} sections in parallel")
+        with ThreadPoolExecutor(max_workers=min(total, self.max_workers), thread_name_prefix='notes') as executor:
+            notes = list(executor.map(
+                lambda item: self.generate(section_prompt(item[1], item[0], total)),
+                enumerate(sections, 1)
+            ))
+
+            # Reduce in parallel groups until everything fits in one final prompt
+            while sum(len(n) for n in notes) > self.reduce_chars and len(notes) > 2:
+                groups = self._group(notes)
+                if len(groups) == 1:
+                    break  # only slightly over; the final prompt takes it as is
+                print(f"🔁 Reducing {len(notes)} section notes in {len(groups)} groups")
+                notes = list(executor.map(lambda group: self.generate(reduce_prompt(group, final=False)), groups))
+
+        return reduce_prompt(notes, final=True, structured=structured)
+
+    def _group(self, notes: List[str]) -> List[List[str]]:
+        """Consecutive groups that fit in one reduce prompt, at least two notes each so the tree shrinks"""
+        groups = []
+        current = []
+        size = 0
+        for n in notes:
+            if len(current) >= 2 and size + len(n) > self.reduce_chars:
+                groups.append(current)
+                current = []
+                size = 0
+            current.append(n)
+            size += len(n)
+        if len(current) == 1 and groups:
+            groups[-1].extend(current)
+        elif current:
+            groups.append(current)
+        return groups
+
+
+def _clean_title(title) -> Optional[str]:
+    title = re.sub(r'[#*_`]', '', str(title or '')).strip().strip('"\'')
+    if len(title) > TITLE_MAX_CHARS:
+        title = title[:TITLE_MAX_CHARS - 3] + '...'
+    return title if len(title) >= 5 else None
+
+
+def _strings(items) -> List[str]:
+    if not isinstance(items, list):
+        return []
+    return [str(item).strip() for item in items if str(item or '').strip()]
+
+
+def parse_structured_notes(text: str) -> dict:
+    """
+    Validate Gemini's JSON notes into {title, key_points, concepts, summary}.
+    `title` is None when missing or too short. Raises ValueError when the
+    text is not a JSON object or has neither key points nor a summary.
+    """
+    try:
+        data = json.loads(_JSON_FENCE.sub('', text.strip()))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"not JSON: {e}")
+    if not isinstance(data, dict):
+        raise ValueError('expected a JSON object')
+
+    concepts = []
+    for item in data.get('concepts') or []:
+        if isinstance(item, dict) and str(item.get('term') or '').strip():
+            concepts.append({'term': str(item['term']).strip(), 'definition': str(item.get('definition') or '').strip()})
+
+    notes = {
+        'title': _clean_title(data.get('title')),
+        'key_points': _strings(data.get('key_points')),
+        'concepts': concepts,
+        'summary': str(data.get('summary') or '').strip()
+    }
+    if not notes['key_points'] and not notes['summary']:
+        raise ValueError('no key points or summary')
+    return notes
+
+
+def parse_markdown_notes(markdown: str) -> dict:
+    """Read the same fields out of notes in the Markdown layout (streamed or edited notes)"""
+    sections = {}
+    matches = list(_HEADING.finditer(markdown))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(markdown)
+        sections[match.group(1).strip().lower()] = markdown[match.end():end].strip()
+
+    key_points = []
+    concepts = []
+    for line in sections.get('key points', '').splitlines():
+        bullet = _BULLET.match(line)
+        if bullet:
+            key_points.append(bullet.group(1).strip())
+    for line in sections.get('important concepts', '').splitlines():
+        bullet = _BULLET.match(line)
+        concept = _CONCEPT.match(bullet.group(1).strip()) if bullet else None
+        if concept:
+            concepts.append({'term': concept.group(1).strip(), 'definition': concept.group(2).strip()})
+
+    main_topic = sections.get('main topic', '').split('\n', 1)[0]
+    return {
+        'title': _clean_title(main_topic),
+        'key_points': key_points,
+        'concepts': concepts,
+        'summary': sections.get('summary', '')
+    }
+
+
+def render_notes_markdown(notes: dict) -> str:
+    """Structured notes back in the NOTES_FORMAT layout"""
+    lines = ['## Main Topic', notes.get('title') or '', '', '### Key Points']
+    lines += [f"- {point}" for point in notes.get('key_points', [])]
+    lines += ['', '### Important Concepts']
+    lines += [f"- **{c['term']}**: {c['definition']}" for c in notes.get('concepts', [])]
+    lines += ['', '### Summary', notes.get('summary', '')]
+    return '\n'.join(lines).strip() + '\n'
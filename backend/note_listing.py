@@ -0,0 +1,90 @@
+"""
+Listing a user's notes, newest first.
+
+The list view only needs a handful of small fields, so queries project
+away content, transcript and the passage index. A (user_id, created_at, _id)
+index serves both the filter and the sort, and pages are fetched by keyset:
+the cursor is the (created_at, _id) of the last note on the previous page,
+so page 50 costs the same as page 1 and notes added meanwhile never shift
+or repeat entries.
+"""
+import base64
+import json
+from typing import List, Optional, Tuple
+
+from bson.objectid import ObjectId
+
+LIST_INDEX_NAME = 'notes_user_created'
+MAX_PAGE_SIZE = 200
+
+# List and preview responses only need the small fields, never content/transcript
+NOTE_LIST_FIELDS = {
+    'title': 1, 'created_at': 1, 'updated_at': 1, 'google_doc_url': 1, 'google_doc_id': 1,
+    'preview': 1, 'is_favorite': 1, 'summary': 1
+}
+
+
+def ensure_list_index(collection):
+    """Create the listing index (idempotent); _id breaks ties between equal timestamps"""
+    collection.create_index([('user_id', 1), ('created_at', -1), ('_id', -1)], name=LIST_INDEX_NAME)
+
+
+def encode_cursor(note: dict) -> str:
+    raw = json.dumps([note.get('created_at'), str(note['_id'])]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[float, ObjectId]:
+    """Raises ValueError for anything that isn't a cursor we issued"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, note_id = json.loads(raw)
+        return float(created_at), ObjectId(note_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def list_query(user_id: str, after: Optional[str] = None, note_ids: Optional[List[ObjectId]] = None) -> dict:
+    query = {'user_id': user_id}
+    if note_ids is not None:
+        query['_id'] = {'$in': note_ids}
+    if after:
+        created_at, note_id = decode_cursor(after)
+        query['$or'] = [
+            {'created_at': {'$lt': created_at}},
+            {'created_at': created_at, '_id': {'$lt': note_id}}
+        ]
+    return query
+
+
+def public_note(note: dict) -> dict:
+    return {
+        'id': str(note['_id']),
+        'title': note.get('title', 'Untitled Note'),
+        'created_at': note.get('created_at'),
+        'updated_at': note.get('updated_at'),
+        'google_doc_url': note.get('google_doc_url'),
+        'google_doc_id': note.get('google_doc_id'),
+        'preview': note.get('preview', ''),
+        'summary': note.get('summary', ''),
+        'is_favorite': note.get('is_favorite', False)
+    }
+
+
+def list_notes(collection, user_id: str, limit: Optional[int] = None, after: Optional[str] = None,
+               note_ids: Optional[List[ObjectId]] = None) -> Tuple[List[dict], Optional[str]]:
+    """
+    One page of list entries and the cursor for the next page (None on the
+    last page). Without `limit` every note is returned, as older clients expect.
+    `note_ids` restricts the listing to those notes (a folder's contents).
+    """
+    cursor = collection.find(list_query(user_id, after, note_ids), NOTE_LIST_FIELDS).sort(
+        [('created_at', -1), ('_id', -1)]
+    )
+    if limit is None:
+        return [public_note(n) for n in cursor], None
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    docs = list(cursor.limit(limit + 1))
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return [public_note(n) for n in docs[:limit]], next_cursor
@@ -0,0 +1,166 @@
+"""
+Full-text search over a user's notes.
+
+Backed by a MongoDB text index on (user_id, title, content, transcript) of
+the note bodies collection (see note_bodies.py). Mongo maintains it as part
+of every write to that collection, so it never needs a separate rebuild. Results are ranked by
+text score (title weighted above notes, notes above transcript), paginated
+with skip/limit, and each hit gets a snippet around the densest cluster of
+matched terms. Bodies can run to megabytes, so the server cuts a short
+window around the first matched term in each field and only that window
+comes back over the wire.
+"""
+import re
+import time
+from typing import List, Optional, Tuple
+
+from passage_index import tokenize
+
+SEARCH_INDEX_NAME = 'notes_text_search'
+SEARCH_WEIGHTS = {'title': 10, 'content': 3, 'transcript': 1}
+SNIPPET_FIELDS = ('content', 'transcript', 'title')
+MAX_PAGE_SIZE = 50
+SNIPPET_LEAD_CHARS = 200     # window starts this far before the first matched term
+SNIPPET_WINDOW_CHARS = 1200  # chars of each body field sent back for snippets
+
+
+def ensure_search_index(collection):
+    """
+    Create the text index (idempotent). The user_id prefix keeps every query
+    inside one user's notes; `language_override` points at a field notes never
+    have, so a stray `language` value can't break inserts.
+    """
+    collection.create_index(
+        [('user_id', 1)] + [(field, 'text') for field in SEARCH_WEIGHTS],
+        name=SEARCH_INDEX_NAME,
+        weights=SEARCH_WEIGHTS,
+        default_language='english',
+        language_override='search_language'
+    )
+
+
+def _terms(query: str) -> List[str]:
+    # Mongo matches stems, so match word prefixes ("running" -> "runn", hits "run...")
+    return sorted({t if len(t) <= 4 else t[:max(4, len(t) - 3)] for t in tokenize(query)})
+
+
+def _term_pattern(query: str) -> Optional[re.Pattern]:
+    terms = _terms(query)
+    if not terms:
+        return None
+    return re.compile(r'\b(' + '|'.join(sorted(map(re.escape, terms), key=len, reverse=True)) + r')', re.IGNORECASE)
+
+
+def snippet_window(field: str, terms: List[str]) -> dict:
+    """
+    Projection expression for a slice of `field` starting SNIPPET_LEAD_CHARS
+    before the first occurrence of any term (the start of the field if none),
+    with its offset and the field's full length.
+    """
+    text = {'$ifNull': ['$' + field, '']}
+    first = {'$let': {
+        'vars': {'lower': {'$toLower': '$$text'}},
+        'in': {'$min': {'$filter': {
+            'input': [{'$indexOfCP': ['$$lower', term]} for term in terms],
+            'cond': {'$gte': ['$$this', 0]}
+        }}}
+    }}
+    return {'$let': {'vars': {'text': text}, 'in': {'$let': {
+        'vars': {'start': {'$max': [0, {'$subtract': [first, SNIPPET_LEAD_CHARS]}]}},
+        'in': {
+            'text': {'$substrCP': ['$$text', '$$start', SNIPPET_WINDOW_CHARS]},
+            'start': '$$start',
+            'length': {'$strLenCP': '$$text'}
+        }
+    }}}}
+
+
+def make_snippet(text: str, pattern: Optional[re.Pattern], width: int = 200, offset: int = 0,
+                 total_len: Optional[int] = None) -> Optional[str]:
+    """
+    Window of ~width chars containing the most distinct matched terms, or None
+    if nothing matched. `text` may be a slice starting at `offset` of a field
+    `total_len` long; the ellipses then refer to the whole field.
+    """
+    if not text or pattern is None:
+        return None
+    matches = [(m.start(), m.group(1).lower()) for m in pattern.finditer(text)]
+    if not matches:
+        return None
+
+    best_start, best_count = matches[0][0], 0
+    for i, (pos, _) in enumerate(matches):
+        distinct = {term for p, term in matches[i:] if p < pos + width}
+        if len(distinct) > best_count:
+            best_start, best_count = pos, len(distinct)
+
+    # Start a little before the first match, on a word boundary
+    start = max(0, best_start - width // 5)
+    if start > 0:
+        space = text.rfind(' ', 0, start)
+        start = space + 1 if space != -1 else start
+    end = min(len(text), start + width)
+    if end < len(text):
+        space = text.rfind(' ', start, end)
+        end = space if space > start else end
+
+    snippet = ' '.join(text[start:end].split())
+    total_len = len(text) + offset if total_len is None else total_len
+    return f"{'…' if offset + start > 0 else ''}{snippet}{'…' if offset + end < total_len else ''}"
+
+
+def search_notes(bodies_collection, notes_collection, user_id: str, query: str, page: int = 1,
+                 page_size: int = 20) -> Tuple[List[dict], bool, float]:
+    """Ranked hits for one page, whether there are more pages, and the query time in ms"""
+    page = max(1, page)
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    start = time.time()
+
+    terms = _terms(query)
+    docs = list(bodies_collection.aggregate([
+        {'$match': {'user_id': user_id, '$text': {'$search': query}}},
+        {'$sort': {'score': {'$meta': 'textScore'}}},
+        {'$skip': (page - 1) * page_size},
+        {'$limit': page_size + 1},
+        {'$project': {
+            'score': {'$meta': 'textScore'},
+            'title': 1,
+            **({field: snippet_window(field, terms) for field in SNIPPET_FIELDS if field != 'title'} if terms else {})
+        }}
+    ]))
+
+    # List fields live on the note itself: one $in read for the whole page
+    ids = [body['_id'] for body in docs[:page_size]]
+    notes = {note['_id']: note for note in notes_collection.find(
+        {'_id': {'$in': ids}, 'user_id': user_id},
+        {'title': 1, 'preview': 1, 'created_at': 1, 'updated_at': 1, 'is_favorite': 1}
+    )} if ids else {}
+
+    pattern = _term_pattern(query)
+    results = []
+    for body in docs[:page_size]:
+        note = notes.get(body['_id'])
+        if note is None:
+            continue  # body of a note deleted mid-query
+        snippet, source = None, None
+        for field in SNIPPET_FIELDS:
+            window = body.get(field)
+            if isinstance(window, dict):
+                snippet = make_snippet(window['text'], pattern, offset=window['start'], total_len=window['length'])
+            else:
+                snippet = make_snippet(window or '', pattern)
+            if snippet:
+                source = field
+                break
+        results.append({
+            'id': str(note['_id']),
+            'title': note.get('title', 'Untitled Note'),
+            'snippet': snippet or note.get('preview', ''),
+            'snippet_source': source,
+            'score': round(body.get('score', 0.0), 4),
+            'preview': note.get('preview', ''),
+            'created_at': note.get('created_at'),
+            'updated_at': note.get('updated_at'),
+            'is_favorite': note.get('is_favorite', False)
+        })
+    return results, len(docs) > page_size, round((time.time() - start) * 1000, 1)
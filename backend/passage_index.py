@@ -0,0 +1,100 @@
+"""
+BM25 passage index for note chat.
+
+A note's content and transcript are split into passages of a few hundred
+characters and indexed with term frequencies when the note is created or
+updated; the index is stored on the note document. Chat questions then
+retrieve only the top-k passages instead of sending the whole note.
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from note_generation import split_sections
+
+INDEX_VERSION = 1
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further had has have having he her here
+hers him his how i if in into is it its itself just me more most my no nor not now of off on once only or
+other our ours out over own same she should so some such than that the their theirs them then there these
+they this those through to too under until up very was we were what when where which while who whom why
+will with would you your yours
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def split_passages(text: str, max_chars: int = 700, min_chars: int = 200) -> List[str]:
+    """Paragraphs (sentence-split when long), with short neighbours merged"""
+    passages = []
+    for block in _PARAGRAPH_BREAK.split(text or ''):
+        block = block.strip()
+        if not block:
+            continue
+        pieces = [block] if len(block) <= max_chars else split_sections(block, max_chars)
+        for piece in pieces:
+            if passages and len(passages[-1]) < min_chars and len(passages[-1]) + len(piece) < max_chars:
+                passages[-1] = f"{passages[-1]}\n{piece}"
+            else:
+                passages.append(piece)
+    return passages
+
+
+class PassageIndex:
+    def __init__(self, passages: List[dict], tf: List[Dict[str, int]], df: Dict[str, int]):
+        self.passages = passages  # [{'source': 'notes' | 'transcript', 'text': ...}]
+        self.tf = tf
+        self.df = df
+        self.lengths = [sum(counts.values()) for counts in tf]
+        self.avgdl = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+    @classmethod
+    def build(cls, sources: Dict[str, str], max_chars: int = 700) -> 'PassageIndex':
+        passages = []
+        tf = []
+        df = Counter()
+        for source, text in sources.items():
+            for passage in split_passages(text, max_chars):
+                counts = Counter(tokenize(passage))
+                if not counts:
+                    continue
+                passages.append({'source': source, 'text': passage})
+                tf.append(dict(counts))
+                df.update(counts.keys())
+        return cls(passages, tf, dict(df))
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> 'PassageIndex':
+        return cls(doc['passages'], doc['tf'], doc['df'])
+
+    def to_doc(self) -> dict:
+        return {'version': INDEX_VERSION, 'passages': self.passages, 'tf': self.tf, 'df': self.df}
+
+    @property
+    def total_chars(self) -> int:
+        return sum(len(p['text']) for p in self.passages)
+
+    def search(self, query: str, k: int = 6, k1: float = 1.5, b: float = 0.75) -> List[Tuple[float, dict]]:
+        """Top-k passages by BM25, returned in document order"""
+        terms = set(tokenize(query))
+        n = len(self.passages)
+        if not terms or not n:
+            return []
+
+        idf = {t: math.log(1 + (n - self.df[t] + 0.5) / (self.df[t] + 0.5)) for t in terms if t in self.df}
+        scored = []
+        for i, counts in enumerate(self.tf):
+            norm = k1 * (1 - b + b * self.lengths[i] / self.avgdl)
+            score = sum(w * counts[t] * (k1 + 1) / (counts[t] + norm) for t, w in idf.items() if t in counts)
+            if score > 0:
+                scored.append((score, i))
+
+        top = sorted(scored, reverse=True)[:k]
+        return [(score, self.passages[i]) for score, i in sorted(top, key=lambda item: item[1])]
@@ -0,0 +1,95 @@
+"""
+In-process cache of user profiles.
+
+/auth/status, /me and /auth/verify-token run on nearly every page load and
+each needs the same few profile fields. Profiles are cached per worker for
+`ttl_sec` and bounded with least-recently-used eviction. Routes that change
+a profile (sign-up, Google sign-in, connecting or revoking Google Docs)
+invalidate it in their worker; the TTL bounds how long other workers can
+serve the old version. Only display fields are cached, never passwords or
+OAuth tokens, and unknown users are not cached.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from bson.objectid import ObjectId
+
+# Reading one harmless subfield keeps the google_credentials key (for
+# has_google_auth) without loading the tokens
+PROFILE_FIELDS = {'email': 1, 'first_name': 1, 'last_name': 1, 'auth_provider': 1, 'google_credentials.token_uri': 1}
+
+
+def profile_from_user(user: dict) -> dict:
+    return {
+        'id': str(user['_id']),
+        'email': user.get('email'),
+        'first_name': user.get('first_name'),
+        'last_name': user.get('last_name'),
+        'auth_provider': user.get('auth_provider', 'local'),
+        'has_google_auth': 'google_credentials' in user
+    }
+
+
+class ProfileCache:
+    """TTL + LRU bounded profile cache; `ttl_sec=0` turns caching off"""
+
+    def __init__(self, collection, ttl_sec: float = 60, max_entries: int = 10000):
+        self.collection = collection
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # user_id -> (expires_at, profile)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._generation = 0  # bumped by invalidate; loads that straddle one aren't stored
+
+    def get(self, user_id: str) -> Optional[dict]:
+        """The user's profile, or None when there is no such user"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+
+        user = self.collection.find_one({'_id': ObjectId(user_id)}, PROFILE_FIELDS)
+        if not user:
+            return None
+        profile = profile_from_user(user)
+        if self.ttl_sec > 0:
+            with self._lock:
+                if generation != self._generation:
+                    return profile  # may predate the invalidation; don't cache it
+                self._entries[user_id] = (time.monotonic() + self.ttl_sec, profile)
+                self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return profile
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_sec': self.ttl_sec,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
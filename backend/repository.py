@@ -0,0 +1,195 @@
+"""
+MongoDB access for notes and folders.
+
+Every query is scoped to the owning user, so an ownership check and the
+change it guards happen in one command: mutations use find_one_and_update
+(with an aggregation-pipeline update when the new value depends on the old
+one, like flipping a favorite) and return only the fields the route needs.
+
+RoundTripCounter is a pymongo command listener that counts the commands
+each request sends to the server; app.py reports the count in the
+X-Mongo-Round-Trips response header and per endpoint in /health.
+"""
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterable, List, Optional, Tuple
+
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument, monitoring
+
+from note_bodies import NoteBodyStore
+from note_listing import ensure_list_index, list_notes
+from note_search import search_notes
+
+
+class RoundTripCounter(monitoring.CommandListener):
+    """Counts server commands per thread while tracking, and per endpoint overall"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._endpoints = {}  # endpoint -> [requests, round trips]
+
+    def started(self, event):
+        counts = getattr(self._local, 'counts', None)
+        if counts is not None:
+            counts[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def begin(self):
+        self._local.counts = Counter()
+
+    def end(self, endpoint: Optional[str] = None) -> int:
+        """Stop tracking this thread; returns the number of commands since `begin`"""
+        counts = getattr(self._local, 'counts', None)
+        self._local.counts = None
+        total = sum(counts.values()) if counts else 0
+        if endpoint:
+            with self._lock:
+                entry = self._endpoints.setdefault(endpoint, [0, 0])
+                entry[0] += 1
+                entry[1] += total
+        return total
+
+    @contextmanager
+    def track(self):
+        """`with counter.track() as counts:` counts the commands sent inside the block, by name"""
+        self.begin()
+        counts = self._local.counts
+        try:
+            yield counts
+        finally:
+            self.end()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {endpoint: {'requests': n, 'avg_round_trips': round(trips / n, 2)}
+                    for endpoint, (n, trips) in sorted(self._endpoints.items())}
+
+
+class NoteRepository:
+    def __init__(self, notes, bodies: NoteBodyStore, folders):
+        self.notes = notes
+        self.bodies = bodies
+        self.folders = folders
+
+    def ensure_indexes(self):
+        ensure_list_index(self.notes)
+        self.bodies.ensure_indexes()
+
+    def get(self, note_id: str, user_id: str, projection: Optional[dict] = None) -> Optional[dict]:
+        if not ObjectId.is_valid(note_id):
+            return None
+        return self.notes.find_one({'_id': ObjectId(note_id), 'user_id': user_id}, projection)
+
+    def list(self, user_id: str, limit: Optional[int] = None, after: Optional[str] = None,
+             note_ids: Optional[List[ObjectId]] = None) -> Tuple[List[dict], Optional[str]]:
+        return list_notes(self.notes, user_id, limit=limit, after=after, note_ids=note_ids)
+
+    def search(self, user_id: str, query: str, page: int, page_size: int):
+        return search_notes(self.bodies.collection, self.notes, user_id, query, page, page_size)
+
+    def create(self, doc: dict) -> ObjectId:
+        return self.notes.insert_one(doc).inserted_id
+
+    def update(self, note_id: str, user_id: str, update: dict, projection: Optional[dict] = None,
+               before: bool = False) -> Optional[dict]:
+        """
+        Apply `update` to the user's note in one command. Returns the note
+        (after the update, or before it with `before=True`) limited to
+        `projection`, or None when the user has no such note.
+        """
+        if not ObjectId.is_valid(note_id):
+            return None
+        return self.notes.find_one_and_update(
+            {'_id': ObjectId(note_id), 'user_id': user_id},
+            update,
+            projection=projection or {'_id': 1},
+            return_document=ReturnDocument.BEFORE if before else ReturnDocument.AFTER
+        )
+
+    def toggle_favorite(self, note_id: str, user_id: str) -> Optional[bool]:
+        """Flip is_favorite server-side; the new value, or None when the note isn't the user's"""
+        note = self.update(note_id, user_id, [
+            {'$set': {'is_favorite': {'$not': {'$ifNull': ['$is_favorite', False]}}}}
+        ], projection={'is_favorite': 1})
+        return None if note is None else note['is_favorite']
+
+    def set_inline_index(self, note_id, index_doc: dict):
+        """Keep a passage index inline on a note whose body hasn't been migrated yet"""
+        self.notes.update_one({'_id': note_id}, {'$set': {'passage_index': index_doc}})
+
+    def delete(self, note_id: str, user_id: str) -> bool:
+        """Delete the note, its body and its folder memberships"""
+        if not ObjectId.is_valid(note_id):
+            return False
+        result = self.notes.delete_one({'_id': ObjectId(note_id), 'user_id': user_id})
+        if result.deleted_count == 0:
+            return False
+        self.bodies.delete(ObjectId(note_id))
+        self.folders.update_many({'user_id': user_id, 'note_ids': note_id}, {'$pull': {'note_ids': note_id}})
+        return True
+
+    def owned_ids(self, user_id: str, note_ids: Iterable[str]) -> List[str]:
+        """The subset of `note_ids` that are the user's notes, in the given order"""
+        note_ids = list(note_ids)
+        owned = {str(n['_id']) for n in self.notes.find(
+            {'_id': {'$in': [ObjectId(n) for n in note_ids]}, 'user_id': user_id}, {'_id': 1}
+        )}
+        return [n for n in note_ids if n in owned]
+
+
+class FolderRepository:
+    def __init__(self, folders):
+        self.folders = folders
+
+    def ensure_indexes(self):
+        # Multikey: "which folders hold this note" reverse lookups
+        self.folders.create_index([('user_id', 1), ('note_ids', 1)])
+        self.folders.create_index([('user_id', 1), ('created_at', -1)])
+
+    def list(self, user_id: str) -> List[dict]:
+        return list(self.folders.find({'user_id': user_id}).sort('created_at', -1))
+
+    def get(self, folder_id: str, user_id: str, projection: Optional[dict] = None) -> Optional[dict]:
+        if not ObjectId.is_valid(folder_id):
+            return None
+        return self.folders.find_one({'_id': ObjectId(folder_id), 'user_id': user_id}, projection)
+
+    def create(self, user_id: str, name: str, note_ids: List[str]) -> ObjectId:
+        return self.folders.insert_one({
+            'user_id': user_id,
+            'name': name,
+            'note_ids': note_ids,
+            'created_at': time.time()
+        }).inserted_id
+
+    def update(self, folder_id: str, user_id: str, update: dict,
+               projection: Optional[dict] = None) -> Optional[dict]:
+        """One-command update of the user's folder; the updated folder, or None if not theirs"""
+        if not ObjectId.is_valid(folder_id):
+            return None
+        return self.folders.find_one_and_update(
+            {'_id': ObjectId(folder_id), 'user_id': user_id},
+            update,
+            projection=projection or {'_id': 1},
+            return_document=ReturnDocument.AFTER
+        )
+
+    def add_notes(self, folder_id: str, user_id: str, note_ids: List[str]) -> Optional[dict]:
+        return self.update(folder_id, user_id, {'$addToSet': {'note_ids': {'$each': note_ids}}})
+
+    def remove_notes(self, folder_id: str, user_id: str, note_ids: List[str]) -> Optional[dict]:
+        return self.update(folder_id, user_id, {'$pull': {'note_ids': {'$in': note_ids}}})
+
+    def delete(self, folder_id: str, user_id: str) -> bool:
+        if not ObjectId.is_valid(folder_id):
+            return False
+        return self.folders.delete_one({'_id': ObjectId(folder_id), 'user_id': user_id}).deleted_count > 0
@@ -0,0 +1,37 @@
+"""
+Server-sent events helpers.
+
+Streaming endpoints relay model output as `token` events, then send one
+`done` event with the final payload (or an `error` event). Each event's
+data is a JSON object so the client can parse every frame the same way.
+"""
+import json
+from typing import Callable, Iterable, Iterator
+
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',  # stop nginx-style proxies from buffering the stream
+}
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def relay_tokens(chunks: Iterable[str], on_complete: Callable[[str], dict]) -> Iterator[str]:
+    """
+    Forward each text chunk as a `token` event; when the stream ends, pass
+    the full text to `on_complete` and send its return value as `done`.
+    """
+    parts = []
+    try:
+        for text in chunks:
+            parts.append(text)
+            yield sse_event('token', {'text': text})
+        yield sse_event('done', on_complete(''.join(parts).strip()))
+    except Exception as e:
+        print(f"❌ Stream error: {e}")
+        error = {'error': str(e)}
+        if getattr(e, 'retry_after', None):
+            error['retry_after'] = e.retry_after  # rate limited (see gemini_governor)
+        yield sse_event('error', error)
@@ -0,0 +1,119 @@
+"""
+Worker startup lifecycle.
+
+Heavy resources (Whisper weights, the first MongoDB round trip) are brought
+up by warm-up steps on background threads instead of at import time, so a
+freshly forked worker starts answering liveness probes right away and only
+reports ready once every required step has succeeded. Milestones are
+timed from the fork (recorded by gunicorn's post_fork hook) and reported on
+/health/ready.
+"""
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+FORK_TIME_ENV = 'NOTEFLOW_WORKER_FORKED_AT'
+
+STEP_PENDING = 'pending'
+STEP_RUNNING = 'running'
+STEP_OK = 'ok'
+STEP_FAILED = 'failed'
+
+
+class WarmupStep:
+    def __init__(self, name: str, fn: Callable, required: bool = True, retry_sec: Optional[float] = None):
+        self.name = name
+        self.fn = fn
+        self.required = required
+        self.retry_sec = retry_sec  # keep retrying on failure (e.g. database not reachable yet)
+        self.state = STEP_PENDING
+        self.seconds = None
+        self.error = None
+        self.attempts = 0
+        self.done = threading.Event()  # set on success, or on failure when not retrying
+
+    def public(self) -> dict:
+        return {
+            'state': self.state,
+            'seconds': self.seconds,
+            'attempts': self.attempts,
+            'error': self.error
+        }
+
+
+class Lifecycle:
+    """Runs warm-up steps once per worker and tracks readiness"""
+
+    def __init__(self):
+        self.forked_at = float(os.getenv(FORK_TIME_ENV) or time.time())
+        self.steps = {}
+        self.milestones = {}
+        self._started = False
+        self._lock = threading.Lock()
+
+    def add_step(self, name: str, fn: Callable, required: bool = True, retry_sec: Optional[float] = None):
+        self.steps[name] = WarmupStep(name, fn, required, retry_sec)
+
+    def mark(self, milestone: str) -> bool:
+        """Record seconds since fork for a milestone; True the first time only"""
+        with self._lock:
+            if milestone in self.milestones:
+                return False
+            self.milestones[milestone] = round(time.time() - self.forked_at, 3)
+        print(f"⏱️ Worker {os.getpid()}: {milestone} {self.milestones[milestone]:.2f}s after fork")
+        return True
+
+    def start(self):
+        """Start every step on its own thread (idempotent)"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for step in self.steps.values():
+            threading.Thread(target=self._run, args=(step,), daemon=True, name=f"warmup-{step.name}").start()
+
+    def _run(self, step: WarmupStep):
+        while True:
+            step.state = STEP_RUNNING
+            step.attempts += 1
+            t0 = time.time()
+            try:
+                step.fn()
+                step.state = STEP_OK
+                step.error = None
+            except Exception as e:
+                step.state = STEP_FAILED
+                step.error = str(e)
+            step.seconds = round(time.time() - t0, 3)
+
+            if step.state == STEP_OK:
+                print(f"✅ Warm-up step '{step.name}' done in {step.seconds:.2f}s")
+                break
+            print(f"❌ Warm-up step '{step.name}' failed: {step.error}")
+            if not step.retry_sec:
+                break
+            time.sleep(step.retry_sec)
+
+        step.done.set()
+        if self.ready:
+            self.mark('ready')
+
+    def wait_for(self, name: str, timeout: Optional[float] = None) -> bool:
+        """Block until a step has finished; True if it succeeded"""
+        self.start()
+        step = self.steps[name]
+        step.done.wait(timeout)
+        return step.state == STEP_OK
+
+    @property
+    def ready(self) -> bool:
+        return self._started and all(s.state == STEP_OK for s in self.steps.values() if s.required)
+
+    def report(self) -> dict:
+        return {
+            'ready': self.ready,
+            'pid': os.getpid(),
+            'steps': {name: step.public() for name, step in self.steps.items()},
+            'since_fork': dict(self.milestones)
+        }
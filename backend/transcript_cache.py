@@ -0,0 +1,96 @@
+"""
+Content-addressed transcript cache.
+Entries are keyed by a hash of the uploaded bytes plus every setting that
+changes Whisper's output, so a retried or re-uploaded recording skips
+inference entirely. Stored in MongoDB so all workers share it; the size is
+bounded with least-recently-used eviction.
+"""
+import hashlib
+import json
+import time
+from typing import Optional
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def save_and_hash(stream, dest_path: str) -> str:
+    """Copy an upload stream to `dest_path`, hashing it in the same pass"""
+    digest = hashlib.sha256()
+    with open(dest_path, 'wb') as out:
+        while True:
+            block = stream.read(HASH_BLOCK_SIZE)
+            if not block:
+                break
+            digest.update(block)
+            out.write(block)
+    return digest.hexdigest()
+
+
+def cache_key(audio_hash: str, model_name: str, options: dict, **settings) -> str:
+    """Combine the audio hash with the decode settings that affect the transcript"""
+    params = json.dumps({'model': model_name, 'options': options, **settings}, sort_keys=True, default=str)
+    return hashlib.sha256(f"{audio_hash}:{params}".encode('utf-8')).hexdigest()
+
+
+class TranscriptCache:
+    """LRU-bounded transcript cache with shared hit/miss counters"""
+
+    STATS_ID = 'transcripts'
+
+    def __init__(self, collection, stats_collection, max_entries: int = 1000):
+        self.collection = collection
+        self.stats_collection = stats_collection
+        self.max_entries = max_entries
+
+    def ensure_indexes(self):
+        self.collection.create_index('last_used_at')
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self.collection.find_one_and_update(
+            {'_id': key},
+            {'$set': {'last_used_at': time.time()}, '$inc': {'hits': 1}},
+            projection={'transcript': 1, 'language': 1}
+        )
+        self._count('hits' if entry else 'misses')
+        if not entry:
+            return None
+        return {'transcript': entry['transcript'], 'language': entry.get('language')}
+
+    def put(self, key: str, transcript: str, language: Optional[str]):
+        now = time.time()
+        self.collection.update_one(
+            {'_id': key},
+            {
+                '$set': {'transcript': transcript, 'language': language, 'last_used_at': now},
+                '$setOnInsert': {'created_at': now, 'hits': 0}
+            },
+            upsert=True
+        )
+        self._evict()
+
+    def _evict(self):
+        excess = self.collection.estimated_document_count() - self.max_entries
+        if excess <= 0:
+            return
+        oldest = self.collection.find({}, {'_id': 1}).sort('last_used_at', 1).limit(excess)
+        ids = [doc['_id'] for doc in oldest]
+        if ids:
+            self.collection.delete_many({'_id': {'$in': ids}})
+            self._count('evictions', len(ids))
+
+    def _count(self, field: str, amount: int = 1):
+        self.stats_collection.update_one({'_id': self.STATS_ID}, {'$inc': {field: amount}}, upsert=True)
+
+    def stats(self) -> dict:
+        counters = self.stats_collection.find_one({'_id': self.STATS_ID}) or {}
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        lookups = hits + misses
+        return {
+            'entries': self.collection.estimated_document_count(),
+            'max_entries': self.max_entries,
+            'hits': hits,
+            'misses': misses,
+            'evictions': counters.get('evictions', 0),
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,89 @@
+"""
+Pipelined transcript cleaning.
+
+Chunk texts are handed to Gemini as soon as Whisper produces them, so
+cleaning chunk i overlaps with transcribing chunk i+1 instead of running
+once on the merged transcript at the end. Small chunks are buffered until
+there is enough text to be worth a round trip, each request carries the
+tail of the previous piece as context so terminology stays consistent,
+and cleaned pieces are reassembled in order.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+
+class PipelinedCleaner:
+    """
+    `clean(text, context) -> str` cleans one piece; `context` is the raw text
+    just before it and must not be echoed back.
+    """
+
+    def __init__(self, clean: Callable[[str, str], str], max_workers: int = 2,
+                 min_chars: int = 1200, context_chars: int = 300):
+        self.clean = clean
+        self.min_chars = min_chars
+        self.context_chars = context_chars
+        self.calls = 0
+        self.started_at = None   # first Gemini call started
+        self.finished_at = None  # last Gemini call finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='clean')
+        self._futures = []
+        self._buffer = []
+        self._buffered_chars = 0
+        self._previous = ''
+        self._lock = threading.Lock()
+
+    def add(self, text: str):
+        """Queue a chunk; a cleaning call starts once enough text is buffered"""
+        if not text:
+            return
+        self._buffer.append(text)
+        self._buffered_chars += len(text) + 1
+        if self._buffered_chars >= self.min_chars:
+            self._submit()
+
+    def _submit(self):
+        piece = ' '.join(self._buffer)
+        context = self._previous[-self.context_chars:]
+        self._futures.append(self._executor.submit(self._run, piece, context))
+        self._previous = piece
+        self._buffer = []
+        self._buffered_chars = 0
+
+    def _run(self, piece: str, context: str) -> str:
+        with self._lock:
+            if self.started_at is None:
+                self.started_at = time.time()
+        try:
+            return self.clean(piece, context)
+        finally:
+            with self._lock:
+                self.calls += 1
+                self.finished_at = max(self.finished_at or 0, time.time())
+
+    def finish(self) -> str:
+        """Flush the buffer and return the cleaned pieces joined in order"""
+        if self._buffer:
+            self._submit()
+        try:
+            return ' '.join(f.result() for f in self._futures)
+        finally:
+            self._executor.shutdown(wait=False)
+
+    def close(self):
+        """Drop pending pieces (e.g. transcription failed part-way)"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def stage_timing(start_time: float, whisper_start: float, whisper_end: float,
+                 cleaner: Optional[PipelinedCleaner]) -> dict:
+    """Whisper and Gemini stage intervals (seconds from request start) and how much they overlapped"""
+    timing = {'whisper': [round(whisper_start - start_time, 2), round(whisper_end - start_time, 2)]}
+    if cleaner is not None and cleaner.started_at is not None:
+        timing['gemini'] = [round(cleaner.started_at - start_time, 2), round(cleaner.finished_at - start_time, 2)]
+        timing['gemini_calls'] = cleaner.calls
+        timing['overlap_sec'] = round(max(0.0, min(whisper_end, cleaner.finished_at)
+                                          - max(whisper_start, cleaner.started_at)), 2)
+    return timing
@@ -0,0 +1,234 @@
+"""
+Local transcript post-processing.
+
+Deterministic cleanup that runs on every Whisper chunk in milliseconds:
+filler and disfluency removal with precompiled regexes, collapsing the
+phrase loops Whisper sometimes hallucinates ("thank you. thank you. thank
+you."), and correcting misheard domain terms against a glossary with fuzzy
+matching. The output is what Gemini cleans (fewer tokens per call) or,
+when Gemini is skipped, the final transcript.
+
+Fuzzy term correction only rewrites words it doesn't know: dictionary
+words (COMMON_WORDS plus an optional word list such as
+/usr/share/dict/words), inflections of a term ("hypotheses", "equilibria")
+and spans that include a function word ("an algorithm") are left as spoken.
+"""
+import difflib
+import hashlib
+import re
+from collections import defaultdict
+from typing import Iterable, List, Optional
+
+POSTPROCESS_VERSION = 2
+
+FILLERS = ('um', 'umm', 'uh', 'uhh', 'uhm', 'erm', 'er', 'ah', 'hmm', 'mm', 'mhm')
+# Words that are legitimately doubled in speech ("I think that that is", "had had")
+DOUBLE_OK = frozenset({'that', 'had', 'is', 'do'})
+
+DEFAULT_GLOSSARY = (
+    'mitochondria', 'mitochondrial', 'chloroplast', 'photosynthesis', 'ribosome', 'endoplasmic reticulum',
+    'Golgi apparatus', 'cytoplasm', 'eukaryotic', 'prokaryotic', 'deoxyribonucleic acid', 'DNA polymerase',
+    'ATP synthase', 'glycolysis', 'Krebs cycle', 'oxidative phosphorylation', 'homeostasis', 'meiosis',
+    'mitosis', 'phospholipid', 'osmosis', 'enzyme', 'substrate', 'neurotransmitter', 'acetylcholine',
+    'myelin', 'hemoglobin', 'antibody', 'antigen', 'lymphocyte', 'insulin', 'pathogen', 'epidemiology',
+    'pharmacokinetics', 'eigenvalue', 'eigenvector', 'derivative', 'integral', 'polynomial', 'logarithm',
+    'asymptote', 'Fourier transform', 'Laplace transform', 'differential equation', 'thermodynamics',
+    'entropy', 'enthalpy', 'electromagnetism', 'capacitor', 'inductor', 'semiconductor', 'algorithm',
+    'recursion', 'polymorphism', 'encapsulation', 'hypothesis', 'photon', 'electron', 'isotope',
+    'stoichiometry', 'equilibrium', 'catalyst', 'covalent', 'molecule',
+)
+
+# Never glued onto a neighbouring word to make up a term ("my mitochondria", "an algorithm")
+FUNCTION_WORDS = frozenset({
+    'a', 'an', 'the', 'my', 'our', 'your', 'his', 'her', 'its', 'their', 'this', 'that', 'these', 'those',
+    'i', 'we', 'you', 'he', 'she', 'it', 'they', 'me', 'us', 'him', 'them', 'in', 'on', 'at', 'by', 'of',
+    'to', 'for', 'from', 'with', 'into', 'onto', 'as', 'and', 'or', 'but', 'so', 'if', 'than', 'then',
+    'is', 'are', 'was', 'were', 'be', 'do', 'does', 'did', 'has', 'have', 'had', 'can', 'will', 'not', 'no',
+})
+# Real words within fuzzy range of the default glossary; TRANSCRIPT_VOCAB_PATH extends this
+COMMON_WORDS = frozenset({
+    'internal', 'internals', 'interval', 'intervals', 'integer', 'integers', 'integrate', 'integrity',
+    'election', 'elections', 'elector', 'electric', 'electrons', 'insulting', 'insulted', 'insular',
+    'anybody', 'covenant', 'instructor', 'induction', 'capacity', 'entry', 'empathy', 'substitute',
+    'subtract', 'derivation', 'decorative', 'molecular', 'reclusion', 'recession', 'photos', 'protons',
+    'isolate', 'catalog', 'pattern', 'patterns', 'myosin', 'ribose',
+})
+# Endings stripped before comparing a word with a term: a word that only differs
+# from a term in its ending is an inflection of it, not a mishearing
+INFLECTIONS = tuple(sorted((
+    'ations', 'ation', 'ating', 'ated', 'ates', 'ate', 'ative', 'ive', 'ings', 'ing', 'ions', 'ion', 'isms',
+    'ism', 'ize', 'ise', 'ical', 'ics', 'ic', 'ies', 'es', 'is', 'ia', 'a', 'um', 'us', 'al', 'ed', 's', 'e', 'y',
+), key=len, reverse=True))
+
+_FILLER = re.compile(r'(?<![\w-])(?:' + '|'.join(FILLERS) + r')(?![\w-]),?\s*', re.IGNORECASE)
+_STUTTER = re.compile(r'\b(\w{1,4})-\s+(?=\1)', re.IGNORECASE)  # "w- what", "th- the"
+_REPEATED_WORD = re.compile(r'\b(\w+)(?:[,]?\s+\1\b)+', re.IGNORECASE)
+_SPACE_BEFORE_PUNCT = re.compile(r'\s+([,.!?;:])')
+_DOUBLE_PUNCT = re.compile(r'([,.!?;:])[,;:]+|,(?=[.!?])')
+_MULTISPACE = re.compile(r'\s{2,}')
+_SENTENCE_START = re.compile(r'(^|[.!?]\s+)([a-z])')
+_WORD = re.compile(r"[A-Za-z][A-Za-z'-]*")
+_PUNCT = re.compile(r'[.!?,;:]')
+
+
+def _norm(text: str) -> str:
+    return re.sub(r'[^a-z0-9]', '', text.lower())
+
+
+def _stem(word: str) -> str:
+    for suffix in INFLECTIONS:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[:-len(suffix)]
+    return word
+
+
+def _same_stem(a: str, b: str) -> bool:
+    a, b = _stem(a), _stem(b)
+    return a.startswith(b) or b.startswith(a)
+
+
+class TranscriptPostProcessor:
+    """
+    `glossary` terms (single or multi-word) replace near-identical spans:
+    same first letter, similarity >= `min_similarity`, not an inflection
+    of the term ("mitochondrial", "hypotheses" are left alone), at least
+    one word not in `vocabulary`, and no function words in the span.
+    """
+
+    def __init__(self, glossary: Iterable[str] = DEFAULT_GLOSSARY, vocabulary: Iterable[str] = (),
+                 min_similarity: float = 0.85, min_term_chars: int = 5, max_loop_words: int = 12,
+                 min_loop_repeats: int = 3):
+        self.min_similarity = min_similarity
+        self.max_loop_words = max_loop_words
+        self.min_loop_repeats = min_loop_repeats
+        self.terms = sorted({t.strip() for t in glossary if len(_norm(t)) >= min_term_chars})
+        self._exact = {_norm(t): t for t in self.terms}
+        self.vocabulary = COMMON_WORDS | {w.strip().lower() for w in vocabulary if w.strip()}
+        # Candidates are looked up by (first letter, word count)
+        self._by_key = defaultdict(list)
+        for term in self.terms:
+            words = len(term.split())
+            for span in {words, words + 1}:  # "my tocondria" spans one more word than "mitochondria"
+                self._by_key[(_norm(term)[0], span)].append((_norm(term), term))
+        self._max_span = max((len(t.split()) + 1 for t in self.terms), default=0)
+
+    @classmethod
+    def from_file(cls, path: Optional[str], vocab_path: Optional[str] = None, **kwargs) -> 'TranscriptPostProcessor':
+        """
+        Default glossary plus one term per line from `path` (# comments
+        allowed), and known words one per line from `vocab_path`
+        """
+        terms = list(DEFAULT_GLOSSARY)
+        if path:
+            with open(path, encoding='utf-8') as f:
+                terms += [line.split('#', 1)[0].strip() for line in f]
+        vocabulary = []
+        if vocab_path:
+            with open(vocab_path, encoding='utf-8', errors='ignore') as f:
+                vocabulary = [line.strip() for line in f if "'" not in line]
+        return cls([t for t in terms if t], vocabulary=vocabulary, **kwargs)
+
+    def signature(self) -> str:
+        """Changes whenever the output for the same input could change (for cache keys)"""
+        params = f"{POSTPROCESS_VERSION}|{self.min_similarity}|{self.max_loop_words}|{self.min_loop_repeats}"
+        digest = hashlib.sha256('\n'.join([params] + self.terms).encode('utf-8'))
+        digest.update('\n'.join(sorted(self.vocabulary)).encode('utf-8'))
+        return digest.hexdigest()[:16]
+
+    def process(self, text: str) -> str:
+        if not text:
+            return text
+        text = _FILLER.sub('', text)
+        text = _STUTTER.sub('', text)
+        text = _REPEATED_WORD.sub(self._keep_one, text)
+        text = self.collapse_loops(text)
+        text = self.apply_glossary(text)
+        text = _SPACE_BEFORE_PUNCT.sub(r'\1', text)
+        text = _DOUBLE_PUNCT.sub(r'\1', text)
+        text = _MULTISPACE.sub(' ', text).strip()
+        return _SENTENCE_START.sub(lambda m: m.group(1) + m.group(2).upper(), text)
+
+    @staticmethod
+    def _keep_one(match: re.Match) -> str:
+        word = match.group(1)
+        if word.lower() in DOUBLE_OK and len(match.group(0).split()) == 2:
+            return match.group(0)
+        return word
+
+    def collapse_loops(self, text: str) -> str:
+        """Keep one copy of any 2..max_loop_words word sequence repeated back to back min_loop_repeats+ times"""
+        words = text.split()
+        keys = [_norm(w) for w in words]
+        out = []
+        i = 0
+        while i < len(words):
+            collapsed = False
+            for n in range(min(self.max_loop_words, (len(words) - i) // self.min_loop_repeats), 1, -1):
+                pattern = keys[i:i + n]
+                repeats = 1
+                while keys[i + repeats * n:i + (repeats + 1) * n] == pattern:
+                    repeats += 1
+                if repeats >= self.min_loop_repeats:
+                    out.extend(words[i:i + n])
+                    i += repeats * n
+                    collapsed = True
+                    break
+            if not collapsed:
+                out.append(words[i])
+                i += 1
+        return ' '.join(out)
+
+    def apply_glossary(self, text: str) -> str:
+        if not self.terms:
+            return text
+        matches = list(_WORD.finditer(text))
+        out: List[str] = []
+        last = 0
+        i = 0
+        while i < len(matches):
+            replaced = self._match_term(text, matches, i)
+            if replaced:
+                term, span = replaced
+                out.append(text[last:matches[i].start()])
+                out.append(term)
+                last = matches[i + span - 1].end()
+                i += span
+            else:
+                i += 1
+        out.append(text[last:])
+        return ''.join(out)
+
+    def _match_term(self, text: str, matches: list, i: int):
+        # Shortest span first, so a match never swallows the following word
+        for span in range(1, min(self._max_span, len(matches) - i) + 1):
+            phrase = text[matches[i].start():matches[i + span - 1].end()]
+            if span > 1 and _PUNCT.search(phrase):
+                break  # never glue words across punctuation
+            words = [m.group(0).lower() for m in matches[i:i + span]]
+            if span > 1 and any(w in FUNCTION_WORDS for w in words):
+                break  # "an algorithm" is two words, not a mangled "algorithm"
+            candidate = _norm(phrase)
+            if len(candidate) < 4:
+                continue
+            if candidate in self._exact:
+                term = self._exact[candidate]
+                if phrase.lower() == term.lower():
+                    return None  # already correct (casing is left as spoken)
+                return term, span  # split or spaced differently ("eigen value")
+            if all(w.strip("'-") in self.vocabulary for w in words):
+                continue  # real words ("internal", "election"), not a mishearing
+            best, best_ratio = None, self.min_similarity
+            for term_norm, term in self._by_key.get((candidate[0], span), ()):
+                if abs(len(term_norm) - len(candidate)) > max(2, len(term_norm) // 5):
+                    continue
+                if _same_stem(candidate, term_norm):
+                    continue  # inflection or prefix ("hypotheses", "equilibria"), not a mishearing
+                matcher = difflib.SequenceMatcher(None, candidate, term_norm)
+                if matcher.quick_ratio() < best_ratio:
+                    continue
+                ratio = matcher.ratio()
+                if ratio >= best_ratio:
+                    best, best_ratio = term, ratio
+            if best:
+                return best, span
+        return None
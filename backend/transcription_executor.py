@@ -0,0 +1,154 @@
+"""
+Chunk transcription executor.
+Runs Whisper over a stream of PCM chunks either in-process or across a pool of
+worker processes, always yielding results in chunk order. One pool can be
+shared by every model: workers load each model the first time a chunk for it
+arrives, so the host runs a fixed number of workers (and CPU threads) however
+many profiles are in use.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Per-process models by name, loaded lazily inside pool workers
+_worker_models = {}
+_worker_config = {}
+
+
+def segment_tuples(segments) -> List[Tuple[float, float, str]]:
+    """Materialize Whisper segments as picklable (start, end, text) tuples"""
+    return [(segment.start, segment.end, segment.text.strip()) for segment in segments]
+
+
+def join_segments(segments: List[Tuple[float, float, str]]) -> str:
+    """Flatten (start, end, text) segments into one line of text"""
+    return ' '.join([text for _, _, text in segments if text]).strip()
+
+
+def _init_worker(device: str, compute_type: str, download_root: str, cpu_threads: int):
+    _worker_config.update(device=device, compute_type=compute_type, download_root=download_root,
+                          cpu_threads=cpu_threads)
+
+
+def _worker_model(model_name: str):
+    if model_name not in _worker_models:
+        from faster_whisper import WhisperModel
+
+        _worker_models[model_name] = WhisperModel(
+            model_name,
+            device=_worker_config['device'],
+            compute_type=_worker_config['compute_type'],
+            download_root=_worker_config['download_root'],
+            cpu_threads=_worker_config['cpu_threads'],
+            num_workers=1
+        )
+        print(f"✅ Pool worker {os.getpid()} loaded Whisper '{model_name}' ({_worker_config['cpu_threads']} threads)")
+    return _worker_models[model_name]
+
+
+def _transcribe_chunk(model_name: str, audio: np.ndarray, options: dict) -> Tuple[List[Tuple[float, float, str]], Optional[str]]:
+    segments, info = _worker_model(model_name).transcribe(audio, **options)
+    return segment_tuples(segments), info.language
+
+
+class TranscriptionPool:
+    """
+    Worker processes shared by every model. The workers split the host's
+    cores between them, so the pool never oversubscribes the CPU however many
+    models it serves.
+
+    The pool uses the 'spawn' start method: forking a process that already
+    has CTranslate2 threads running is not safe.
+    """
+
+    def __init__(self, size: int, device: str = 'cpu', compute_type: str = 'int8',
+                 download_root: str = './whisper_models'):
+        self.size = max(1, size)
+        cpu_threads = max(1, (os.cpu_count() or 1) // self.size)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.size,
+            mp_context=get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(device, compute_type, download_root, cpu_threads)
+        )
+        print(f"✅ Transcription pool started with {self.size} workers ({cpu_threads} threads each)")
+
+    def submit(self, model_name: str, audio: np.ndarray, options: dict):
+        return self._executor.submit(_transcribe_chunk, model_name, audio, options)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class TranscriptionExecutor:
+    """
+    Transcribe chunks sequentially on `model`, or on a process pool: the
+    shared `pool` when one is passed, otherwise a pool of `pool_size`
+    workers owned by this executor (pool_size <= 1 means no pool).
+    """
+
+    def __init__(
+        self,
+        model=None,
+        model_name: str = 'tiny',
+        pool_size: int = 1,
+        device: str = 'cpu',
+        compute_type: str = 'int8',
+        download_root: str = './whisper_models',
+        pool: Optional[TranscriptionPool] = None,
+    ):
+        self.model = model
+        self.model_name = model_name
+        self._pool = pool
+        self._owns_pool = False
+
+        if self._pool is None and pool_size > 1:
+            self._pool = TranscriptionPool(pool_size, device, compute_type, download_root)
+            self._owns_pool = True
+        elif self._pool is None and model is None:
+            raise ValueError("A loaded model is required when pool_size <= 1")
+        self.pool_size = self._pool.size if self._pool else 1
+
+    @property
+    def parallel(self) -> bool:
+        return self._pool is not None
+
+    def map_chunks(self, chunks: Iterable[np.ndarray], options: dict) -> Iterator[Tuple[list, Optional[str]]]:
+        """
+        Yield (segments, language) for each chunk, in input order, where
+        segments are (start, end, text) tuples relative to the chunk.
+        Chunks are pulled lazily, so at most 2 * pool_size decoded chunks are
+        held in memory while the pool works ahead.
+        """
+        if not self._pool:
+            for audio in chunks:
+                segments, info = self.model.transcribe(audio, **options)
+                yield segment_tuples(segments), info.language
+            return
+
+        in_flight = deque()
+        max_in_flight = 2 * self.pool_size
+        try:
+            for audio in chunks:
+                in_flight.append(self._pool.submit(self.model_name, audio, options))
+                if len(in_flight) >= max_in_flight:
+                    yield in_flight.popleft().result()
+                # Hand back finished results before blocking on the next chunk
+                # (matters for live audio, where chunks arrive in real time)
+                while in_flight and in_flight[0].done():
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+    def shutdown(self):
+        """Stop the pool if this executor owns it (a shared pool is left running)"""
+        if self._pool and self._owns_pool:
+            self._pool.shutdown()
+        self._pool = None
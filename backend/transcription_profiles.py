@@ -0,0 +1,96 @@
+"""
+Quality/latency profiles for transcription.
+
+A profile picks the Whisper model, beam width, how aggressively silence is
+dropped (both the energy pre-pass and Whisper's own VAD) and whether the
+transcript is cleaned with Gemini. Short voice memos default to `fast`;
+anything longer gets `balanced`, which matches the previous fixed settings.
+"""
+import os
+from typing import Optional
+
+PROFILE_FAST = 'fast'
+PROFILE_BALANCED = 'balanced'
+PROFILE_ACCURATE = 'accurate'
+
+# Recordings up to this long default to the fast profile
+FAST_PROFILE_MAX_SEC = float(os.getenv('FAST_PROFILE_MAX_SEC', '120'))
+
+BASE_WHISPER_OPTIONS = dict(
+    language=None,
+    task='translate',
+    beam_size=5,
+    vad_filter=True,
+    vad_parameters=dict(min_silence_duration_ms=500),
+    temperature=0.0,
+    condition_on_previous_text=False,
+)
+
+
+class TranscriptionProfile:
+    def __init__(self, name: str, model_name: str, beam_size: int, vad_min_silence_ms: int,
+                 prepass_min_drop_ms: int, clean: bool, temperature=0.0):
+        self.name = name
+        self.model_name = model_name
+        self.beam_size = beam_size
+        self.vad_min_silence_ms = vad_min_silence_ms    # Whisper VAD: shorter = more aggressive
+        self.prepass_min_drop_ms = prepass_min_drop_ms  # energy pre-pass: silences longer than this are dropped
+        self.clean = clean                              # run Gemini cleaning afterwards
+        self.temperature = temperature
+
+    def whisper_options(self) -> dict:
+        return dict(
+            BASE_WHISPER_OPTIONS,
+            beam_size=self.beam_size,
+            vad_parameters=dict(min_silence_duration_ms=self.vad_min_silence_ms),
+            temperature=self.temperature,
+        )
+
+    def segmenter_options(self) -> dict:
+        return dict(min_drop_silence_ms=self.prepass_min_drop_ms)
+
+    def public(self) -> dict:
+        return {
+            'name': self.name,
+            'model': self.model_name,
+            'beam_size': self.beam_size,
+            'vad_min_silence_ms': self.vad_min_silence_ms,
+            'clean': self.clean
+        }
+
+
+def build_profiles(default_model: str) -> dict:
+    return {
+        PROFILE_FAST: TranscriptionProfile(
+            PROFILE_FAST,
+            model_name=os.getenv('WHISPER_FAST_MODEL', default_model),
+            beam_size=1,
+            vad_min_silence_ms=300,
+            prepass_min_drop_ms=600,
+            clean=False
+        ),
+        PROFILE_BALANCED: TranscriptionProfile(
+            PROFILE_BALANCED,
+            model_name=default_model,
+            beam_size=5,
+            vad_min_silence_ms=500,
+            prepass_min_drop_ms=1000,
+            clean=True
+        ),
+        PROFILE_ACCURATE: TranscriptionProfile(
+            PROFILE_ACCURATE,
+            model_name=os.getenv('WHISPER_ACCURATE_MODEL', 'small'),
+            beam_size=5,
+            vad_min_silence_ms=1000,
+            prepass_min_drop_ms=2000,
+            clean=True,
+            # Fall back to sampling when greedy output looks degenerate
+            temperature=(0.0, 0.2, 0.4)
+        ),
+    }
+
+
+def default_profile_name(duration_sec: Optional[float]) -> str:
+    if duration_sec and duration_sec <= FAST_PROFILE_MAX_SEC:
+        return PROFILE_FAST
+    return PROFILE_BALANCED
@@ -0,0 +1,326 @@
+"""
+Energy-based VAD pre-pass for transcription chunking.
+
+Runs over the decoded 16 kHz PCM stream before Whisper:
+- frame energies, the speech mask and its padding are computed with NumPy
+- long silences are dropped so Whisper never sees them
+- chunk boundaries are placed inside pauses; when a speaker talks past the
+  chunk limit without pausing, the cut is forced and the next chunk overlaps
+  the previous one slightly
+- OverlapStitcher merges the per-chunk segments back by timestamp and removes
+  words repeated across a forced cut
+"""
+import re
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+class VadChunk:
+    """Audio sent to Whisper plus the original-time spans it was cut from"""
+
+    def __init__(self, audio: np.ndarray, spans: List[Tuple[float, float]], overlap_after: float = 0.0):
+        self.audio = audio
+        self.spans = spans  # [(start_sec, end_sec)] in the original recording
+        self.overlap_after = overlap_after  # seconds re-sent at the start of the next chunk
+        self._local_starts = np.cumsum([0.0] + [end - start for start, end in spans[:-1]])
+
+    @property
+    def start(self) -> float:
+        return self.spans[0][0]
+
+    @property
+    def end(self) -> float:
+        return self.spans[-1][1]
+
+    @property
+    def duration(self) -> float:
+        return len(self.audio) / SAMPLE_RATE
+
+    def to_original(self, t: float) -> float:
+        """Map a timestamp inside the chunk audio back to the original recording"""
+        for (start, end), local in zip(self.spans, self._local_starts):
+            if t < local + (end - start):
+                return start + max(0.0, t - local)
+        return self.end
+
+
+def frame_energy_db(audio: np.ndarray, frame_len: int) -> np.ndarray:
+    """RMS level of each full frame in dBFS"""
+    n = len(audio) // frame_len
+    if n == 0:
+        return np.empty(0, dtype=np.float32)
+    frames = audio[:n * frame_len].reshape(n, frame_len)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    return 20 * np.log10(rms + 1e-10)
+
+
+def mask_runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start (inclusive) and end (exclusive) indices of each True run"""
+    padded = np.concatenate(([0], mask.astype(np.int8), [0]))
+    edges = np.diff(padded)
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+class VadSegmenter:
+    """
+    Turn a stream of PCM blocks into VadChunks of at most `max_chunk_sec`
+    seconds of retained audio. With enabled=False it just re-blocks the
+    stream into fixed-size chunks (the old behaviour).
+    """
+
+    def __init__(
+        self,
+        max_chunk_sec: float = 60,
+        sample_rate: int = SAMPLE_RATE,
+        enabled: bool = True,
+        frame_ms: int = 30,
+        pad_ms: int = 200,
+        min_drop_silence_ms: int = 1000,
+        search_sec: float = 10,
+        lookahead_sec: float = 5,
+        overlap_sec: float = 1.0,
+        abs_floor_db: float = -50,
+        margin_db: float = 10,
+        min_dynamic_db: float = 15,
+        min_chunk_sec: float = 0.5,
+    ):
+        self.sample_rate = sample_rate
+        self.enabled = enabled
+        self.frame_len = sample_rate * frame_ms // 1000
+        self.frame_sec = self.frame_len / sample_rate
+        self.max_frames = int(max_chunk_sec / self.frame_sec)
+        self.pad_frames = int(pad_ms / 1000 / self.frame_sec)
+        self.min_drop_frames = int(min_drop_silence_ms / 1000 / self.frame_sec)
+        self.search_frames = int(search_sec / self.frame_sec)
+        self.lookahead_frames = int(lookahead_sec / self.frame_sec)
+        self.overlap_frames = int(overlap_sec / self.frame_sec)
+        self.abs_floor_db = abs_floor_db
+        self.margin_db = margin_db
+        self.min_dynamic_db = min_dynamic_db
+        self.min_chunk_samples = int(min_chunk_sec * sample_rate)
+
+        self.input_sec = 0.0       # audio decoded
+        self.inference_sec = 0.0   # audio handed to Whisper
+        self.overlap_sec = 0.0     # of which re-sent across forced cuts
+        self.chunk_count = 0
+        self.forced_cuts = 0
+
+        self._buf = np.empty(0, dtype=np.float32)
+        self._buf_start = 0  # sample index of _buf[0] in the recording
+        self._pending_overlap = 0.0  # overlap the next emitted chunk starts with
+
+    @property
+    def skipped_sec(self) -> float:
+        return max(0.0, self.input_sec - (self.inference_sec - self.overlap_sec))
+
+    def stats(self) -> dict:
+        return {
+            'input_sec': round(self.input_sec, 2),
+            'inference_sec': round(self.inference_sec, 2),
+            'skipped_sec': round(self.skipped_sec, 2),
+            'overlap_sec': round(self.overlap_sec, 2),
+            'chunks': self.chunk_count,
+            'forced_cuts': self.forced_cuts
+        }
+
+    # ---- streaming -------------------------------------------------------
+
+    def chunks(self, blocks: Iterable[np.ndarray]) -> Iterator[VadChunk]:
+        ready_samples = (self.max_frames + self.lookahead_frames) * self.frame_len
+        for block in blocks:
+            self.input_sec += len(block) / self.sample_rate
+            self._buf = np.concatenate((self._buf, block)) if len(self._buf) else block
+            while len(self._buf) >= ready_samples:
+                before = len(self._buf)
+                chunk = self._next_chunk(final=False)
+                if chunk is not None:
+                    yield chunk
+                elif len(self._buf) == before:
+                    break  # waiting for the current speech run to finish
+
+        while len(self._buf) >= self.min_chunk_samples:
+            before = len(self._buf)
+            chunk = self._next_chunk(final=True)
+            if chunk is not None:
+                yield chunk
+            elif len(self._buf) == before:
+                break
+        self._buf = np.empty(0, dtype=np.float32)
+
+    def _advance(self, samples: int):
+        self._buf = self._buf[samples:]
+        self._buf_start += samples
+
+    def _emit(self, sample_spans: List[Tuple[int, int]], overlap_samples: int) -> Optional[VadChunk]:
+        audio = np.concatenate([self._buf[s:e] for s, e in sample_spans])
+        spans = [
+            ((self._buf_start + s) / self.sample_rate, (self._buf_start + e) / self.sample_rate)
+            for s, e in sample_spans
+        ]
+        resent = self._pending_overlap
+        self._pending_overlap = overlap_samples / self.sample_rate
+        self._advance(sample_spans[-1][1] - overlap_samples)
+
+        if len(audio) < self.min_chunk_samples:
+            # Too short for Whisper; count it as skipped
+            self._pending_overlap = 0.0
+            return None
+
+        self.chunk_count += 1
+        self.inference_sec += len(audio) / self.sample_rate
+        self.overlap_sec += resent
+        if overlap_samples:
+            self.forced_cuts += 1
+        return VadChunk(audio, spans, overlap_after=overlap_samples / self.sample_rate)
+
+    def _next_chunk(self, final: bool) -> Optional[VadChunk]:
+        """Cut the next chunk from the buffer; None means wait for more audio (or done)"""
+        fl = self.frame_len
+        buf_len = len(self._buf)
+
+        if not self.enabled:
+            take = min(buf_len, self.max_frames * fl)
+            return self._emit([(0, take)], 0)
+
+        audio = self._buf
+        if final and buf_len % fl:
+            audio = np.concatenate((audio, np.zeros(fl - buf_len % fl, dtype=np.float32)))
+        db = frame_energy_db(audio, fl)
+        n_frames = len(db)
+        if n_frames == 0:
+            self._advance(buf_len)
+            return None
+
+        threshold = self._threshold(db)
+        keep = self._keep_mask(db, threshold)
+        starts, ends = mask_runs(keep)
+
+        if len(starts) == 0:
+            # All silence: drop it, keeping a pad's worth in case speech starts right after
+            drop = buf_len if final else (n_frames - self.pad_frames) * fl
+            self._advance(max(0, drop))
+            return None
+
+        spans = []
+        kept = 0
+        overlap = 0
+        for s, e in zip(starts, ends):
+            incomplete = not final and e >= n_frames
+            length = e - s
+            if kept + length <= self.max_frames:
+                if incomplete:
+                    if not spans:
+                        # Speech runs off the buffer end and still fits: drop the
+                        # leading silence and wait for it to finish
+                        self._advance(s * fl)
+                        return None
+                    break
+                spans.append((s, e))
+                kept += length
+                continue
+
+            # Doesn't fit; prefer ending the chunk in the dropped silence before it
+            if spans and kept >= self.max_frames // 2:
+                break
+
+            room = self.max_frames - kept
+            cut = self._best_pause(db, threshold, max(s + 1, s + room - self.search_frames), s + room)
+            if cut is None:
+                cut = s + room
+                overlap = min(self.overlap_frames, room - 1)
+            spans.append((s, cut))
+            break
+
+        if not spans:
+            return None
+
+        sample_spans = [(s * fl, min(e * fl, buf_len)) for s, e in spans]
+        return self._emit(sample_spans, overlap * fl)
+
+    # ---- vectorized helpers -----------------------------------------------
+
+    def _threshold(self, db: np.ndarray) -> float:
+        """Adaptive speech threshold: noise floor + margin, but never above peak - dynamic range"""
+        noise = float(np.percentile(db, 10))
+        peak = float(np.percentile(db, 95))
+        return max(self.abs_floor_db, min(noise + self.margin_db, peak - self.min_dynamic_db))
+
+    def _keep_mask(self, db: np.ndarray, threshold: float) -> np.ndarray:
+        """Speech frames padded on both sides, with pauses shorter than min_drop filled back in"""
+        speech = db > threshold
+        if self.pad_frames:
+            kernel = np.ones(2 * self.pad_frames + 1)
+            speech = np.convolve(speech.astype(np.float32), kernel, mode='same') > 0
+
+        gap_starts, gap_ends = mask_runs(~speech)
+        short = (gap_ends - gap_starts) < self.min_drop_frames
+        delta = np.zeros(len(speech) + 1, dtype=np.int32)
+        np.add.at(delta, gap_starts[short], 1)
+        np.add.at(delta, gap_ends[short], -1)
+        return speech | (np.cumsum(delta)[:-1] > 0)
+
+    def _best_pause(self, db: np.ndarray, threshold: float, lo: int, hi: int) -> Optional[int]:
+        """Quietest frame in [lo, hi) if it is below the speech threshold"""
+        hi = min(hi, len(db))
+        if hi - lo < 1:
+            return None
+        window = db[lo:hi]
+        if len(window) >= 5:
+            window = np.convolve(window, np.ones(5) / 5, mode='same')
+        idx = int(np.argmin(window))
+        if window[idx] >= threshold:
+            return None
+        return lo + idx
+
+
+_WORD_NORMALIZE = re.compile(r'[^\w]+')
+
+
+def _norm(word: str) -> str:
+    return _WORD_NORMALIZE.sub('', word.lower())
+
+
+class OverlapStitcher:
+    """
+    Merge per-chunk Whisper segments in order. Across a forced cut, segments
+    are assigned to one side of the seam by their original timestamps, then
+    any words still repeated at the seam are dropped.
+    """
+
+    def __init__(self, max_overlap_words: int = 12):
+        self.max_overlap_words = max_overlap_words
+        self._seam = None
+        self._tail = []
+
+    def add(self, chunk: VadChunk, segments: List[Tuple[float, float, str]]) -> str:
+        segs = [(chunk.to_original(start), chunk.to_original(end), text) for start, end, text in segments]
+
+        if self._seam is not None:
+            # Already covered by the previous chunk
+            segs = [seg for seg in segs if seg[1] > self._seam]
+
+        next_seam = None
+        if chunk.overlap_after:
+            next_seam = chunk.end - chunk.overlap_after / 2
+            # The next chunk will transcribe these with full context
+            segs = [seg for seg in segs if seg[0] < next_seam]
+
+        words = ' '.join(text.strip() for _, _, text in segs).split()
+        if self._seam is not None:
+            words = words[self._repeated_prefix(words):]
+
+        self._seam = next_seam
+        self._tail = (self._tail + words)[-self.max_overlap_words:]
+        return ' '.join(words)
+
+    def _repeated_prefix(self, words: List[str]) -> int:
+        """Length of the longest (>= 2 word) prefix of `words` that repeats the previous tail"""
+        tail = [_norm(w) for w in self._tail]
+        head = [_norm(w) for w in words[:self.max_overlap_words]]
+        for k in range(min(len(tail), len(head)), 1, -1):
+            if tail[-k:] == head[:k]:
+                return k
+        return 0
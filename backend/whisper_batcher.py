@@ -0,0 +1,165 @@
+"""
+Cross-request micro-batching for Whisper.
+
+Each transcribe() call is cut into speech clips (Silero VAD, at most 30s
+each) in the caller's thread and queued. A scheduler thread collects clips
+from every in-flight request for up to `max_wait_ms`, runs them through
+faster-whisper's BatchedInferencePipeline in one go, and hands each caller
+back only its own segments. BatchingWhisperModel has the
+WhisperModel.transcribe interface, so it can wrap the per-worker model or
+the model inside the shared inference server.
+"""
+import bisect
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+from typing import List
+
+import numpy as np
+from faster_whisper import BatchedInferencePipeline
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+SAMPLE_RATE = 16000
+MAX_CLIP_SEC = 30  # Whisper's context window
+
+BatchSegment = namedtuple('BatchSegment', ['start', 'end', 'text'])
+BatchInfo = namedtuple('BatchInfo', ['language', 'language_probability', 'duration'])
+
+# Options that only shape how requests are cut into clips, not decoding
+_CLIP_OPTIONS = ('vad_filter', 'vad_parameters', 'condition_on_previous_text')
+
+
+class _Request:
+    def __init__(self, audio: np.ndarray, clips: List[dict], language: str,
+                 language_probability: float, decode_options: dict):
+        self.audio = audio
+        self.clips = clips  # [{'start', 'end'}] in samples
+        self.language = language
+        self.language_probability = language_probability
+        self.decode_options = decode_options
+        self.group = tuple(sorted((k, repr(v)) for k, v in decode_options.items()))
+        self.future = Future()
+
+
+def _split_clips(audio: np.ndarray, options: dict) -> List[dict]:
+    """Speech clips no longer than MAX_CLIP_SEC, in samples"""
+    if options.get('vad_filter', True):
+        params = dict(options.get('vad_parameters') or {})
+        params['max_speech_duration_s'] = MAX_CLIP_SEC
+        return get_speech_timestamps(audio, VadOptions(**params))
+    step = MAX_CLIP_SEC * SAMPLE_RATE
+    return [{'start': s, 'end': min(s + step, len(audio))} for s in range(0, len(audio), step)]
+
+
+class BatchingWhisperModel:
+    """
+    Drop-in for WhisperModel.transcribe that shares batches between threads.
+    max_batch_size bounds the clips per forward pass; max_wait_ms is how long
+    the first queued request waits for company.
+    """
+
+    def __init__(self, model, max_batch_size: int = 8, max_wait_ms: float = 20):
+        self.model = model
+        self.pipeline = BatchedInferencePipeline(model=model)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches_run = 0
+        self.clips_run = 0
+        self._queue = queue.Queue()
+        self._scheduler = threading.Thread(target=self._run, daemon=True, name='whisper-batcher')
+        self._scheduler.start()
+
+    def detect_language(self, *args, **kwargs):
+        return self.model.detect_language(*args, **kwargs)
+
+    def stats(self) -> dict:
+        return {
+            'batches': self.batches_run,
+            'clips': self.clips_run,
+            'avg_batch_size': round(self.clips_run / self.batches_run, 2) if self.batches_run else 0.0
+        }
+
+    def transcribe(self, audio: np.ndarray, **options):
+        duration = len(audio) / SAMPLE_RATE
+        clips = _split_clips(audio, options)
+        if not clips:
+            return [], BatchInfo(options.get('language') or 'en', 1.0, duration)
+
+        language = options.get('language')
+        probability = 1.0
+        if language is None:
+            # Detected per request so one batch can mix speakers of different languages
+            language, probability, _ = self.model.detect_language(audio=audio)
+
+        decode_options = {k: v for k, v in options.items() if k not in _CLIP_OPTIONS}
+        decode_options['language'] = language
+        decode_options.setdefault('without_timestamps', False)
+
+        req = _Request(audio, clips, language, probability, decode_options)
+        self._queue.put(req)
+        segments = req.future.result()
+        return segments, BatchInfo(language, probability, duration)
+
+    # ---- scheduler -------------------------------------------------------
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            clip_count = len(batch[0].clips)
+            deadline = time.monotonic() + self.max_wait
+            while clip_count < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    req = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(req)
+                clip_count += len(req.clips)
+
+            groups = {}
+            for req in batch:
+                groups.setdefault(req.group, []).append(req)
+            for reqs in groups.values():
+                self._run_group(reqs)
+
+    def _run_group(self, reqs: List[_Request]):
+        """One pipeline call over the concatenated audio of requests with identical decode options"""
+        offsets = []
+        clip_timestamps = []
+        position = 0
+        for req in reqs:
+            offsets.append(position / SAMPLE_RATE)
+            for clip in req.clips:
+                clip_timestamps.append({
+                    'start': (position + clip['start']) / SAMPLE_RATE,
+                    'end': (position + clip['end']) / SAMPLE_RATE
+                })
+            position += len(req.audio)
+
+        try:
+            audio = np.concatenate([req.audio for req in reqs]) if len(reqs) > 1 else reqs[0].audio
+            segments, _ = self.pipeline.transcribe(
+                audio,
+                clip_timestamps=clip_timestamps,
+                batch_size=self.max_batch_size,
+                **reqs[0].decode_options
+            )
+            results = [[] for _ in reqs]
+            for seg in segments:
+                # Timestamps are rounded to ms; nudge so a clip starting at an offset stays with its request
+                idx = bisect.bisect_right(offsets, seg.start + 1e-3) - 1
+                offset = offsets[idx]
+                results[idx].append(BatchSegment(round(seg.start - offset, 3), round(seg.end - offset, 3), seg.text))
+        except Exception as e:
+            for req in reqs:
+                req.future.set_exception(e)
+            return
+
+        self.batches_run += 1
+        self.clips_run += len(clip_timestamps)
+        for req, result in zip(reqs, results):
+            req.future.set_result(result)
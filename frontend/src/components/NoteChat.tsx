@@ -21,6 +21,7 @@ interface NoteChatProps {
 const NoteChat = ({ noteId, noteTitle }: NoteChatProps) => {
   const [isOpen, setIsOpen] = useState(false);
   const [messages, setMessages] = useState<Message[]>([]);
+  const [sessionId, setSessionId] = useState<string | null>(null); // server keeps the conversation
   const [input, setInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const messagesEndRef = useRef<HTMLDivElement>(null);
@@ -59,10 +60,7 @@ const NoteChat = ({ noteId, noteTitle }: NoteChatProps) => {
         credentials: 'include',
         body: JSON.stringify({
           question: input,
-          history: messages.slice(-6).map(m => ({
-            question: m.role === 'user' ? m.content : '',
-            answer: m.role === 'assistant' ? m.content : ''
-          })).filter(h => h.question || h.answer)
+          ...(sessionId ? { session_id: sessionId } : {})
         })
       });
 
@@ -71,6 +69,7 @@ const NoteChat = ({ noteId, noteTitle }: NoteChatProps) => {
       }
 
       const data = await response.json();
+      setSessionId(data.session_id);
 
       const assistantMessage: Message = {
         role: 'assistant',
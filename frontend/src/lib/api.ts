@@ -189,6 +189,19 @@ export const api = {
     }
   },
 
+  async searchNotes(query: string, page = 1, pageSize = 20) {
+    const params = new URLSearchParams({ q: query, page: String(page), page_size: String(pageSize) });
+    try {
+      const response = await authFetch(`${API_URL}/search?${params}`);
+      const data = await response.json();
+      console.log(`🔍 Search "${query}":`, data.results?.length || 0, 'results');
+      return data;
+    } catch (error) {
+      console.error('❌ Search failed:', error);
+      throw error;
+    }
+  },
+
   async getNote(noteId: string) {
     console.log('📄 Fetching note:', noteId);
     try {
@@ -341,6 +354,20 @@ export const api = {
     }
   },
 
+  async getFolderNotes(folderId: string, limit = 50, after?: string) {
+    const params = new URLSearchParams({ limit: String(limit) });
+    if (after) params.set('after', after);
+    try {
+      const response = await authFetch(`${API_URL}/folders/${folderId}/notes?${params}`);
+      const data = await response.json();
+      console.log('✅ Folder notes fetched:', data.notes?.length || 0);
+      return data;
+    } catch (error) {
+      console.error('❌ Failed to fetch folder notes:', error);
+      throw error;
+    }
+  },
+
   async addNotesToFolder(folderId: string, noteIds: string[]) {
     console.log('📌 Adding notes to folder:', folderId, noteIds);
     try {
@@ -355,5 +382,21 @@ export const api = {
       console.error('❌ Failed to add notes to folder:', error);
       throw error;
     }
+  },
+
+  async removeNotesFromFolder(folderId: string, noteIds: string[]) {
+    console.log('📤 Removing notes from folder:', folderId, noteIds);
+    try {
+      const response = await authFetch(`${API_URL}/folders/${folderId}/notes`, {
+        method: 'DELETE',
+        body: JSON.stringify({ note_ids: noteIds })
+      });
+      const data = await response.json();
+      console.log('✅ Notes removed from folder:', data);
+      return data;
+    } catch (error) {
+      console.error('❌ Failed to remove notes from folder:', error);
+      throw error;
+    }
   }
 };
@@ -15,7 +15,7 @@ import {
   CheckSquare,
   X,
 } from "lucide-react";
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import { useToast } from "../hooks/use-toast";
 import { cn } from "../lib/utils";
@@ -68,6 +68,8 @@ const AllNotes = () => {
   const [selectionMode, setSelectionMode] = useState(false);
   const [selectedNotes, setSelectedNotes] = useState<Set<string>>(new Set());
   const [showDeleteDialog, setShowDeleteDialog] = useState(false);
+  const searchTimer = useRef<ReturnType<typeof setTimeout>>();
+  const latestQuery = useRef("");
 
   const fetchNotes = async () => {
     try {
@@ -99,14 +101,27 @@ const AllNotes = () => {
 
   const handleSearch = (query: string) => {
     setSearchQuery(query);
+    latestQuery.current = query;
+    clearTimeout(searchTimer.current);
     if (!query.trim()) {
       setFilteredNotes(notes);
     } else {
+      // Instant filter on what's loaded, then ranked server results over full content and transcripts
       const filtered = notes.filter(note =>
         note.title.toLowerCase().includes(query.toLowerCase()) ||
         note.preview.toLowerCase().includes(query.toLowerCase())
       );
       setFilteredNotes(filtered);
+      searchTimer.current = setTimeout(async () => {
+        try {
+          const data = await api.searchNotes(query.trim());
+          if (data.success && latestQuery.current === query) {
+            setFilteredNotes(data.results.map((result: any) => ({ ...result, preview: result.snippet })));
+          }
+        } catch (error) {
+          console.error("Search failed, keeping local results", error);
+        }
+      }, 300);
     }
   };
 
@@ -28,6 +28,7 @@ const Chatbot = () => {
   const [notes, setNotes] = useState<Note[]>([]);
   const [selectedNote, setSelectedNote] = useState<Note | null>(null);
   const [messages, setMessages] = useState<Message[]>([]);
+  const [sessionId, setSessionId] = useState<string | null>(null); // server keeps the conversation
   const [input, setInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const [isLoadingNotes, setIsLoadingNotes] = useState(true);
@@ -73,6 +74,7 @@ const Chatbot = () => {
 
   const handleNoteSelect = (note: Note) => {
     setSelectedNote(note);
+    setSessionId(null);
     setMessages([{
       role: 'assistant',
       content: `Hi! I'm your AI tutor. I've loaded "${note.title}". Ask me anything about this note!`,
@@ -105,10 +107,7 @@ const Chatbot = () => {
         credentials: 'include',
         body: JSON.stringify({
           question: input,
-          history: messages.slice(-6).map(m => ({
-            question: m.role === 'user' ? m.content : '',
-            answer: m.role === 'assistant' ? m.content : ''
-          })).filter(h => h.question || h.answer)
+          ...(sessionId ? { session_id: sessionId } : {})
         })
       });
 
@@ -117,6 +116,7 @@ const Chatbot = () => {
       }
 
       const data = await response.json();
+      setSessionId(data.session_id);
 
       const assistantMessage: Message = {
         role: 'assistant',
@@ -21,41 +21,34 @@ interface Note {
 interface Folder {
   id: string;
   name: string;
-  note_ids: string[];
+  note_count?: number;
   created_at?: number;
 }
 
+const PAGE_SIZE = 50;
+
 const FolderDetail = () => {
   const { folderId } = useParams();
   const navigate = useNavigate();
   const location = useLocation();
   const [folder, setFolder] = useState<Folder | null>(location.state?.folder || null);
   const [notes, setNotes] = useState<Note[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [isLoading, setIsLoading] = useState(true);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
 
   useEffect(() => {
     const fetchFolderAndNotes = async () => {
+      if (!folderId) return;
       try {
-        const [notesData, foldersData] = await Promise.all([
-          api.getNotes(),
-          api.getFolders()
-        ]);
-
-        // If we don't have folder data from navigation state, fetch it
-        if (!folder && foldersData.success) {
-          const currentFolder = foldersData.folders.find((f: Folder) => f.id === folderId);
-          setFolder(currentFolder || null);
-        }
-
-        // Filter notes that are in this folder
-        if (notesData.success && (folder || foldersData.success)) {
-          const currentFolder = folder || foldersData.folders.find((f: Folder) => f.id === folderId);
-          if (currentFolder) {
-            const folderNotes = notesData.notes.filter((note: Note) => 
-              currentFolder.note_ids.includes(note.id)
-            );
-            setNotes(folderNotes);
-          }
+        // The server returns the folder and its first page of notes in one call
+        const data = await api.getFolderNotes(folderId, PAGE_SIZE);
+        if (data.success) {
+          setFolder(data.folder);
+          setNotes(data.notes);
+          setNextCursor(data.next_cursor);
+        } else {
+          setFolder(null);
         }
       } catch (error) {
         console.error("Failed to fetch folder details", error);
@@ -66,7 +59,25 @@ const FolderDetail = () => {
     };
 
     fetchFolderAndNotes();
-  }, [folderId, folder, navigate]);
+  }, [folderId, navigate]);
+
+  const handleLoadMore = async () => {
+    if (!folderId || !nextCursor) return;
+    setIsLoadingMore(true);
+    try {
+      const data = await api.getFolderNotes(folderId, PAGE_SIZE, nextCursor);
+      if (data.success) {
+        setNotes(prev => [...prev, ...data.notes]);
+        setNextCursor(data.next_cursor);
+      }
+    } catch (error) {
+      console.error("Failed to load more notes", error);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
+  const noteCount = folder?.note_count ?? notes.length;
 
   const handleToggleFavorite = async (noteId: string) => {
     try {
@@ -124,7 +135,7 @@ const FolderDetail = () => {
       <div className="flex-1 flex flex-col">
         <DashboardHeader 
           title={folder.name} 
-          subtitle={`${notes.length} note${notes.length !== 1 ? 's' : ''} in this folder`}
+          subtitle={`${noteCount} note${noteCount !== 1 ? 's' : ''} in this folder`}
           showSearch={false}
         />
 
@@ -149,7 +160,7 @@ const FolderDetail = () => {
                 <div>
                   <h2 className="text-2xl font-bold text-foreground">{folder.name}</h2>
                   <div className="flex items-center gap-2 text-muted-foreground">
-                    <span>{notes.length} note{notes.length !== 1 ? 's' : ''}</span>
+                    <span>{noteCount} note{noteCount !== 1 ? 's' : ''}</span>
                     {folder.created_at && (
                       <>
                         <span>•</span>
@@ -197,6 +208,14 @@ const FolderDetail = () => {
                 ))}
               </div>
             )}
+
+            {nextCursor && (
+              <div className="flex justify-center">
+                <Button variant="outline" onClick={handleLoadMore} disabled={isLoadingMore}>
+                  {isLoadingMore ? 'Loading...' : 'Load more'}
+                </Button>
+              </div>
+            )}
           </div>
         </main>
       </div>
@@ -36,6 +36,11 @@ const Record = () => {
  
   const mediaRecorderRef = useRef<MediaRecorder | null>(null);
   const chunksRef = useRef<Blob[]>([]);
+  // ✅ Live transcription session: timeslices are uploaded while recording
+  const liveJobIdRef = useRef<string | null>(null);
+  const liveSeqRef = useRef(0);
+  const liveUploadsRef = useRef<Promise<void>[]>([]);
+  const liveLostRef = useRef(false);
   const timerRef = useRef<NodeJS.Timeout | null>(null);
   const fileInputRef = useRef<HTMLInputElement>(null);
   const wasPlayingRef = useRef<boolean>(false);
@@ -84,6 +89,152 @@ const Record = () => {
   }, [audioUrl]);
 
 
+  const getAuthHeaders = (): HeadersInit => {
+    const token = localStorage.getItem('auth_token');
+    return token ? { 'Authorization': `Bearer ${token}` } : {};
+  };
+
+
+  // ✅ Poll a transcription job until it finishes, showing partial text as it lands
+  const pollTranscriptionJob = async (jobId: string) => {
+    while (true) {
+      await new Promise(resolve => setTimeout(resolve, 2000));
+      const jobResponse = await fetch(`${API_URL}/jobs/${jobId}`, {
+        credentials: 'include',
+        headers: getAuthHeaders()
+      });
+      if (!jobResponse.ok) {
+        throw new Error('Failed to fetch transcription progress');
+      }
+      const job = await jobResponse.json();
+      if (job.state === 'completed') {
+        return job.result;
+      }
+      if (job.state === 'failed') {
+        throw new Error(job.error || 'Transcription failed');
+      }
+      if (job.partial_transcript) {
+        setTranscript(job.partial_transcript);
+      }
+      console.log(`⏳ Job ${job.state}: ${job.chunks_done}/${job.chunks_total ?? '?'} chunks`);
+    }
+  };
+
+
+  const applyTranscriptionResult = (data: any) => {
+    setTranscript(data.transcript);
+    setHasTranscribed(true);
+
+    if (data.audio_url) {
+      const fullAudioUrl = `${API_URL}${data.audio_url}`;
+      setAudioUrl(fullAudioUrl);
+      console.log('🎵 Audio URL:', fullAudioUrl);
+    }
+
+    toast({
+      title: "Transcription complete",
+      description: `Transcribed ${data.length} characters in ${data.duration}`,
+    });
+  };
+
+
+  const startLiveSession = async () => {
+    liveJobIdRef.current = null;
+    liveSeqRef.current = 0;
+    liveUploadsRef.current = [];
+    liveLostRef.current = false;
+    try {
+      const response = await fetch(`${API_URL}/live/start`, {
+        method: 'POST',
+        credentials: 'include',
+        headers: getAuthHeaders()
+      });
+      if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`);
+      }
+      const data = await response.json();
+      liveJobIdRef.current = data.job_id;
+      console.log('🔴 Live transcription session:', data.job_id);
+    } catch (error) {
+      // Fall back to transcribing the full recording after stop
+      console.warn('⚠️ Live transcription unavailable:', error);
+    }
+  };
+
+
+  const uploadLiveSegment = (segment: Blob) => {
+    const jobId = liveJobIdRef.current;
+    if (!jobId) return;
+
+    const formData = new FormData();
+    formData.append('seq', String(liveSeqRef.current++));
+    formData.append('segment', segment, 'segment.webm');
+
+    const upload = fetch(`${API_URL}/live/${jobId}/segments`, {
+      method: 'POST',
+      body: formData,
+      credentials: 'include',
+      headers: getAuthHeaders()
+    })
+      .then(async response => {
+        if (response.status === 404 || response.status === 409) {
+          // The session is gone (e.g. its server worker restarted); stop uploading and
+          // transcribe the whole recording once it stops
+          if (liveJobIdRef.current === jobId) {
+            console.warn('⚠️ Live session lost, will transcribe the full recording');
+            liveJobIdRef.current = null;
+            liveLostRef.current = true;
+          }
+          return;
+        }
+        const data = await response.json();
+        if (data.partial_transcript) {
+          setTranscript(data.partial_transcript);
+        }
+      })
+      .catch(error => console.error('❌ Live segment upload failed:', error));
+    liveUploadsRef.current.push(upload);
+  };
+
+
+  const finishLiveSession = async (recording: Blob) => {
+    const jobId = liveJobIdRef.current;
+    const lost = liveLostRef.current;
+    liveJobIdRef.current = null;
+    liveLostRef.current = false;
+    if (!jobId) {
+      if (lost) {
+        await transcribeBlob(recording, 'recording.webm');
+      }
+      return;
+    }
+
+    setIsTranscribing(true);
+    try {
+      await Promise.all(liveUploadsRef.current);
+      const response = await fetch(`${API_URL}/live/${jobId}/finish`, {
+        method: 'POST',
+        credentials: 'include',
+        headers: { ...getAuthHeaders(), 'Content-Type': 'application/json' },
+        body: JSON.stringify({ total_segments: liveSeqRef.current })
+      });
+      if (!response.ok) {
+        throw new Error('Failed to finish live session');
+      }
+      applyTranscriptionResult(await pollTranscriptionJob(jobId));
+    } catch (error) {
+      console.error('Live transcription error:', error);
+      toast({
+        title: "Live transcription interrupted",
+        description: "Transcribing the full recording instead",
+      });
+      await transcribeBlob(recording, 'recording.webm');
+    } finally {
+      setIsTranscribing(false);
+    }
+  };
+
+
   const startRecording = async () => {
     try {
       const stream = await navigator.mediaDevices.getUserMedia({
@@ -106,6 +257,7 @@ const Record = () => {
       mediaRecorder.ondataavailable = (e) => {
         if (e.data.size > 0) {
           chunksRef.current.push(e.data);
+          uploadLiveSegment(e.data);
         }
       };
 
@@ -114,9 +266,11 @@ const Record = () => {
         const blob = new Blob(chunksRef.current, { type: 'audio/webm;codecs=opus' });
         setAudioBlob(blob);
         stream.getTracks().forEach(track => track.stop());
+        finishLiveSession(blob);
       };
 
 
+      await startLiveSession();
       mediaRecorder.start(1000);
       setIsRecording(true);
       setRecordingTime(0);
@@ -195,24 +349,24 @@ const Record = () => {
       });
       return;
     }
+    await transcribeBlob(audioBlob, selectedFile?.name || 'recording.webm');
+  };
 
 
+  const transcribeBlob = async (blob: Blob, filename: string) => {
     setIsTranscribing(true);
     const formData = new FormData();
-    formData.append('audio', audioBlob, selectedFile?.name || 'recording.webm');
+    formData.append('audio', blob, filename);
+    // ✅ Run as a background job so long lectures don't hit the request timeout
+    formData.append('mode', 'async');
 
 
     try {
-      const token = localStorage.getItem('auth_token');
-      console.log('🔐 Token:', token ? 'Present' : 'Missing');
-      
       const response = await fetch(`${API_URL}/transcribe`, {
         method: 'POST',
         body: formData,
         credentials: 'include',
-        headers: token ? {
-          'Authorization': `Bearer ${token}`
-        } : {}
+        headers: getAuthHeaders()
       });
 
 
@@ -221,21 +375,13 @@ const Record = () => {
       }
 
 
-      const data = await response.json();
-      setTranscript(data.transcript);
-      setHasTranscribed(true);
-
-
-      if (data.audio_url) {
-        const fullAudioUrl = `${API_URL}${data.audio_url}`;
-        setAudioUrl(fullAudioUrl);
-        console.log('🎵 Audio URL:', fullAudioUrl);
+      let data = await response.json();
+      if (data.job_id) {
+        console.log('📋 Transcription job queued:', data.job_id);
+        data = await pollTranscriptionJob(data.job_id);
       }
-     
-      toast({
-        title: "Transcription complete",
-        description: `Transcribed ${data.length} characters in ${data.duration}`,
-      });
+
+      applyTranscriptionResult(data);
     } catch (error) {
       console.error('Transcription error:', error);
       toast({